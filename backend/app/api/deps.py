@@ -5,7 +5,8 @@ Shared logic for auth, database, and rate limiting
 
 from typing import Optional, Generator
 from datetime import datetime
-from fastapi import Depends, HTTPException, Security, status
+import hashlib
+from fastapi import Depends, HTTPException, Request, Security, status
 from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
@@ -125,3 +126,16 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+def get_tenant_id(
+    request: Request,
+    api_key: Optional[str] = Security(api_key_header)
+) -> str:
+    """Tenant for compute queue limits: the caller's API key, else its client host"""
+    if api_key:
+        # Never keep raw keys around in executor bookkeeping
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    if request.client and request.client.host:
+        return f"host:{request.client.host}"
+    return "anonymous"
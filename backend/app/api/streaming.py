@@ -0,0 +1,210 @@
+"""
+Streaming helpers
+Newline-delimited JSON (NDJSON) and CSV request parsing and response encoding
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+# Array items encoded per chunk of a streamed JSON response
+JSON_CHUNK_ITEMS = 1000
+
+# A single record line may not exceed this, so a missing newline cannot
+# make the parser buffer an entire upload
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class NDJSONError(ValueError):
+    """Raised for a request line that is not a JSON object"""
+
+    def __init__(self, line_number: int, message: str):
+        self.line_number = line_number
+        super().__init__(f"Line {line_number}: {message}")
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies produced while the request is still being read
+
+    StreamingResponse watches for client disconnects by consuming ASGI
+    receive messages alongside the body, which swallows the request chunks
+    a request.stream() reader in the body generator is waiting for. This
+    one only streams; a client that goes away surfaces as a failed send or
+    as ClientDisconnect in the reader.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class CSVError(ValueError):
+    """Raised for a CSV request whose header cannot be read"""
+
+
+async def iter_ndjson(
+    request: Request,
+    max_line_bytes: int = MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Parse an NDJSON request body as it arrives
+
+    Yields:
+        (line_number, record) for every non-blank line, 1-based
+
+    Raises:
+        NDJSONError: A line is not a JSON object or exceeds max_line_bytes
+    """
+    buffer = b""
+    line_number = 0
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, _parse_line(line, line_number)
+        if len(buffer) > max_line_bytes:
+            raise NDJSONError(line_number + 1, f"line exceeds {max_line_bytes} bytes")
+
+    if buffer.strip():
+        line_number += 1
+        yield line_number, _parse_line(buffer, line_number)
+
+
+def _parse_line(line: bytes, line_number: int) -> Dict[str, Any]:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise NDJSONError(line_number, f"invalid JSON ({e})")
+    if not isinstance(record, dict):
+        raise NDJSONError(line_number, "expected a JSON object")
+    return record
+
+
+async def iter_batches(items: AsyncIterable[Any], size: int) -> AsyncIterator[List[Any]]:
+    """Group an async iterable into lists of at most size items"""
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_line(obj: Any) -> bytes:
+    """Encode one object as an NDJSON line"""
+    return json.dumps(obj, default=str, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def iter_json_object(
+    fields: Dict[str, Any],
+    key: str,
+    items: Iterable[Any],
+    chunk_size: int = JSON_CHUNK_ITEMS
+) -> Iterator[bytes]:
+    """
+    Encode fields plus key: [items...] as one JSON object, a chunk at a time
+
+    key must not be one of fields; the array comes last. Items are encoded
+    chunk_size at a time, so a large array never exists as one list of
+    objects or one bytes value. The result is the same document as
+    encoding the whole object at once.
+    """
+    head = _encode_json({**fields, key: []})
+    # Everything up to the array's opening bracket (head ends in `]}`)
+    yield head[:-2]
+    items = iter(items)
+    separator = b""
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        yield separator + _encode_json(chunk)[1:-1]
+        separator = b","
+    yield b"]}"
+
+
+def _encode_json(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # Values orjson does not take (integers beyond 64 bits, custom types)
+        return json.dumps(obj, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+async def read_csv_header(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = MAX_LINE_BYTES
+) -> Tuple[List[str], str, bytes]:
+    """
+    Read the header record off the front of a CSV byte stream
+
+    Only the header is parsed; the caller passes the rest of the stream on
+    as it is.
+
+    Returns:
+        (column names, the header's line ending, bytes read past the header)
+
+    Raises:
+        CSVError: The stream is empty, or the header is not UTF-8 or exceeds max_line_bytes
+    """
+    buffer = b""
+    end = None
+    async for chunk in chunks:
+        buffer += chunk
+        end = _csv_record_end(buffer)
+        if end is not None:
+            break
+        if len(buffer) > max_line_bytes:
+            raise CSVError(f"CSV header exceeds {max_line_bytes} bytes")
+    if end is None:
+        # Header only, without a final newline
+        end = len(buffer)
+
+    try:
+        header = buffer[:end].decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise CSVError(f"CSV header is not valid UTF-8 ({e})")
+    columns = next(csv.reader(io.StringIO(header)), None)
+    if not columns:
+        raise CSVError("CSV body has no header")
+
+    line_ending = "\r\n" if header.endswith("\r\n") else "\n"
+    return columns, line_ending, buffer[end:]
+
+
+def _csv_record_end(buffer: bytes) -> Optional[int]:
+    """End of the first CSV record in buffer (past its newline), None if incomplete"""
+    start = 0
+    while True:
+        newline = buffer.find(b"\n", start)
+        if newline < 0:
+            return None
+        # A newline inside a quoted field leaves an odd number of quotes before it
+        if buffer.count(b'"', 0, newline) % 2 == 0:
+            return newline + 1
+        start = newline + 1
+
+
+def csv_line(values: List[Any], line_ending: str = "\r\n") -> bytes:
+    """Encode one CSV record"""
+    out = io.StringIO()
+    csv.writer(out, lineterminator=line_ending).writerow(values)
+    return out.getvalue().encode("utf-8")
@@ -3,28 +3,56 @@ Data Cleaning API Endpoint
 Intelligent data cleaning with AI-powered corrections
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Query, Request, status, Depends
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, Optional
 import time
 import re
 from datetime import datetime
 
-from app.models.schemas import CleanRequest, CleanResponse, CleanedRecord
-from app.services.cleaning.cleaner import DataCleaner
+from app.api.streaming import (
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    NDJSONError,
+    RequestStreamingResponse,
+    iter_batches,
+    iter_json_object,
+    iter_ndjson,
+    ndjson_line,
+)
+from app.core.executor import ComputeQueueFull, get_compute_executor
+from app.models.schemas import CleanRequest, CleanResponse, CleanedRecord, CleaningOptions
+from app.services.cleaning.cleaner import DataCleaner, clean_chunk
 
 from app.services.ai import get_ai_service
 from app.services.analytics.logger import get_analytics
 from app.services.workflow.orchestrator import get_workflow_service
-from app.api.deps import validate_api_key
+from app.services.jobs.cleaning_jobs import (
+    cancel_cleaning_job,
+    get_cleaning_job,
+    get_job_results,
+    job_status,
+    submit_cleaning_job,
+)
+from app.api.deps import get_tenant_id, validate_api_key
+from app.db.database import get_db
 from app.db.models import User
 
 router = APIRouter()
 
 
-@router.post("/clean", response_model=CleanResponse, status_code=status.HTTP_200_OK)
+@router.post(
+    "/clean",
+    response_model=None,
+    responses={200: {"model": CleanResponse}},
+    status_code=status.HTTP_200_OK
+)
 async def clean_data(
     request: CleanRequest,
-    user: User = Depends(validate_api_key)
+    include_original: bool = True,
+    user: User = Depends(validate_api_key),
+    tenant: str = Depends(get_tenant_id)
 ):
     """
     Clean and normalize data
@@ -72,6 +100,10 @@ async def clean_data(
         ]
     }
     ```
+    
+    With `?include_original=false` each record omits `original`. The
+    envelope is built as a CleanResponse; the records are encoded straight
+    from the compact cleaning results, a chunk at a time.
     """
     start_time = time.time()
     
@@ -83,7 +115,7 @@ async def clean_data(
             workflow_service = get_workflow_service()
             
             # Execute the 9-step workflow
-            result = await workflow_service.execute(request.data, user.id)
+            result = await workflow_service.execute(request.data, tenant=tenant)
             
             # Assembly CleanResponse format
             cleaned_records = [
@@ -109,28 +141,37 @@ async def clean_data(
         # Initialize cleaner
         cleaner = DataCleaner(options=request.options)
         
-        # Clean each record
-        cleaned_records: List[CleanedRecord] = []
-        total_changes = 0
-        
-        for record in request.data:
-            result = await cleaner.clean_record(record, explain=request.explain)
-            cleaned_records.append(result)
-            total_changes += len(result.changes)
+        # Clean all records on the shared compute executor
+        batch = await cleaner.clean_records_compact(
+            request.data, explain=request.explain, tenant=tenant, include_original=include_original
+        )
         
         # Calculate processing time
         processing_time = (time.time() - start_time) * 1000
         analytics.log_request("/v1/clean", processing_time, 200, provider="rules")
         
-        return CleanResponse(
+        # The envelope goes through CleanResponse, so every field it declares
+        # is validated and present; the records skip one CleanedRecord model
+        # per row and are encoded in chunks from the compact results
+        envelope = CleanResponse(
             success=True,
             total_records=len(request.data),
-            cleaned_records=len([r for r in cleaned_records if len(r.changes) > 0]),
-            changes_made=total_changes,
-            data=cleaned_records,
+            cleaned_records=batch.changed_record_count,
+            changes_made=batch.change_count,
+            data=[],
             processing_time_ms=round(processing_time, 2)
-        )
+        ).model_dump(mode="json")
+        del envelope["data"]
+        # Encoded here rather than while sending, so a failure still ends in
+        # the 500 below instead of a truncated 200
+        body = b"".join(iter_json_object(
+            envelope, "data", batch.iter_records(include_original=include_original)
+        ))
+        return Response(content=body, media_type=JSON_MEDIA_TYPE)
         
+    except ComputeQueueFull:
+        # Rendered as 429 by the app-wide handler
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -138,19 +179,188 @@ async def clean_data(
         )
 
 
+@router.post("/clean/stream", status_code=status.HTTP_200_OK)
+async def clean_data_stream(
+    request: Request,
+    trim: Optional[bool] = None,
+    normalize_whitespace: Optional[bool] = None,
+    normalize_case: Optional[bool] = None,
+    fix_emails: Optional[bool] = None,
+    fix_phones: Optional[bool] = None,
+    explain: bool = False,
+    chunk_size: int = Query(1000, ge=1, le=10_000),
+    user: User = Depends(validate_api_key),
+    tenant: str = Depends(get_tenant_id)
+):
+    """
+    Clean newline-delimited JSON as it streams in
+    
+    The request body is NDJSON, one record per line. Records are cleaned in
+    chunks of chunk_size and written back as NDJSON while the upload is still
+    being read, so memory stays flat for any file size. Cleaning options are
+    query parameters (unset ones keep their defaults).
+    
+    Phone numbers without a country code are read in the region inferred
+    from the first chunk.
+    
+    Each response line is the cleaned record. With explain=true it is
+    `{"cleaned": {...}, "changes": [...], "confidence": 0.95}` instead.
+    If a line cannot be parsed or cleaning fails, a final
+    `{"error": "...", "line": n}` line is written and the stream ends.
+    
+    **Example:**
+    ```
+    curl -X POST "/v1/clean/stream?fix_emails=true" \\
+         -H "X-API-Key: ..." -H "Content-Type: application/x-ndjson" \\
+         --data-binary @contacts.ndjson
+    ```
+    """
+    overrides = {
+        "trim": trim,
+        "normalize_whitespace": normalize_whitespace,
+        "normalize_case": normalize_case,
+        "fix_emails": fix_emails,
+        "fix_phones": fix_phones,
+    }
+    cleaner = DataCleaner(options=CleaningOptions(
+        **{name: value for name, value in overrides.items() if value is not None}
+    ))
+    executor = get_compute_executor()
+    
+    async def stream():
+        start_time = time.time()
+        next_line = 1  # First input line not yet written back
+        status_code = 200
+        phone_region = None  # Inferred from the first chunk, then kept for the whole stream
+        try:
+            async for batch in iter_batches(iter_ndjson(request), chunk_size):
+                records = [record for _, record in batch]
+                if phone_region is None:
+                    phone_region = cleaner.infer_phone_region(records)
+                # Pure-Python cleaning holds the GIL, so it runs in the process pool
+                async with executor.slot(tenant):
+                    results, _ = await executor.run_in_process(
+                        clean_chunk, records, cleaner.options, explain, phone_region
+                    )
+                
+                if explain:
+                    lines = [ndjson_line(record) for record in results.iter_records(include_original=False)]
+                else:
+                    lines = [ndjson_line(cleaned) for cleaned in results.cleaned]
+                yield b"".join(lines)
+                next_line = batch[-1][0] + 1
+        except NDJSONError as e:
+            status_code = 400
+            yield ndjson_line({"error": str(e), "line": e.line_number})
+        except ComputeQueueFull as e:
+            # Headers are already sent, so the app-wide 429 handler cannot apply
+            status_code = 429
+            yield ndjson_line({"error": str(e), "line": next_line})
+        except Exception as e:
+            status_code = 500
+            yield ndjson_line({"error": f"Data cleaning failed: {str(e)}", "line": next_line})
+        finally:
+            processing_time = (time.time() - start_time) * 1000
+            get_analytics().log_request("/v1/clean/stream", processing_time, status_code, provider="rules")
+    
+    return RequestStreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+
+
 @router.post("/clean/batch", status_code=status.HTTP_202_ACCEPTED)
-async def clean_data_batch(request: CleanRequest):
+async def clean_data_batch(
+    request: CleanRequest,
+    user: User = Depends(validate_api_key),
+    tenant: str = Depends(get_tenant_id),
+    db: AsyncSession = Depends(get_db)
+):
     """
     Clean large datasets asynchronously
     
     For datasets larger than 1000 records, use this endpoint.
-    Returns a job ID that can be used to check status.
+    The job is persisted and processed in chunks by a background worker.
+    Returns a job ID that can be used to check status, fetch results, or cancel.
+    """
+    if request.options.use_ai_workflow:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The AI workflow is not available for batch jobs"
+        )
+    
+    job = await submit_cleaning_job(
+        db,
+        user_id=user.id,
+        tenant=tenant,
+        records=request.data,
+        options=request.options.model_dump(),
+        explain=request.explain
+    )
+    
+    return {
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "total_records": job.total_records,
+        "total_chunks": job.total_chunks,
+        "message": "Batch cleaning job queued"
+    }
+
+
+@router.get("/clean/batch/{job_id}", status_code=status.HTTP_200_OK)
+async def get_batch_status(
+    job_id: str,
+    user: User = Depends(validate_api_key),
+    db: AsyncSession = Depends(get_db)
+):
+    """Status and progress of a batch cleaning job"""
+    job = await _get_job_or_404(db, job_id, user)
+    return {"success": True, **job_status(job)}
+
+
+@router.get("/clean/batch/{job_id}/result", status_code=status.HTTP_200_OK)
+async def get_batch_result(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10_000),
+    user: User = Depends(validate_api_key),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Cleaned records of a completed batch job, paginated
+    
+    Each record has the same shape as the entries of `/clean`'s `data`.
     """
-    # TODO: Implement async batch processing
+    job = await _get_job_or_404(db, job_id, user)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}; results are available once it completes"
+        )
+    
+    records = await get_job_results(db, job, offset=offset, limit=limit)
     return {
         "success": True,
-        "job_id": "job_123456",
-        "status": "processing",
-        "message": "Batch cleaning job started",
-        "estimated_completion": "2-5 minutes"
+        "job_id": job.id,
+        "total_records": job.total_records,
+        "offset": offset,
+        "limit": limit,
+        "data": records
     }
+
+
+@router.post("/clean/batch/{job_id}/cancel", status_code=status.HTTP_202_ACCEPTED)
+async def cancel_batch_job(
+    job_id: str,
+    user: User = Depends(validate_api_key),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel a batch job; a running job stops at its next chunk"""
+    job = await _get_job_or_404(db, job_id, user)
+    job = await cancel_cleaning_job(db, job)
+    return {"success": True, **job_status(job)}
+
+
+async def _get_job_or_404(db: AsyncSession, job_id: str, user: User):
+    job = await get_cleaning_job(db, job_id, user.id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
@@ -3,9 +3,11 @@ Deduplication API Endpoint
 AI-powered duplicate detection using embeddings
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 import time
 
+from app.api.deps import get_tenant_id
+from app.core.executor import ComputeQueueFull
 from app.models.schemas import DedupeRequest, DedupeResponse, DuplicateGroup
 from app.services.deduplication.deduplicator import Deduplicator
 
@@ -13,7 +15,10 @@ router = APIRouter()
 
 
 @router.post("/dedupe", response_model=DedupeResponse, status_code=status.HTTP_200_OK)
-async def deduplicate_data(request: DedupeRequest):
+async def deduplicate_data(
+    request: DedupeRequest,
+    tenant: str = Depends(get_tenant_id)
+):
     """
     Detect and remove duplicate records using AI
     
@@ -69,7 +74,8 @@ async def deduplicate_data(request: DedupeRequest):
         result = await deduplicator.find_duplicates(
             data=request.data,
             fields=request.fields,
-            keep=request.keep
+            keep=request.keep,
+            tenant=tenant
         )
         
         # Calculate processing time
@@ -85,6 +91,9 @@ async def deduplicate_data(request: DedupeRequest):
             processing_time_ms=round(processing_time, 2)
         )
         
+    except ComputeQueueFull:
+        # Rendered as 429 by the app-wide handler
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -93,7 +102,10 @@ async def deduplicate_data(request: DedupeRequest):
 
 
 @router.post("/dedupe/analyze", status_code=status.HTTP_200_OK)
-async def analyze_duplicates(request: DedupeRequest):
+async def analyze_duplicates(
+    request: DedupeRequest,
+    tenant: str = Depends(get_tenant_id)
+):
     """
     Analyze duplicates without removing them
     
@@ -107,7 +119,8 @@ async def analyze_duplicates(request: DedupeRequest):
         # Analyze only, don't remove
         result = await deduplicator.analyze_duplicates(
             data=request.data,
-            fields=request.fields
+            fields=request.fields,
+            tenant=tenant
         )
         
         processing_time = (time.time() - start_time) * 1000
@@ -120,6 +133,9 @@ async def analyze_duplicates(request: DedupeRequest):
             "processing_time_ms": round(processing_time, 2)
         }
         
+    except ComputeQueueFull:
+        # Rendered as 429 by the app-wide handler
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
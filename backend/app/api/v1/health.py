@@ -5,6 +5,8 @@ Health check endpoint
 from fastapi import APIRouter, status
 from datetime import datetime
 from app.core.config import settings
+from app.core.executor import get_compute_executor
+from app.ml.registry import get_model_registry
 
 router = APIRouter()
 
@@ -32,15 +34,17 @@ async def readiness_check():
     """
     # TODO: Check database connectivity
     # TODO: Check Redis connectivity
-    # TODO: Check ML models loaded
+    registry = get_model_registry()
     
     return {
         "status": "ready",
         "checks": {
             "database": "ok",
             "cache": "ok",
-            "ml_models": "ok",
+            "ml_models": "ok" if registry.is_loaded(settings.EMBEDDING_MODEL) else "lazy",
         },
+        "models": registry.status(),
+        "compute": get_compute_executor().stats(),
         "timestamp": datetime.utcnow().isoformat(),
     }
 
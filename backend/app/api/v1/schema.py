@@ -3,17 +3,44 @@ Schema Detection API Endpoint
 AI-powered schema inference and field mapping
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import BaseModel
+from typing import Any, Dict, List
+import json
 import time
 
+from app.api.deps import get_tenant_id
+from app.api.streaming import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    CSVError,
+    NDJSONError,
+    RequestStreamingResponse,
+    csv_line,
+    iter_batches,
+    iter_ndjson,
+    ndjson_line,
+    read_csv_header,
+)
+from app.core.executor import ComputeQueueFull
 from app.models.schemas import SchemaDetectRequest, SchemaDetectResponse
 from app.services.schema_detection.detector import SchemaDetector
+from app.services.schema_detection.rename import RenamePlan
 
 router = APIRouter()
 
 
+class SchemaApplyRequest(BaseModel):
+    """Records and the field mapping (old name -> new name) to apply to them"""
+    data: List[Dict[str, Any]]
+    mapping: Dict[str, str]
+
+
 @router.post("/schema-detect", response_model=SchemaDetectResponse, status_code=status.HTTP_200_OK)
-async def detect_schema(request: SchemaDetectRequest):
+async def detect_schema(
+    request: SchemaDetectRequest,
+    tenant: str = Depends(get_tenant_id)
+):
     """
     Automatically detect schema from sample data
     
@@ -92,7 +119,7 @@ async def detect_schema(request: SchemaDetectRequest):
         )
         
         # Detect schema
-        result = await detector.detect_schema(data=request.data)
+        result = await detector.detect_schema(data=request.data, tenant=tenant)
         
         # Calculate processing time
         processing_time = (time.time() - start_time) * 1000
@@ -105,6 +132,9 @@ async def detect_schema(request: SchemaDetectRequest):
             processing_time_ms=round(processing_time, 2)
         )
         
+    except ComputeQueueFull:
+        # Rendered as 429 by the app-wide handler
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -113,11 +143,12 @@ async def detect_schema(request: SchemaDetectRequest):
 
 
 @router.post("/schema-detect/apply", status_code=status.HTTP_200_OK)
-async def apply_schema_mapping(data: list, mapping: dict):
+async def apply_schema_mapping(request: SchemaApplyRequest):
     """
     Apply a schema mapping to transform data
     
     Takes data and a field mapping to standardize field names.
+    For large files, use /schema-detect/apply/stream.
     
     **Example Request:**
     ```json
@@ -133,18 +164,11 @@ async def apply_schema_mapping(data: list, mapping: dict):
     ```
     """
     try:
-        transformed_data = []
-        
-        for record in data:
-            transformed_record = {}
-            for old_field, value in record.items():
-                new_field = mapping.get(old_field, old_field)
-                transformed_record[new_field] = value
-            transformed_data.append(transformed_record)
+        transformed_data = RenamePlan(request.mapping).apply_many(request.data)
         
         return {
             "success": True,
-            "original_count": len(data),
+            "original_count": len(request.data),
             "transformed_count": len(transformed_data),
             "data": transformed_data
         }
@@ -154,3 +178,75 @@ async def apply_schema_mapping(data: list, mapping: dict):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Schema mapping failed: {str(e)}"
         )
+
+
+@router.post("/schema-detect/apply/stream", status_code=status.HTTP_200_OK)
+async def apply_schema_mapping_stream(
+    request: Request,
+    mapping: str = Query(..., description="Field mapping as a JSON object, old name -> new name"),
+    chunk_size: int = Query(1000, ge=1, le=10_000)
+):
+    """
+    Apply a schema mapping to a file as it streams in
+    
+    The request body is NDJSON (one record per line) or, with
+    `Content-Type: text/csv`, CSV with a header row. The output has the same
+    format and is written while the upload is still being read, so memory
+    stays flat for any file size.
+    
+    NDJSON records are renamed in chunks of chunk_size. If a line cannot be
+    parsed, a final `{"error": "...", "line": n}` line is written and the
+    stream ends. CSV columns are renamed by position: only the header row
+    is rewritten, and data rows are copied through byte for byte.
+    
+    **Example:**
+    ```
+    curl -X POST "/v1/schema-detect/apply/stream?mapping=%7B%22user_email%22%3A%22email%22%7D" \\
+         -H "Content-Type: text/csv" --data-binary @contacts.csv
+    ```
+    """
+    try:
+        field_mapping = json.loads(mapping)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"mapping is not valid JSON: {str(e)}"
+        )
+    if not isinstance(field_mapping, dict) or not all(isinstance(name, str) for name in field_mapping.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="mapping must be a JSON object of field names"
+        )
+    plan = RenamePlan(field_mapping)
+    
+    if request.headers.get("content-type", "").startswith(CSV_MEDIA_TYPE):
+        chunks = request.stream()
+        try:
+            columns, line_ending, rest = await read_csv_header(chunks)
+        except CSVError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        async def stream_csv():
+            yield csv_line(plan.rename_header(columns), line_ending)
+            if rest:
+                yield rest
+            async for chunk in chunks:
+                yield chunk
+        
+        return RequestStreamingResponse(stream_csv(), media_type=CSV_MEDIA_TYPE)
+    
+    async def stream_ndjson():
+        next_line = 1  # First input line not yet written back
+        try:
+            async for batch in iter_batches(iter_ndjson(request), chunk_size):
+                yield b"".join([ndjson_line(plan.apply(record)) for _, record in batch])
+                next_line = batch[-1][0] + 1
+        except NDJSONError as e:
+            yield ndjson_line({"error": str(e), "line": e.line_number})
+        except Exception as e:
+            yield ndjson_line({"error": f"Schema mapping failed: {str(e)}", "line": next_line})
+    
+    return RequestStreamingResponse(stream_ndjson(), media_type=NDJSON_MEDIA_TYPE)
@@ -3,15 +3,58 @@ Data Validation API Endpoint
 Validate data against rules and schemas
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 import time
 
+from app.api.deps import get_tenant_id
+from app.core.executor import ComputeQueueFull
 from app.models.schemas import ValidateRequest, ValidateResponse, FieldValidation
+from app.services.validation.batch import MAX_BATCH_RULES, BatchValidator
+from app.services.validation.patterns import InvalidPatternError, get_pattern_cache
 from app.services.validation.validator import DataValidator
 
 router = APIRouter()
 
 
+class BatchValidationRule(BaseModel):
+    """Validation rule applied to one field of every record"""
+    field: str = Field(..., description="Field to validate")
+    type: str = Field("any", description="email, phone, url, date, name, custom (with pattern) or any")
+    required: bool = Field(False, description="Missing or empty values fail")
+    pattern: Optional[str] = Field(None, description="Regex for type=custom, in `regex` module syntax")
+    allowed_values: Optional[List[Any]] = Field(None, description="Value must be one of these")
+    min_length: Optional[int] = Field(None, ge=0)
+    max_length: Optional[int] = Field(None, ge=0)
+    min_value: Optional[float] = Field(None, description="Value must be a number >= min_value")
+    max_value: Optional[float] = Field(None, description="Value must be a number <= max_value")
+
+
+class BatchValidateRequest(BaseModel):
+    """Request for batch validation"""
+    data: List[Dict[str, Any]] = Field(..., min_length=1, description="Records to validate")
+    rules: List[BatchValidationRule] = Field(..., min_length=1, max_length=MAX_BATCH_RULES)
+    details: bool = Field(False, description="Expand the errors of invalid rows")
+    phone_region: Optional[str] = Field(None, description="Default phone region (inferred when omitted)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "data": [
+                    {"email": "john@example.com", "age": 34, "plan": "pro"},
+                    {"email": "not-an-email", "age": 210, "plan": "gold"}
+                ],
+                "rules": [
+                    {"field": "email", "type": "email", "required": True},
+                    {"field": "age", "min_value": 0, "max_value": 130},
+                    {"field": "plan", "allowed_values": ["free", "pro"]}
+                ],
+                "details": True
+            }
+        }
+
+
 @router.post("/validate", response_model=ValidateResponse, status_code=status.HTTP_200_OK)
 async def validate_data(request: ValidateRequest):
     """
@@ -26,6 +69,12 @@ async def validate_data(request: ValidateRequest):
     - Addresses
     - Custom patterns
     
+    Custom patterns use the syntax of the Python `regex` module (a superset
+    of `re`, with e.g. \\p{L} and [[:alpha:]]) and are compiled when the
+    request arrives; a pattern that does not compile or could backtrack
+    catastrophically is refused with 400.
+    Each match has a time budget, and a value that runs out of it fails.
+    
     **Example Request:**
     ```json
     {
@@ -71,6 +120,15 @@ async def validate_data(request: ValidateRequest):
     """
     start_time = time.time()
     
+    # Refuse unusable custom patterns before validating anything
+    try:
+        get_pattern_cache().check_rules(request.rules)
+    except InvalidPatternError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     try:
         # Initialize validator
         validator = DataValidator()
@@ -109,3 +167,82 @@ async def validate_data(request: ValidateRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Validation failed: {str(e)}"
         )
+
+
+@router.post("/validate/batch", status_code=status.HTTP_200_OK)
+async def validate_data_batch(
+    request: BatchValidateRequest,
+    tenant: str = Depends(get_tenant_id)
+):
+    """
+    Validate many records against the same rules
+    
+    Every rule is evaluated over its whole column at once. `errors` holds
+    one bitmap per record: bit i is set when `rules[i]` failed, so 0 means
+    the record is valid. With `details=true`, `details` maps each invalid
+    record's index to its failures.
+    
+    **Example Response:**
+    ```json
+    {
+        "success": true,
+        "total_records": 2,
+        "valid_records": 1,
+        "invalid_records": 1,
+        "rules": ["email", "age", "plan"],
+        "error_counts": [1, 1, 1],
+        "errors": [0, 7],
+        "details": {
+            "1": [
+                {"field": "email", "value": "not-an-email", "error": "...", "suggestion": null},
+                {"field": "age", "value": 210, "error": "Value is above the maximum of 130.0", "suggestion": null},
+                {"field": "plan", "value": "gold", "error": "Value is not one of the allowed values", "suggestion": null}
+            ]
+        }
+    }
+    ```
+    """
+    start_time = time.time()
+    
+    try:
+        result = await BatchValidator().validate(
+            request.data,
+            request.rules,
+            details=request.details,
+            phone_region=request.phone_region,
+            tenant=tenant
+        )
+        
+        invalid_records = int((result.bitmaps != 0).sum())
+        
+        # Calculate processing time
+        processing_time = (time.time() - start_time) * 1000
+        
+        response = {
+            "success": True,
+            "total_records": len(request.data),
+            "valid_records": len(request.data) - invalid_records,
+            "invalid_records": invalid_records,
+            "errors_count": sum(result.error_counts),
+            "rules": [rule.field for rule in request.rules],
+            "error_counts": result.error_counts,
+            "errors": result.bitmaps.tolist(),
+            "processing_time_ms": round(processing_time, 2)
+        }
+        if result.details is not None:
+            response["details"] = result.details
+        return response
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ComputeQueueFull:
+        # Rendered as 429 by the app-wide handler
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch validation failed: {str(e)}"
+        )
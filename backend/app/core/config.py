@@ -55,14 +55,42 @@ class Settings:
     # ML Models
     MODEL_CACHE_DIR: str = "./models"
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    PRELOAD_MODELS: bool = os.getenv("PRELOAD_MODELS", "true").lower() == "true"
     DEDUP_THRESHOLD: float = 0.85
+    DEDUP_ANN_MIN_RECORDS: int = 2048  # Below this, every pair is scored exactly
+    DEDUP_ANN_RECALL: float = 0.99
+    DEDUP_SHARD_MIN_RECORDS: int = 50_000  # From this size, dedupe runs sharded in a process pool
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "./models/embedding_cache")  # Empty disables the disk tier
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = 100_000
     MAX_BATCH_SIZE: int = 100
     
     # Performance
     MAX_WORKERS: int = 4
+    COMPUTE_MAX_PENDING_PER_TENANT: int = 4  # Compute jobs a tenant may have queued or running
+    COMPUTE_INLINE_MAX_RECORDS: int = 1000  # Smaller pure-Python jobs run on a compute thread, not the process pool
     REQUEST_TIMEOUT: int = 30
     MAX_RETRIES: int = 3
     
+    # Batch Jobs
+    JOB_WORKER_ENABLED: bool = os.getenv("JOB_WORKER_ENABLED", "true").lower() == "true"
+    JOB_WORKERS: int = 2  # Jobs processed concurrently per API process
+    JOB_CHUNK_SIZE: int = 1000  # Records per chunk (unit of progress and checkpointing)
+    JOB_POLL_INTERVAL: float = 2.0  # Seconds between queue polls when idle
+    JOB_STALE_SECONDS: int = 120  # A processing job without a checkpoint for this long is resumed elsewhere
+    
+    # Validation
+    PATTERN_CACHE_SIZE: int = 1024  # Compiled custom rule patterns kept (LRU); patterns use `regex` module syntax
+    PATTERN_SAFETY_MODE: str = os.getenv("PATTERN_SAFETY_MODE", "reject")  # reject (also refuse flagged patterns up front) | timeout, off (time budget only)
+    PATTERN_MATCH_TIMEOUT: float = 0.05  # Seconds per value for every custom pattern; a timeout fails validation
+    
+    # Schema Detection
+    SCHEMA_TYPE_SETTLE_VOTES: int = 5000  # Classify only a sample of a column after this many votes if one type has 99%; a disagreeing sample un-settles it (0 = off, exact votes)
+    SCHEMA_CACHE_ENABLED: bool = os.getenv("SCHEMA_CACHE_ENABLED", "true").lower() == "true"
+    SCHEMA_CACHE_MEMORY_ITEMS: int = 10_000  # Schemas kept in process (LRU over all tenants)
+    SCHEMA_CACHE_PERSIST: bool = os.getenv("SCHEMA_CACHE_PERSIST", "true").lower() == "true"  # Also keep schemas in the schema_cache table
+    SCHEMA_CACHE_REVALIDATE: bool = os.getenv("SCHEMA_CACHE_REVALIDATE", "false").lower() == "true"  # On a hit, re-detect in the background and refresh the entry
+    SCHEMA_CACHE_REVALIDATE_SAMPLE: int = 5_000  # Records (evenly spaced) a background re-detection keeps and profiles
+    
     # Monitoring
     LOG_LEVEL: str = "INFO"
 
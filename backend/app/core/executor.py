@@ -0,0 +1,117 @@
+"""
+Shared Compute Executor for Cleara API
+Runs CPU-bound service work off the asyncio event loop with per-tenant queue limits
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class ComputeQueueFull(Exception):
+    """Raised when a tenant already has the maximum number of jobs queued or running"""
+
+    def __init__(self, tenant: str, limit: int):
+        self.tenant = tenant
+        self.limit = limit
+        super().__init__(f"Too many concurrent compute jobs for tenant (limit {limit})")
+
+
+class ComputeExecutor:
+    """
+    Shared executor for CPU-bound work
+
+    - Threads for numpy/torch work, which releases the GIL
+    - Processes for pure-Python loops, which do not
+    - Per-tenant slots so one tenant's large jobs cannot occupy every
+      worker; requests past the limit fail fast with ComputeQueueFull
+    """
+
+    def __init__(self, max_workers: int, max_pending_per_tenant: int):
+        self.max_workers = max(1, max_workers)
+        self.max_pending_per_tenant = max_pending_per_tenant
+        self._threads = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="cleara-compute"
+        )
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._process_lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        with self._process_lock:
+            if self._processes is None:
+                # spawn: workers must not inherit the parent's torch/event-loop threads
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._processes
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str], reserve: int = 0):
+        """
+        Count one job against a tenant's queue limit for the duration of the block
+
+        reserve keeps that many of the tenant's slots free for other work
+        (at most limit - 1, so a job can always run on an idle tenant).
+        """
+        tenant = tenant or "anonymous"
+        pending = self._pending.get(tenant, 0)
+        if self.max_pending_per_tenant > 0:
+            headroom = min(reserve, self.max_pending_per_tenant - 1)
+            if pending + headroom >= self.max_pending_per_tenant:
+                raise ComputeQueueFull(tenant, self.max_pending_per_tenant)
+
+        self._pending[tenant] = pending + 1
+        try:
+            yield
+        finally:
+            self._pending[tenant] -= 1
+            if self._pending[tenant] <= 0:
+                del self._pending[tenant]
+
+    async def run_in_thread(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run GIL-releasing work (numpy, torch) on the compute thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._threads, functools.partial(fn, *args, **kwargs))
+
+    async def run_in_process(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run pure-Python work on the process pool (fn and args must pickle)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.process_pool, functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending_per_tenant": self.max_pending_per_tenant,
+            "active_tenants": len(self._pending),
+            "pending_jobs": sum(self._pending.values()),
+            "process_pool_started": self._processes is not None,
+        }
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+_compute_executor = None
+
+def get_compute_executor() -> ComputeExecutor:
+    """Get or create the process-wide compute executor"""
+    global _compute_executor
+    if _compute_executor is None:
+        _compute_executor = ComputeExecutor(
+            max_workers=settings.MAX_WORKERS,
+            max_pending_per_tenant=settings.COMPUTE_MAX_PENDING_PER_TENANT
+        )
+    return _compute_executor
@@ -1,7 +1,7 @@
 """Database package"""
 
 from .database import init_db, get_db, close_db, engine, AsyncSessionLocal
-from .models import Base, User, APIKey, CleaningJob, UsageLog, Subscription
+from .models import Base, User, APIKey, CleaningJob, CleaningJobChunk, UsageLog, Subscription
 
 __all__ = [
     "init_db",
@@ -13,6 +13,7 @@ __all__ = [
     "User",
     "APIKey",
     "CleaningJob",
+    "CleaningJobChunk",
     "UsageLog",
     "Subscription",
 ]
@@ -3,10 +3,10 @@ Database configuration and session management
 Supports both SQLite (local) and PostgreSQL (production)
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 import os
 from typing import AsyncGenerator
 
@@ -51,10 +51,72 @@ AsyncSessionLocal = sessionmaker(
 )
 
 
+def create_background_sessionmaker() -> sessionmaker:
+    """
+    Session factory for background workers
+    
+    The SQLite engine shares a single connection (StaticPool) between all
+    sessions, so a worker's transactions would interleave with request
+    transactions on it. On SQLite, background work gets its own connections.
+    """
+    if "sqlite" not in DATABASE_URL:
+        return AsyncSessionLocal
+    
+    background_engine = create_async_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": 30},
+        poolclass=NullPool
+    )
+    return sessionmaker(
+        background_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False
+    )
+
+
+def add_missing_columns(conn) -> list:
+    """
+    Add model columns that existing tables lack (e.g. cleaning_jobs.tenant)
+    
+    create_all only creates missing tables, so columns added to a model
+    later would never reach an existing database. New columns are added as
+    nullable, with the model's scalar default as server default so existing
+    rows get it too. Returns the "table.column" names that were added.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    quote = conn.dialect.identifier_preparer.quote
+    added = []
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect=conn.dialect)}"
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if isinstance(default, bool):
+                ddl += f" DEFAULT {'TRUE' if default else 'FALSE'}"
+            elif isinstance(default, (int, float)):
+                ddl += f" DEFAULT {default}"
+            elif isinstance(default, str):
+                ddl += " DEFAULT '" + default.replace("'", "''") + "'"
+            conn.execute(text(ddl))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
 async def init_db():
-    """Initialize database - create all tables"""
+    """Initialize database - create missing tables, then add missing columns"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        added = await conn.run_sync(add_missing_columns)
+    if added:
+        print(f"✅ Added columns: {', '.join(added)}")
     print("✅ Database initialized successfully!")
 
 
@@ -4,7 +4,7 @@ SQLAlchemy ORM models for users, API keys, jobs, and usage tracking
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import uuid
@@ -79,14 +79,25 @@ class CleaningJob(Base):
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    tenant = Column(String(100), nullable=True)  # Compute queue tenant of the submitter (see get_tenant_id)
     
     # Job details
     job_type = Column(String(50), nullable=False)  # clean, validate, deduplicate, ai_clean, etc.
-    status = Column(String(50), default="pending")  # pending, processing, completed, failed
+    status = Column(String(50), default="pending", index=True)  # pending, processing, completed, failed, cancelled
     
     # Data
     input_data = Column(JSON)  # Original data
     output_data = Column(JSON)  # Cleaned data
+    options = Column(JSON, nullable=True)  # Cleaning options of a batch job
+    explain = Column(Boolean, default=False)
+    
+    # Progress (batch jobs are processed in chunks, see CleaningJobChunk)
+    total_records = Column(Integer, default=0)
+    chunk_size = Column(Integer, default=0)
+    total_chunks = Column(Integer, default=0)
+    chunks_completed = Column(Integer, default=0)
+    cancel_requested = Column(Boolean, default=False)
+    error_message = Column(Text, nullable=True)
     
     # Metadata
     records_processed = Column(Integer, default=0)
@@ -103,9 +114,51 @@ class CleaningJob(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Lease of the worker processing the job, renewed while it runs
     
     # Relationships
     user = relationship("User", back_populates="cleaning_jobs")
+    chunks = relationship("CleaningJobChunk", back_populates="job", cascade="all, delete-orphan")
+
+
+class CleaningJobChunk(Base):
+    """One chunk of a batch cleaning job: the unit of work and of checkpointing"""
+    __tablename__ = "cleaning_job_chunks"
+    __table_args__ = (UniqueConstraint("job_id", "chunk_index"),)
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String(36), ForeignKey("cleaning_jobs.id"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    
+    status = Column(String(50), default="pending")  # pending, completed
+    input_data = Column(JSON)  # Records of this chunk
+    output_data = Column(JSON)  # Cleaned records of this chunk
+    changes_made = Column(Integer, default=0)
+    
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    job = relationship("CleaningJob", back_populates="chunks")
+
+
+class SchemaCacheEntry(Base):
+    """
+    A detected schema, reused for later uploads with the same layout fingerprint
+
+    Created by init_db like any new table (create_all); no column migration needed.
+    """
+    __tablename__ = "schema_cache"
+    __table_args__ = (UniqueConstraint("tenant", "fingerprint"),)
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant = Column(String(100), nullable=False, index=True)
+    fingerprint = Column(String(64), nullable=False)
+    
+    result = Column(JSON, nullable=False)  # Field mapping and types (detector) or the AI schema response
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class UsageLog(Base):
@@ -10,11 +10,15 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 import time
+import asyncio
 import logging
 from typing import AsyncGenerator
 
 from app.core.config import settings
+from app.core.executor import ComputeQueueFull, get_compute_executor
 from app.core.logging import setup_logging
+from app.ml.registry import get_model_registry
+from app.services.jobs.cleaning_jobs import get_job_worker
 from app.api.v1 import clean, validate, dedupe, schema, enrich, usage, health, ai, analytics, auth, upload, aiops, correlation, aiops_testing, ml_correlation, integrations  # , cleara
 
 # Setup logging
@@ -31,7 +35,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     logger.info(f"Version: {settings.VERSION}")
     
     # Initialize services
-    # TODO: Load ML models
+    if settings.PRELOAD_MODELS:
+        # Load + warm up shared models off the event loop before serving traffic
+        registry = get_model_registry()
+        await asyncio.get_running_loop().run_in_executor(
+            None, registry.preload, [settings.EMBEDDING_MODEL]
+        )
+    if settings.JOB_WORKER_ENABLED:
+        # Picks up queued batch jobs, and resumes ones interrupted by a restart
+        get_job_worker().start()
     # TODO: Initialize database connections
     # TODO: Initialize cache
     
@@ -39,6 +51,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     
     # Shutdown
     logger.info("🛑 Shutting down Cleara API...")
+    await get_job_worker().stop()
+    get_compute_executor().shutdown()
     # TODO: Cleanup resources
 
 
@@ -117,6 +131,19 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+@app.exception_handler(ComputeQueueFull)
+async def compute_queue_full_handler(request: Request, exc: ComputeQueueFull):
+    """Handle tenants that exceed their compute queue limit"""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={
+            "error": "compute_queue_full",
+            "message": str(exc),
+        },
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Handle all unhandled exceptions"""
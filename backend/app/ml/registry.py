@@ -0,0 +1,136 @@
+"""
+Cleara Model Registry
+Loads ML models once per process and shares them across requests
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("cleara.ml")
+
+
+def _load_sentence_transformer(name: str) -> Any:
+    """Default loader for embedding models"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux only)"""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except Exception:
+        return None
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    """Size of a torch model's parameters and buffers"""
+    try:
+        size = sum(p.numel() * p.element_size() for p in model.parameters())
+        size += sum(b.numel() * b.element_size() for b in model.buffers())
+        return int(size)
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """
+    Process-wide model registry
+
+    Models are loaded lazily on first use (or eagerly via preload at
+    startup) and then shared by every request in the process. A model that
+    fails to load is remembered as failed so requests fall back immediately
+    instead of retrying the load each time.
+    """
+
+    def __init__(self, loader: Callable[[str], Any] = _load_sentence_transformer):
+        self.loader = loader
+        self._models: Dict[str, Any] = {}
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._registry_lock:
+            if name not in self._locks:
+                self._locks[name] = threading.Lock()
+            return self._locks[name]
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the shared model, loading it on first use (None if unavailable)"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock_for(name):
+            if name in self._models:
+                return self._models[name]
+            if self._info.get(name, {}).get("error"):
+                return None
+
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            try:
+                model = self.loader(name)
+            except Exception as e:
+                logger.warning(f"Could not load model {name}: {e}")
+                self._info[name] = {"loaded": False, "error": str(e)}
+                return None
+
+            load_time_ms = (time.perf_counter() - start) * 1000
+            rss_after = _rss_bytes()
+            self._info[name] = {
+                "loaded": True,
+                "load_time_ms": round(load_time_ms, 2),
+                "parameter_bytes": _parameter_bytes(model),
+                "rss_delta_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+                "warmup_ms": None,
+                "error": None,
+            }
+            self._models[name] = model
+            logger.info(f"Loaded model {name} in {load_time_ms:.0f}ms")
+            return model
+
+    def warm_up(self, name: str, texts: Optional[List[str]] = None):
+        """Run one inference so the first real request does not pay for lazy init"""
+        model = self.get(name)
+        if model is None:
+            return
+
+        start = time.perf_counter()
+        try:
+            model.encode(texts or ["cleara warm up"], convert_to_numpy=True)
+        except Exception as e:
+            logger.warning(f"Warm-up failed for model {name}: {e}")
+            return
+        self._info[name]["warmup_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def preload(self, names: List[str], warm_up: bool = True):
+        """Load (and optionally warm up) models, e.g. at application startup"""
+        for name in names:
+            if warm_up:
+                self.warm_up(name)
+            else:
+                self.get(name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Load time and resident size per model"""
+        return {name: dict(info) for name, info in self._info.items()}
+
+
+# Global instance
+_model_registry = None
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create the process-wide model registry"""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
@@ -6,10 +6,12 @@ Uses completely free AI APIs for data cleaning and processing
 from typing import Optional, Dict, Any, List
 import os
 import json
+import asyncio
 from huggingface_hub import InferenceClient
 from groq import Groq
 import google.generativeai as genai
 from app.core.config import settings
+from app.services.schema_detection.cache import get_schema_cache, schema_fingerprint
 
 
 class FreeAIService:
@@ -76,67 +78,27 @@ class FreeAIService:
     # STEP 3: SCHEMA DETECTION (Gemini + Groq)
     # ============================================================================
     
-    async def detect_schema(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def detect_schema(self, data: Dict[str, Any], tenant: Optional[str] = None) -> Dict[str, Any]:
         """
         Identify correct field structure and rename inconsistent keys.
         Gemini -> Best for reasoning + structure
         Groq -> Best for validation
+        
+        A tenant's record with a layout seen before reuses the cached
+        mapping instead of asking Gemini and Groq again. tenant is the
+        caller's get_tenant_id value, the same key schema detection caches
+        under.
         """
+        cache = get_schema_cache() if settings.SCHEMA_CACHE_ENABLED else None
+        if cache is not None:
+            fingerprint = schema_fingerprint([data], "ai")
+            cached = await cache.get(tenant, fingerprint)
+            if cached is not None:
+                cache.schedule_revalidation(tenant, fingerprint, lambda: self._ask_schema(data))
+                return cached
         
         try:
-            # 1. Ask Gemini for structure and mapping
-            gemini_prompt = f"""
-            Identify the correct field structure and canonical field names for this data.
-            Rename inconsistent keys to standard industry names (e.g., 'fname' to 'first_name').
-            
-            Data Sample: {json.dumps(data)}
-            
-            Return valid JSON with:
-            {{
-                "schema": {{ "original_key": "canonical_key" }},
-                "types": {{ "canonical_key": "type" }},
-                "confidence": 0.0-1.0
-            }}
-            """
-            
-            if self.gemini_available:
-                gemini_resp = await self.gemini_model.generate_content_async(
-                    gemini_prompt,
-                    generation_config=genai.GenerationConfig(
-                        temperature=0.1,
-                        response_mime_type="application/json"
-                    )
-                )
-                mapping = json.loads(gemini_resp.text)
-            else:
-                raise Exception("Gemini not available")
-            
-            # 2. Use Groq to validate the mapping (Cross-verify)
-            if self.groq_available:
-                try:
-                    groq_prompt = f"""
-                    Validate this schema mapping. Is it logical?
-                    Mapping: {json.dumps(mapping)}
-                    Data: {json.dumps(data)}
-                    
-                    Return ONLY a boolean 'is_valid' and optional 'adjustments' in JSON.
-                    """
-                    
-                    groq_resp = self.groq_client.chat.completions.create(
-                        model=self.groq_model,
-                        messages=[{"role": "user", "content": groq_prompt}],
-                        temperature=0.0
-                    )
-                    validation = json.loads(groq_resp.choices[0].message.content)
-                    
-                    if not validation.get("is_valid", True):
-                        if "adjustments" in validation:
-                            mapping.update(validation["adjustments"])
-                except Exception as e:
-                    print(f"Groq validation failed: {e}")
-            
-            return mapping
-            
+            mapping = await self._ask_schema(data)
         except Exception as e:
             print(f"Schema detection failed: {e}")
             # Fallback: Infer schema from keys
@@ -146,6 +108,65 @@ class FreeAIService:
                 "confidence": 0.5,
                 "note": "AI detection failed, using raw schema"
             }
+        
+        if cache is not None:
+            await cache.put(tenant, fingerprint, mapping)
+        return mapping
+    
+    async def _ask_schema(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Gemini mapping cross-verified by Groq; raises if Gemini is unavailable or fails"""
+        # 1. Ask Gemini for structure and mapping
+        gemini_prompt = f"""
+        Identify the correct field structure and canonical field names for this data.
+        Rename inconsistent keys to standard industry names (e.g., 'fname' to 'first_name').
+        
+        Data Sample: {json.dumps(data)}
+        
+        Return valid JSON with:
+        {{
+            "schema": {{ "original_key": "canonical_key" }},
+            "types": {{ "canonical_key": "type" }},
+            "confidence": 0.0-1.0
+        }}
+        """
+        
+        if self.gemini_available:
+            gemini_resp = await self.gemini_model.generate_content_async(
+                gemini_prompt,
+                generation_config=genai.GenerationConfig(
+                    temperature=0.1,
+                    response_mime_type="application/json"
+                )
+            )
+            mapping = json.loads(gemini_resp.text)
+        else:
+            raise Exception("Gemini not available")
+        
+        # 2. Use Groq to validate the mapping (Cross-verify)
+        if self.groq_available:
+            try:
+                groq_prompt = f"""
+                Validate this schema mapping. Is it logical?
+                Mapping: {json.dumps(mapping)}
+                Data: {json.dumps(data)}
+                
+                Return ONLY a boolean 'is_valid' and optional 'adjustments' in JSON.
+                """
+                
+                groq_resp = self.groq_client.chat.completions.create(
+                    model=self.groq_model,
+                    messages=[{"role": "user", "content": groq_prompt}],
+                    temperature=0.0
+                )
+                validation = json.loads(groq_resp.choices[0].message.content)
+                
+                if not validation.get("is_valid", True):
+                    if "adjustments" in validation:
+                        mapping.update(validation["adjustments"])
+            except Exception as e:
+                print(f"Groq validation failed: {e}")
+        
+        return mapping
 
     # ============================================================================
     # STEP 5: AI VALIDATION LAYER (Gemini Reasoning + Groq Speed)
@@ -211,6 +232,19 @@ class FreeAIService:
         )
         return result['embedding']
 
+    async def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a batch of texts in one provider call
+        The Gemini client is synchronous, so the call runs in a worker thread.
+        """
+        result = await asyncio.to_thread(
+            genai.embed_content,
+            model="models/text-embedding-004",
+            content=texts,
+            task_type="retrieval_document"
+        )
+        return result['embedding']
+
     # ============================================================================
     # STEP 7: ENRICHMENT ENGINE (Gemini)
     # ============================================================================
@@ -252,7 +286,7 @@ class FreeAIService:
     # STEP 8 & 9: FULL WORKFLOW ORCHESTRATOR
     # ============================================================================
 
-    async def execute_complete_workflow(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_complete_workflow(self, raw_data: Dict[str, Any], tenant: Optional[str] = None) -> Dict[str, Any]:
         """
         The 9-step internal workflow implementation.
         """
@@ -264,7 +298,7 @@ class FreeAIService:
             normalized_data = sanitizer.to_canonical_json(raw_data)
             
             # Step 3: Schema Detection
-            schema_info = await self.detect_schema(normalized_data)
+            schema_info = await self.detect_schema(normalized_data, tenant=tenant)
             
             # Step 4 & 5: Cleaning & Validation
             validation_result = await self.ai_validate(normalized_data)
@@ -9,6 +9,8 @@ import numpy as np
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from app.services.deduplication.embedding_cache import get_embedding_cache
+
 logger = logging.getLogger("cleara.analytics")
 
 class AnalyticsService:
@@ -54,8 +56,9 @@ class AnalyticsService:
 
     def get_metrics(self) -> Dict[str, Any]:
         """Calculate p50, p95, p99 metrics"""
+        embedding_cache = get_embedding_cache().stats()
         if not self.latency_buffer:
-            return {"status": "no_data"}
+            return {"status": "no_data", "embedding_cache": embedding_cache}
             
         latencies = np.array(self.latency_buffer)
         return {
@@ -65,7 +68,8 @@ class AnalyticsService:
             "avg": float(np.mean(latencies)),
             "count": len(self.latency_buffer),
             "model_usage": self.model_usage,
-            "recent_errors": len(self.error_log[-10:])
+            "recent_errors": len(self.error_log[-10:]),
+            "embedding_cache": embedding_cache
         }
 
 
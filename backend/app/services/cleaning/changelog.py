@@ -0,0 +1,203 @@
+"""
+Compact Cleaning Results
+Columnar change log (op codes + value side table), materialized on serialization
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from app.models.schemas import CleanedRecord
+
+
+# Change types in op-code order
+OP_TYPES = ("trim", "whitespace", "case", "typo", "format")
+OP_CODES = {change_type: code for code, change_type in enumerate(OP_TYPES)}
+
+# Change type -> explanation, as reported by DataCleaner.clean_record
+CHANGE_DESCRIPTIONS = {
+    "trim": "Removed leading/trailing whitespace",
+    "whitespace": "Normalized internal whitespace",
+    "case": "Normalized to title case",
+    "typo": "Fixed common email typo",
+    "format": "Normalized phone number format",
+}
+
+# Confidence penalty per change type, on top of 0.05 per change
+_CONFIDENCE_PENALTIES = {
+    "trim": 0.01,
+    "whitespace": 0.01,
+    "case": 0.02,
+    "typo": 0.05,
+    "format": 0.05,
+}
+
+
+def change_confidence(change_types: Sequence[str]) -> float:
+    """
+    Confidence score for a record's changes
+
+    Higher confidence when:
+    - Few changes made
+    - Changes are minor (whitespace, case)
+    """
+    if len(change_types) == 0:
+        return 1.0
+
+    confidence = 1.0
+    confidence -= len(change_types) * 0.05
+    for change_type in change_types:
+        confidence -= _CONFIDENCE_PENALTIES.get(change_type, 0.0)
+
+    return max(0.0, min(1.0, confidence))
+
+
+class ChangeLog:
+    """
+    Changes of a batch as parallel arrays
+
+    One entry is (row, field id, op code, before offset, after offset), about
+    15 bytes. Before/after strings live once each in a side table, however
+    many records share them.
+    """
+
+    def __init__(self):
+        self.rows = array("I")
+        self.fields = array("I")
+        self.ops = array("B")
+        self.before = array("I")
+        self.after = array("I")
+        self.values: List[str] = []
+        self._offsets: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, row: int, field_id: int, op_code: int, before: str, after: str):
+        self.rows.append(row)
+        self.fields.append(field_id)
+        self.ops.append(op_code)
+        self.before.append(self._offset(before))
+        self.after.append(self._offset(after))
+
+    def _offset(self, value: str) -> int:
+        offset = self._offsets.get(value)
+        if offset is None:
+            offset = len(self.values)
+            self.values.append(value)
+            self._offsets[value] = offset
+        return offset
+
+    def by_row(self) -> Dict[int, List[int]]:
+        """Entry positions per row, in the order they were recorded"""
+        grouped: Dict[int, List[int]] = {}
+        for position, row in enumerate(self.rows):
+            grouped.setdefault(row, []).append(position)
+        return grouped
+
+
+class CleanedBatch:
+    """
+    Results of cleaning a batch, kept compact until serialized
+
+    Holds the cleaned records, optionally the originals, and (with explain)
+    a ChangeLog. iter_records() and to_cleaned_records() produce the same
+    shape as DataCleaner.clean_record, one record at a time.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        explain: bool = False,
+        originals: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.explain = explain
+        self.originals = originals
+        self.cleaned: List[Optional[Dict[str, Any]]] = [None] * size
+        self.changes: Optional[ChangeLog] = ChangeLog() if explain else None
+        self.field_names: List[str] = []
+        self._field_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.cleaned)
+
+    def field_id(self, field: str) -> int:
+        field_id = self._field_ids.get(field)
+        if field_id is None:
+            field_id = len(self.field_names)
+            self.field_names.append(field)
+            self._field_ids[field] = field_id
+        return field_id
+
+    @property
+    def change_count(self) -> int:
+        return len(self.changes) if self.changes is not None else 0
+
+    @property
+    def changed_record_count(self) -> int:
+        return len(set(self.changes.rows)) if self.changes is not None else 0
+
+    def iter_records(self, include_original: bool = True) -> Iterator[Dict[str, Any]]:
+        """Records in CleanedRecord's JSON shape, built one at a time"""
+        include_original = include_original and self.originals is not None
+        if self.changes is None:
+            # Nothing logged: every record has no changes and full confidence
+            if include_original:
+                for original, cleaned in zip(self.originals, self.cleaned):
+                    yield {"original": original, "cleaned": cleaned, "changes": [], "confidence": 1.0}
+            else:
+                for cleaned in self.cleaned:
+                    yield {"cleaned": cleaned, "changes": [], "confidence": 1.0}
+            return
+
+        grouped = self.changes.by_row()
+
+        for row, cleaned in enumerate(self.cleaned):
+            changes = self._materialize_changes(grouped.get(row, ()))
+            record = {}
+            if include_original:
+                record["original"] = self.originals[row]
+            record["cleaned"] = cleaned
+            record["changes"] = changes
+            record["confidence"] = change_confidence([change["type"] for change in changes])
+            yield record
+
+    def to_cleaned_records(self) -> List[CleanedRecord]:
+        return [CleanedRecord(**record) for record in self.iter_records()]
+
+    def _materialize_changes(self, positions: Iterable[int]) -> List[Dict[str, Any]]:
+        log = self.changes
+        changes = []
+        for position in positions:
+            change_type = OP_TYPES[log.ops[position]]
+            changes.append({
+                "field": self.field_names[log.fields[position]],
+                "type": change_type,
+                "description": CHANGE_DESCRIPTIONS[change_type],
+                "before": log.values[log.before[position]],
+                "after": log.values[log.after[position]]
+            })
+        return changes
+
+    @classmethod
+    def concat(cls, batches: Sequence["CleanedBatch"], explain: bool) -> "CleanedBatch":
+        """Join batches in order (e.g. chunks cleaned in worker processes)"""
+        merged = cls(0, explain=explain)
+        for batch in batches:
+            row_offset = len(merged.cleaned)
+            merged.cleaned.extend(batch.cleaned)
+            if batch.changes is None:
+                continue
+            log = batch.changes
+            field_ids = [merged.field_id(field) for field in batch.field_names]
+            for position in range(len(log)):
+                merged.changes.add(
+                    log.rows[position] + row_offset,
+                    field_ids[log.fields[position]],
+                    log.ops[position],
+                    log.values[log.before[position]],
+                    log.values[log.after[position]]
+                )
+
+        if all(batch.originals is not None for batch in batches):
+            merged.originals = [record for batch in batches for record in batch.originals]
+        return merged
@@ -3,9 +3,19 @@ Data Cleaning Service
 Core logic for cleaning and normalizing data
 """
 
+import asyncio
 import re
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+from app.core.executor import get_compute_executor
 from app.models.schemas import CleaningOptions, CleanedRecord
+from app.services.cleaning.email_domains import get_domain_corrector
+from app.services.cleaning.changelog import CleanedBatch, change_confidence
+from app.services.cleaning.plan import CleaningPlan, ValueMemo
+from app.services.phone.normalizer import DEFAULT_REGION, get_phone_normalizer
+
+
+_NON_DIGIT_RE = re.compile(r'\D')
 
 
 class DataCleaner:
@@ -13,27 +23,178 @@ class DataCleaner:
     
     def __init__(self, options: CleaningOptions):
         self.options = options
-        self.email_typos = {
-            'gmial': 'gmail',
-            'gmai': 'gmail',
-            'gmil': 'gmail',
-            'yahooo': 'yahoo',
-            'yaho': 'yahoo',
-            'hotmial': 'hotmail',
-            'outlok': 'outlook',
-        }
+        # Compiled cleaning plans by record layout (tuple of field names) and phone region
+        self._plans: Dict[Tuple[Tuple[str, ...], str], CleaningPlan] = {}
+        # Value memo statistics of the last batch (see clean_batch)
+        self.memo_stats: Dict[str, Any] = {}
     
-    async def clean_record(self, record: Dict[str, Any], explain: bool = False) -> CleanedRecord:
+    async def clean_record(
+        self,
+        record: Dict[str, Any],
+        explain: bool = False,
+        phone_region: Optional[str] = None,
+        tenant: Optional[str] = None
+    ) -> CleanedRecord:
         """
-        Clean a single record
+        Clean a single record on a compute thread
         
         Args:
             record: Data record to clean
             explain: Include explanations for changes
+            phone_region: Region of phone numbers without a country code
+                (DEFAULT_REGION when omitted; one record is too little to
+                infer a dataset's region from, see infer_phone_region)
+            tenant: Caller whose compute queue this job counts against
             
         Returns:
             CleanedRecord with original, cleaned data, and changes
+        
+        Raises:
+            ComputeQueueFull: The tenant already has too many jobs in flight
+        """
+        executor = get_compute_executor()
+        async with executor.slot(tenant):
+            return await executor.run_in_thread(
+                self._clean_record_sync, record, explain, phone_region or DEFAULT_REGION
+            )
+    
+    async def clean_records(
+        self,
+        records: List[Dict[str, Any]],
+        explain: bool = False,
+        tenant: Optional[str] = None
+    ) -> List[CleanedRecord]:
+        """
+        Clean a batch of records off the event loop
+        
+        Raises:
+            ComputeQueueFull: The tenant already has too many jobs in flight
+        """
+        batch = await self.clean_records_compact(records, explain=explain, tenant=tenant)
+        return batch.to_cleaned_records()
+    
+    async def clean_records_compact(
+        self,
+        records: List[Dict[str, Any]],
+        explain: bool = False,
+        tenant: Optional[str] = None,
+        include_original: bool = True
+    ) -> CleanedBatch:
+        """
+        Clean a batch of records off the event loop, keeping results compact
+        
+        Large batches are split into one chunk per worker and cleaned in the
+        shared compute process pool; small ones are cleaned on a compute
+        thread, where pickling them to a worker would cost more than the
+        cleaning. Worker chunks come back without originals, which are
+        re-attached here.
+        
+        Raises:
+            ComputeQueueFull: The tenant already has too many jobs in flight
+        """
+        executor = get_compute_executor()
+        async with executor.slot(tenant):
+            if len(records) <= settings.COMPUTE_INLINE_MAX_RECORDS:
+                return await executor.run_in_thread(
+                    self.clean_batch_compact, records, explain, include_original
+                )
+            
+            # One region for the whole dataset, not one per chunk
+            phone_region = self.infer_phone_region(records)
+            chunk_size = max(
+                settings.COMPUTE_INLINE_MAX_RECORDS,
+                -(-len(records) // executor.max_workers)
+            )
+            chunks = await asyncio.gather(*(
+                executor.run_in_process(
+                    clean_chunk, records[start:start + chunk_size], self.options, explain, phone_region
+                )
+                for start in range(0, len(records), chunk_size)
+            ))
+            
+            memo = ValueMemo()
+            for _, stats in chunks:
+                memo.merge(stats)
+            self.memo_stats = memo.stats()
+            
+            batch = CleanedBatch.concat([chunk for chunk, _ in chunks], explain)
+            batch.originals = records if include_original else None
+            return batch
+    
+    def clean_batch(self, records: List[Dict[str, Any]], explain: bool = False) -> List[CleanedRecord]:
+        """
+        Clean many records column by column
+        
+        Output is identical to calling clean_record on each record, in input order.
+        """
+        return self.clean_batch_compact(records, explain).to_cleaned_records()
+    
+    def clean_batch_compact(
+        self,
+        records: List[Dict[str, Any]],
+        explain: bool = False,
+        include_original: bool = True,
+        phone_region: Optional[str] = None
+    ) -> CleanedBatch:
         """
+        Clean many records column by column into a CleanedBatch
+        
+        Records are grouped by layout and each group runs through a cleaning
+        plan compiled once for that layout. Each distinct value is cleaned once
+        per batch (bounded LRU memo; hit statistics end up in memo_stats).
+        Changes are kept as op codes until the batch is serialized, and
+        originals are left out entirely unless include_original.
+        Phone numbers without a country code are read in phone_region,
+        inferred from the batch when not given.
+        """
+        phone_region = phone_region or self.infer_phone_region(records)
+        batch = CleanedBatch(len(records), explain=explain, originals=records if include_original else None)
+        memo = ValueMemo()
+        record_layouts = list(map(tuple, records))
+        
+        if len(set(record_layouts)) == 1:
+            self._plan_for(record_layouts[0], phone_region).apply(batch, records, memo=memo)
+        elif records:
+            layouts: Dict[Tuple[str, ...], List[int]] = {}
+            for idx, layout in enumerate(record_layouts):
+                layouts.setdefault(layout, []).append(idx)
+            for layout, indices in layouts.items():
+                group = [records[idx] for idx in indices]
+                self._plan_for(layout, phone_region).apply(batch, group, indices, memo)
+        
+        self.memo_stats = memo.stats()
+        return batch
+    
+    def infer_phone_region(self, records: List[Dict[str, Any]]) -> str:
+        """
+        Default phone region of a dataset, from a sample of its phone fields
+        
+        Infer it once per dataset (request, stream or job) and pass it to
+        every batch, so all chunks read national numbers the same way.
+        """
+        if not self.options.fix_phones:
+            return DEFAULT_REGION
+        values = (
+            value.strip()
+            for record in records
+            for field, value in record.items()
+            if isinstance(value, str) and 'phone' in field.lower()
+        )
+        return get_phone_normalizer().infer_region(values)
+    
+    def _plan_for(self, layout: Tuple[str, ...], phone_region: str) -> CleaningPlan:
+        plan = self._plans.get((layout, phone_region))
+        if plan is None:
+            plan = CleaningPlan.compile(self, layout, phone_region)
+            self._plans[(layout, phone_region)] = plan
+        return plan
+    
+    def _clean_record_sync(
+        self,
+        record: Dict[str, Any],
+        explain: bool,
+        phone_region: str = DEFAULT_REGION
+    ) -> CleanedRecord:
         cleaned = {}
         changes = []
         
@@ -104,7 +265,7 @@ class DataCleaner:
                 
                 # Fix phone numbers
                 if self.options.fix_phones and 'phone' in field.lower():
-                    fixed_phone = self._normalize_phone(cleaned_value)
+                    fixed_phone = self._normalize_phone(cleaned_value, phone_region)
                     if fixed_phone != cleaned_value and explain:
                         changes.append({
                             "field": field,
@@ -129,27 +290,9 @@ class DataCleaner:
     
     def _normalize_name(self, name: str) -> str:
         """Normalize name to title case"""
-        # Handle special cases
-        special_words = {
-            'mc': 'Mc',
-            'mac': 'Mac',
-            'o\'': 'O\'',
-        }
-        
-        # Basic title case
-        words = name.split()
-        normalized = []
-        
-        for word in words:
-            # Check for special prefixes
-            lower_word = word.lower()
-            if any(lower_word.startswith(prefix) for prefix in special_words):
-                # Handle McDonald, MacArthur, O'Brien, etc.
-                normalized.append(word.capitalize())
-            else:
-                normalized.append(word.capitalize())
-        
-        return ' '.join(normalized)
+        # Prefixes such as Mc/Mac/O' (McDonald, O'Brien) are capitalized like
+        # any other word for now, so a plain per-word capitalize covers them
+        return ' '.join([word.capitalize() for word in name.split()])
     
     def _fix_email(self, email: str) -> str:
         """Fix common email typos"""
@@ -161,28 +304,47 @@ class DataCleaner:
         
         local, domain = email.rsplit('@', 1)
         
-        # Fix domain typos
-        for typo, correct in self.email_typos.items():
-            if typo in domain:
-                domain = domain.replace(typo, correct)
+        # Fix domain typos (nearest known domain within edit distance, cached per domain)
+        domain = get_domain_corrector().correct(domain)
         
         return f"{local}@{domain}"
     
-    def _normalize_phone(self, phone: str) -> str:
-        """Normalize phone number format"""
-        # Remove all non-digit characters
-        digits = re.sub(r'\D', '', phone)
-        
-        # Format based on length
-        if len(digits) == 10:
-            # US format: (XXX) XXX-XXXX
-            return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
-        elif len(digits) == 11 and digits[0] == '1':
-            # US with country code
-            return f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
-        else:
-            # Return original if can't determine format
-            return phone
+    def _normalize_phone(self, phone: str, region: str = DEFAULT_REGION) -> str:
+        """Normalize phone number format (national numbers are read in region)"""
+        return self._normalize_phones([phone], region)[0]
+    
+    def _normalize_phones(self, phones: List[str], region: str = DEFAULT_REGION) -> List[str]:
+        """
+        Normalize a column of phone numbers
+        
+        Numbers not covered by the US formats go to the phone normalizer in
+        one parse_batch call.
+        """
+        normalized = list(phones)
+        rest = []
+        for idx, phone in enumerate(phones):
+            if region == DEFAULT_REGION:
+                # Remove all non-digit characters
+                digits = _NON_DIGIT_RE.sub('', phone)
+                
+                # Format based on length
+                if len(digits) == 10:
+                    # US format: (XXX) XXX-XXXX
+                    normalized[idx] = f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+                    continue
+                elif len(digits) == 11 and digits[0] == '1':
+                    # US with country code
+                    normalized[idx] = f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
+                    continue
+            rest.append(idx)
+        
+        # Anything else: international format if it is a valid number
+        # (the original is kept if we can't determine the format)
+        infos = get_phone_normalizer().parse_batch([phones[idx] for idx in rest], region)
+        for idx, info in zip(rest, infos):
+            if info.valid:
+                normalized[idx] = info.international
+        return normalized
     
     def _calculate_confidence(
         self,
@@ -190,35 +352,23 @@ class DataCleaner:
         cleaned: Dict[str, Any],
         changes: List[Dict[str, str]]
     ) -> float:
-        """
-        Calculate confidence score for cleaning
-        
-        Higher confidence when:
-        - Few changes made
-        - Changes are minor (whitespace, case)
-        - No data loss
-        """
-        if len(changes) == 0:
-            return 1.0
-        
-        # Start with base confidence
-        confidence = 1.0
-        
-        # Reduce confidence based on number of changes
-        confidence -= len(changes) * 0.05
-        
-        # Adjust based on change types
-        for change in changes:
-            change_type = change.get('type', '')
-            if change_type in ['trim', 'whitespace']:
-                # Minor changes, minimal impact
-                confidence -= 0.01
-            elif change_type in ['case']:
-                # Moderate changes
-                confidence -= 0.02
-            elif change_type in ['typo', 'format']:
-                # More significant changes
-                confidence -= 0.05
-        
-        # Ensure confidence is between 0 and 1
-        return max(0.0, min(1.0, confidence))
+        """Calculate confidence score for cleaning (see change_confidence)"""
+        return change_confidence([change.get('type', '') for change in changes])
+
+
+def clean_chunk(
+    records: List[Dict[str, Any]],
+    options: CleaningOptions,
+    explain: bool = False,
+    phone_region: Optional[str] = None
+) -> Tuple[CleanedBatch, Dict[str, Any]]:
+    """
+    Clean one chunk of records in a compute worker process
+    
+    Module-level so the process pool can pickle it by reference; only the
+    records and options cross the process boundary. Returns the cleaned
+    chunk (without originals) and the chunk's value memo statistics.
+    """
+    cleaner = DataCleaner(options)
+    batch = cleaner.clean_batch_compact(records, explain, include_original=False, phone_region=phone_region)
+    return batch, cleaner.memo_stats
@@ -0,0 +1,301 @@
+"""
+Email Domain Correction
+SymSpell-style deletion index over known mail domains
+"""
+
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Known-good domains, most common first (ties between candidates go to the earlier one)
+KNOWN_DOMAINS: Tuple[str, ...] = (
+    "gmail.com",
+    "yahoo.com",
+    "hotmail.com",
+    "outlook.com",
+    "aol.com",
+    "icloud.com",
+    "live.com",
+    "msn.com",
+    "me.com",
+    "mac.com",
+    "googlemail.com",
+    "ymail.com",
+    "protonmail.com",
+    "proton.me",
+    "zoho.com",
+    "gmx.com",
+    "gmx.de",
+    "mail.com",
+    "yandex.com",
+    "comcast.net",
+    "verizon.net",
+    "att.net",
+    "sbcglobal.net",
+    "bellsouth.net",
+    "cox.net",
+    "charter.net",
+    "hotmail.co.uk",
+    "yahoo.co.uk",
+    "btinternet.com",
+    "web.de",
+    "orange.fr",
+    "free.fr",
+)
+
+# Real domains within a typo's reach of a known domain ("email.com" is one
+# edit from "gmail.com"). They are left as they are, never corrected.
+ALLOWED_DOMAINS: Tuple[str, ...] = (
+    "email.com",
+    "mail.ru",
+    "mail.de",
+    "gmx.net",
+    "gmx.at",
+    "gmx.ch",
+    "gmx.fr",
+    "yahoo.fr",
+    "yahoo.de",
+    "yahoo.es",
+    "yahoo.it",
+    "yahoo.ca",
+    "yahoo.in",
+    "yahoo.co.in",
+    "yahoo.com.au",
+    "hotmail.fr",
+    "hotmail.de",
+    "hotmail.it",
+    "hotmail.es",
+    "live.co.uk",
+    "live.fr",
+    "live.de",
+    "live.ca",
+    "outlook.fr",
+    "outlook.de",
+    "aol.de",
+    "aim.com",
+    "att.com",
+    "cox.com",
+    "verizon.com",
+    "comcast.com",
+    "charter.com",
+    "juno.com",
+    "usa.net",
+    "zoho.eu",
+    "protonmail.ch",
+    "pm.me",
+    "yandex.ru",
+)
+
+# Domains whose name label is this short are never corrected, nor corrected
+# to: nearly every two- or three-letter name is a real domain (ge.com, ms.com,
+# box.net), and so are most slips of one (webb.de)
+SHORT_LABEL_MAX_LENGTH = 3
+
+# Top-level domains a typed domain may end in as is: generic ones, and the
+# country codes. A domain ending in one of them keeps its suffix.
+GENERIC_TLDS = frozenset(
+    "com net org edu gov mil int info biz name pro mobi aero asia cat coop jobs museum "
+    "tel travel app dev xyz online site tech store shop email cloud live blog art".split()
+)
+COUNTRY_TLDS = frozenset(
+    "ac ad ae af ag ai al am ao aq ar as at au aw ax az ba bb bd be bf bg bh bi bj bm bn bo br bs "
+    "bt bw by bz ca cc cd cf cg ch ci ck cl cm cn co cr cu cv cw cx cy cz de dj dk dm do dz ec ee "
+    "eg er es et eu fi fj fk fm fo fr ga gd ge gf gg gh gi gl gm gn gp gq gr gs gt gu gw gy hk hm "
+    "hn hr ht hu id ie il im in io iq ir is it je jm jo jp ke kg kh ki km kn kp kr kw ky kz la lb "
+    "lc li lk lr ls lt lu lv ly ma mc md me mg mh mk ml mm mn mo mp mq mr ms mt mu mv mw mx my mz "
+    "na nc ne nf ng ni nl no np nr nu nz om pa pe pf pg ph pk pl pm pn pr ps pt pw py qa re ro rs "
+    "ru rw sa sb sc sd se sg sh si sk sl sm sn so sr ss st su sv sx sy sz tc td tf tg th tj tk tl "
+    "tm tn to tr tt tv tw tz ua ug uk us uy uz va vc ve vg vi vn vu wf ws ye yt za zm zw".split()
+)
+
+# Second-level labels registered under a country code (hotmail.co.uk)
+_SECOND_LEVEL_LABELS = frozenset(("co", "com", "net", "org", "ac", "gov", "edu", "ne", "or"))
+
+
+def osa_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions)
+
+    Returns max_distance + 1 as soon as the distance is known to exceed it.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def split_domain(domain: str) -> Tuple[str, str]:
+    """
+    A domain's name label and its suffix
+
+    "mail.example.co.uk" -> ("example", "co.uk"); a domain without a dot
+    is all name.
+    """
+    labels = domain.split(".")
+    if len(labels) == 1:
+        return domain, ""
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_LABELS and labels[-1] in COUNTRY_TLDS:
+        return labels[-3], ".".join(labels[-2:])
+    return labels[-2], labels[-1]
+
+
+def is_well_formed_suffix(suffix: str) -> bool:
+    """Whether suffix is a real top-level domain (or a country's second level)"""
+    tld = suffix.rsplit(".", 1)[-1]
+    return tld in GENERIC_TLDS or tld in COUNTRY_TLDS
+
+
+def is_typo_edit(typed: str, intended: str) -> bool:
+    """
+    Whether typed is intended with one typing slip
+
+    A slip is two adjacent letters swapped (gmial), a letter typed twice
+    (yahooo) or a letter left out anywhere but the start (gmal). Other
+    single edits mostly turn one real name into another: a substituted
+    letter (tmail, hive), an added letter (mails, mymail) or a missing
+    first letter (cloud).
+    """
+    if len(typed) == len(intended):
+        diffs = [idx for idx, (x, y) in enumerate(zip(typed, intended)) if x != y]
+        return (
+            len(diffs) == 2
+            and diffs[1] == diffs[0] + 1
+            and typed[diffs[0]] == intended[diffs[1]]
+            and typed[diffs[1]] == intended[diffs[0]]
+        )
+    if len(typed) == len(intended) + 1:
+        return any(
+            typed[:idx] + typed[idx + 1:] == intended
+            for idx in range(len(typed))
+            if (idx > 0 and typed[idx] == typed[idx - 1])
+            or (idx + 1 < len(typed) and typed[idx] == typed[idx + 1])
+        )
+    if len(typed) + 1 == len(intended):
+        return any(intended[:idx] + intended[idx + 1:] == typed for idx in range(1, len(intended)))
+    return False
+
+
+def _deletes(term: str, max_distance: int) -> Set[str]:
+    """Every string obtained by deleting up to max_distance characters"""
+    variants = {term}
+    for count in range(1, min(max_distance, len(term)) + 1):
+        for positions in combinations(range(len(term)), count):
+            skip = set(positions)
+            variants.add("".join(ch for idx, ch in enumerate(term) if idx not in skip))
+    return variants
+
+
+class DomainCorrector:
+    """
+    Corrects mistyped email domains against a list of known-good domains
+
+    Every known domain is indexed under all of its deletion variants (up to
+    max_distance deletions). A lookup generates the typed domain's deletion
+    variants, collects the known domains that share one, and verifies them
+    by the shape of the edit. Results are cached per distinct domain, so a
+    repeated domain costs one dict lookup.
+
+    Real domains must survive, so only typo-shaped edits are corrected:
+    - the name label may differ by one slip (see is_typo_edit), never by a
+      substituted or added letter
+    - the suffix may only change when it is malformed (gmail.con), never
+      when it is a real top-level domain (hotmail.ca stays)
+    - two edits are only corrected when one of them is in a malformed suffix
+    - known and allowed domains, and names of at most
+      SHORT_LABEL_MAX_LENGTH characters, are never corrected or corrected to
+    """
+
+    def __init__(
+        self,
+        domains: Iterable[str] = KNOWN_DOMAINS,
+        max_distance: int = 2,
+        cache_size: int = 100_000,
+        allowed: Iterable[str] = ALLOWED_DOMAINS
+    ):
+        self.domains = tuple(domain.lower() for domain in domains)
+        self.max_distance = max_distance
+        self.cache_size = cache_size
+        self._known = set(self.domains) | {domain.lower() for domain in allowed}
+        self._rank = {domain: rank for rank, domain in enumerate(self.domains)}
+        self._parts = {domain: split_domain(domain) for domain in self.domains}
+        self._max_length = max((len(domain) for domain in self.domains), default=0)
+        self._index: Dict[str, List[str]] = {}
+        for domain in self.domains:
+            for variant in _deletes(domain, max_distance):
+                self._index.setdefault(variant, []).append(domain)
+        # Plain dict, cleared when full: safe to share across compute threads
+        self._cache: Dict[str, str] = {}
+
+    def correct(self, domain: str) -> str:
+        """The closest known domain within the edit limit, else domain unchanged"""
+        cached = self._cache.get(domain)
+        if cached is not None:
+            return cached
+
+        corrected = self._lookup(domain) or domain
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[domain] = corrected
+        return corrected
+
+    def _lookup(self, domain: str) -> Optional[str]:
+        if domain in self._known:
+            return domain
+
+        label, suffix = split_domain(domain)
+        if len(label) <= SHORT_LABEL_MAX_LENGTH:
+            return None
+        keep_suffix = is_well_formed_suffix(suffix)
+
+        limit = self.max_distance
+        if len(domain) > self._max_length + limit:
+            return None
+
+        candidates = set()
+        for variant in _deletes(domain, limit):
+            candidates.update(self._index.get(variant, ()))
+
+        best, best_key = None, None
+        for candidate in candidates:
+            candidate_label, candidate_suffix = self._parts[candidate]
+            if len(candidate_label) <= SHORT_LABEL_MAX_LENGTH:
+                continue
+            if candidate_label == label:
+                distance = 0
+            elif is_typo_edit(label, candidate_label):
+                distance = 1
+            else:
+                continue
+            if candidate_suffix != suffix:
+                if keep_suffix:
+                    continue
+                distance += osa_distance(suffix, candidate_suffix, limit - distance)
+                if distance > limit:
+                    continue
+            key = (distance, self._rank[candidate])
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+
+# Global instance
+_domain_corrector = None
+
+def get_domain_corrector() -> DomainCorrector:
+    """Get or create the process-wide domain corrector"""
+    global _domain_corrector
+    if _domain_corrector is None:
+        _domain_corrector = DomainCorrector()
+    return _domain_corrector
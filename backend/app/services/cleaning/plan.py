@@ -0,0 +1,259 @@
+"""
+Compiled Cleaning Plans
+Decide once per record layout which operations apply to which columns,
+then clean a whole batch column by column
+"""
+
+import functools
+import re
+from collections import OrderedDict
+from itertools import compress, repeat
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services.cleaning.changelog import OP_CODES, CleanedBatch
+from app.services.phone.normalizer import DEFAULT_REGION
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _collapse_whitespace(value: str) -> str:
+    """Same as _WHITESPACE_RE.sub(' ', value) for values that are already stripped"""
+    return ' '.join(value.split())
+
+
+# An operation maps a list of distinct values to their results, so one
+# that calls out to a batch API (phone parsing) can see a whole column
+Operation = Tuple[str, Callable[[List[str]], List[str]]]
+
+
+def _each(function: Callable[[str], str]) -> Callable[[List[str]], List[str]]:
+    """A per-value function as an operation"""
+    return functools.partial(_map, function)
+
+
+def _map(function: Callable[[str], str], values: List[str]) -> List[str]:
+    return list(map(function, values))
+
+
+def _string_kinds(column: List[Any]) -> Tuple[bool, bool]:
+    """Whether all and whether any values are strings"""
+    kinds = [issubclass(kind, str) for kind in set(map(type, column))]
+    return all(kinds), any(kinds)
+
+
+# Distinct values remembered per operation chain within one batch
+DEFAULT_MEMO_ITEMS = 100_000
+
+
+class ValueMemo:
+    """
+    Bounded LRU of operation results per distinct value, for one batch
+
+    Entries are keyed by the column's operation chain (e.g. trim, whitespace,
+    case) and the input value. Without explain an entry is the final value;
+    with explain it holds the value after every operation, so the change log
+    of each record can be rebuilt exactly from a cached entry.
+    """
+
+    def __init__(self, max_items: int = DEFAULT_MEMO_ITEMS):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._merged_items = 0
+        self._tables: Dict[Tuple[Tuple[str, ...], bool], "OrderedDict[str, Any]"] = {}
+
+    def table(self, chain: Tuple[str, ...], explain: bool) -> "OrderedDict[str, Any]":
+        return self._tables.setdefault((chain, explain), OrderedDict())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "items": self._merged_items + sum(len(table) for table in self._tables.values()),
+        }
+
+    def merge(self, stats: Dict[str, Any]):
+        """Add another memo's counters (e.g. from a worker process)"""
+        self.hits += stats.get("hits", 0)
+        self.misses += stats.get("misses", 0)
+        self.evictions += stats.get("evictions", 0)
+        self._merged_items += stats.get("items", 0)
+
+
+class CleaningPlan:
+    """
+    Cleaning operations per column for one record layout
+
+    Compiling resolves the options and field-name rules once, so applying
+    the plan only runs the selected string operations over each column.
+    Results are identical to DataCleaner.clean_record on every record.
+    """
+
+    def __init__(self, fields: Tuple[str, ...], operations: List[List[Operation]]):
+        self.fields = fields
+        self.operations = operations
+
+    @classmethod
+    def compile(cls, cleaner, fields: Tuple[str, ...], phone_region: str = DEFAULT_REGION) -> "CleaningPlan":
+        """
+        Build the plan for records whose keys are exactly `fields`, in order
+
+        National phone numbers are read in phone_region, which is bound into
+        the plan's phone operation.
+        """
+        options = cleaner.options
+        operations = []
+        for field in fields:
+            lowered = field.lower()
+            ops: List[Operation] = []
+            if options.trim:
+                ops.append(("trim", _each(str.strip)))
+            if options.normalize_whitespace:
+                if options.trim:
+                    ops.append(("whitespace", _each(_collapse_whitespace)))
+                else:
+                    ops.append(("whitespace", _each(functools.partial(_WHITESPACE_RE.sub, ' '))))
+            if options.normalize_case and 'name' in lowered:
+                ops.append(("case", _each(cleaner._normalize_name)))
+            if options.fix_emails and 'email' in lowered:
+                ops.append(("typo", _each(cleaner._fix_email)))
+            if options.fix_phones and 'phone' in lowered:
+                # Whole column at once, through the phone normalizer's batch API
+                ops.append(("format", functools.partial(cleaner._normalize_phones, region=phone_region)))
+            operations.append(ops)
+        return cls(fields, operations)
+
+    def apply(
+        self,
+        batch: CleanedBatch,
+        records: List[Dict[str, Any]],
+        rows: Optional[List[int]] = None,
+        memo: Optional[ValueMemo] = None
+    ):
+        """
+        Clean records that all have this plan's layout into batch
+
+        rows are the records' positions in batch (default: 0..n-1). Each
+        distinct value of a column runs through the column's operations once
+        per batch; repeats are looked up in memo.
+        """
+        # Records fill the whole batch in order: rows can be written in one go
+        whole_batch = rows is None and len(records) == len(batch)
+        rows = rows if rows is not None else range(len(records))
+        memo = memo if memo is not None else ValueMemo()
+        explain = batch.explain
+        # Cleaned columns that differ from the input, as (field, values)
+        changed = []
+
+        # Columns in field order, all operations of a column before the next,
+        # so every record's changes are logged in clean_record's order
+        for field, ops in zip(self.fields, self.operations):
+            if not ops:
+                continue
+            column = [record[field] for record in records]
+            all_strings, any_strings = _string_kinds(column)
+            if not any_strings:
+                continue
+            if all_strings:
+                positions = range(len(column))
+                values = column
+            else:
+                strings = list(map(isinstance, column, repeat(str)))
+                positions = list(compress(range(len(column)), strings))
+                values = list(compress(column, strings))
+            entries = self._run_operations(ops, values, explain, memo)
+            if explain:
+                self._record_changes(batch, rows, positions, field, ops, values, entries)
+                entries = [steps[-1] for steps in entries]
+            if entries == values:
+                continue
+            if all_strings:
+                changed.append((field, entries))
+            else:
+                cleaned_column = list(column)
+                for idx, value in zip(positions, entries):
+                    cleaned_column[idx] = value
+                changed.append((field, cleaned_column))
+
+        # Copying a record keeps its key order and is cheaper than rebuilding
+        # it; only the changed columns are written back
+        results = list(map(dict, records))
+        for field, column in changed:
+            for result, value in zip(results, column):
+                result[field] = value
+
+        if whole_batch:
+            batch.cleaned[:] = results
+        else:
+            cleaned = batch.cleaned
+            for row, result in zip(rows, results):
+                cleaned[row] = result
+
+    @staticmethod
+    def _run_operations(
+        ops: List[Operation],
+        values: List[str],
+        explain: bool,
+        memo: ValueMemo
+    ) -> List[Any]:
+        """
+        Per value: the final result, or with explain the result after each operation
+
+        Each distinct value is looked up once; those missing from memo are
+        run through the operations together, one list per operation.
+        """
+        table = memo.table(tuple(change_type for change_type, _ in ops), explain)
+        max_items = memo.max_items
+        # Distinct values in first-seen order, each mapped to its entry
+        distinct: Dict[str, Any] = dict.fromkeys(values)
+        missing = []
+
+        for value in distinct:
+            entry = table.get(value)
+            if entry is None:
+                missing.append(value)
+            else:
+                table.move_to_end(value)
+                distinct[value] = entry
+
+        if missing:
+            current = missing
+            steps = []
+            for _, operation in ops:
+                current = operation(current)
+                steps.append(current)
+            for value, entry in zip(missing, zip(*steps) if explain else current):
+                distinct[value] = entry
+                table[value] = entry
+                if len(table) > max_items:
+                    table.popitem(last=False)
+                    memo.evictions += 1
+
+        memo.misses += len(missing)
+        memo.hits += len(values) - len(missing)
+        return list(map(distinct.__getitem__, values))
+
+    @staticmethod
+    def _record_changes(
+        batch: CleanedBatch,
+        rows: Sequence[int],
+        positions: Sequence[int],
+        field: str,
+        ops: List[Operation],
+        values: List[str],
+        entries: List[Tuple[str, ...]]
+    ):
+        log = batch.changes
+        field_id = batch.field_id(field)
+        op_codes = [OP_CODES[change_type] for change_type, _ in ops]
+        for idx, value, steps in zip(positions, values, entries):
+            before = value
+            for op_code, after in zip(op_codes, steps):
+                if before != after:
+                    log.add(rows[idx], field_id, op_code, before, after)
+                before = after
@@ -0,0 +1,202 @@
+"""
+Blocking Keys for Deduplication
+Groups exact and near-exact duplicates by normalized keys in O(n)
+"""
+
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# A blocking key is a tuple of field kinds whose normalized values must all match
+DEFAULT_BLOCKING_KEYS: Tuple[Tuple[str, ...], ...] = (
+    ("email",),
+    ("phone",),
+    ("name", "postal_code"),
+)
+
+# Field names that identify each kind of field, compared token by token
+FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "email": ("email", "e_mail", "mail", "email_address", "e_mail_address", "mail_address"),
+    "phone": (
+        "phone", "phone_number", "telephone", "tel", "mobile", "mobile_number",
+        "mobile_phone", "cell", "cell_phone", "cellphone",
+    ),
+    "name": (
+        "name", "full_name", "fullname", "first_name", "firstname", "given_name",
+        "middle_name", "last_name", "lastname", "surname", "family_name",
+    ),
+    "postal_code": ("zip", "zip_code", "zipcode", "postal", "postal_code", "postcode", "post_code"),
+}
+
+# Leading tokens that may qualify an alias ("customer_email", "home_phone")
+FIELD_QUALIFIERS = frozenset({
+    "user", "customer", "client", "contact", "person", "member", "primary",
+    "secondary", "home", "work", "personal", "billing", "shipping",
+})
+
+_CASE_BOUNDARY_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_FIELD_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NON_DIGIT_RE = re.compile(r"\D")
+_NON_ALNUM_RE = re.compile(r"[^0-9A-Za-z]")
+
+
+def _normalize_text(value: Any) -> str:
+    return _WHITESPACE_RE.sub(" ", str(value)).strip().lower()
+
+
+def _normalize_email(value: Any) -> str:
+    email = str(value).strip().lower()
+    return email if "@" in email else ""
+
+
+def _normalize_phone(value: Any) -> str:
+    digits = _NON_DIGIT_RE.sub("", str(value))
+    if len(digits) < 7:
+        return ""
+    # Compare national numbers so "+1 555..." and "555..." block together
+    return digits[-10:]
+
+
+def _normalize_postal_code(value: Any) -> str:
+    return _NON_ALNUM_RE.sub("", str(value)).upper()
+
+
+NORMALIZERS: Dict[str, Callable[[Any], str]] = {
+    "email": _normalize_email,
+    "phone": _normalize_phone,
+    "name": _normalize_text,
+    "postal_code": _normalize_postal_code,
+}
+
+
+def _field_tokens(field: str) -> Tuple[str, ...]:
+    """Lowercase tokens of a field name: "customerEmail-Address" -> ("customer", "email", "address")"""
+    spaced = _CASE_BOUNDARY_RE.sub("_", field.strip())
+    return tuple(token for token in _FIELD_SEPARATOR_RE.split(spaced.lower()) if token)
+
+
+_ALIAS_TOKENS: Dict[str, frozenset] = {
+    kind: frozenset(_field_tokens(alias) for alias in aliases)
+    for kind, aliases in FIELD_ALIASES.items()
+}
+
+
+def _fields_for_kind(field_names: Sequence[str], kind: str) -> List[str]:
+    """
+    Record fields that hold a given kind (unknown kinds match by exact name)
+
+    A field matches when its tokens are an alias, optionally after one
+    qualifier: "user_email" and "home_phone" match, while "email_verified",
+    "is_mobile_user" and "hotel_name" do not.
+    """
+    aliases = _ALIAS_TOKENS.get(kind)
+    if aliases is None:
+        return [f for f in field_names if f == kind]
+    matches = []
+    for field in field_names:
+        tokens = _field_tokens(field)
+        if tokens in aliases or (tokens[:1] and tokens[0] in FIELD_QUALIFIERS and tokens[1:] in aliases):
+            matches.append(field)
+    return sorted(matches)
+
+
+class Blocker:
+    """
+    Multi-pass blocking over configurable normalized keys
+
+    Records that share the full normalized value of a blocking key land in
+    the same block. A block is ambiguous when its members disagree on
+    another blocking key that both define (e.g. same name + postal code but
+    different emails). Those members still go through embedding similarity.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Tuple[str, ...]] = DEFAULT_BLOCKING_KEYS,
+        fields: Optional[List[str]] = None
+    ):
+        self.keys = [tuple(key) for key in keys]
+        self.fields = set(fields) if fields else None
+        self._field_cache: Dict[Tuple[str, ...], Dict[str, List[str]]] = {}
+
+    def _resolve_fields(self, record: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Map each kind to the record's fields, cached per record layout"""
+        layout = tuple(record.keys())
+        resolved = self._field_cache.get(layout)
+        if resolved is None:
+            names = [f for f in layout if self.fields is None or f in self.fields]
+            kinds = {kind for key in self.keys for kind in key}
+            resolved = {kind: _fields_for_kind(names, kind) for kind in kinds}
+            self._field_cache[layout] = resolved
+        return resolved
+
+    def key_values(self, record: Dict[str, Any]) -> List[Optional[Tuple[str, ...]]]:
+        """Normalized value of every blocking key for one record (None if missing)"""
+        resolved = self._resolve_fields(record)
+        values = []
+        for key in self.keys:
+            parts = []
+            for kind in key:
+                normalize = NORMALIZERS.get(kind, _normalize_text)
+                part = " ".join(
+                    normalized
+                    for normalized in (
+                        normalize(record[f]) for f in resolved[kind] if record.get(f) is not None
+                    )
+                    if normalized
+                )
+                if not part:
+                    break
+                parts.append(part)
+            values.append(tuple(parts) if len(parts) == len(key) else None)
+        return values
+
+    def build_blocks(self, data: List[Dict[str, Any]]) -> Tuple[List[List[int]], List[int]]:
+        """
+        Split records into exact blocks and a residual for the embedding path
+
+        Returns:
+            (blocks, residual): blocks are sorted index lists of unambiguous
+            duplicates; residual holds records that matched no block or only
+            ambiguous ones, plus the first member of every block so blocked
+            records can still match fuzzy duplicates elsewhere
+        """
+        if not self.keys:
+            return [], list(range(len(data)))
+
+        record_keys = [self.key_values(record) for record in data]
+
+        buckets: Dict[Tuple[int, Tuple[str, ...]], List[int]] = defaultdict(list)
+        for idx, values in enumerate(record_keys):
+            for key_idx, value in enumerate(values):
+                if value is not None:
+                    buckets[(key_idx, value)].append(idx)
+
+        blocks = []
+        blocked = set()
+        for (key_idx, _), members in buckets.items():
+            if len(members) < 2 or self._is_ambiguous(members, key_idx, record_keys):
+                continue
+            blocks.append(members)
+            blocked.update(members[1:])
+
+        residual = [idx for idx in range(len(data)) if idx not in blocked]
+        return blocks, residual
+
+    def _is_ambiguous(
+        self,
+        members: List[int],
+        key_idx: int,
+        record_keys: List[List[Optional[Tuple[str, ...]]]]
+    ) -> bool:
+        """True if members disagree on another blocking key they both have"""
+        for other_idx in range(len(self.keys)):
+            if other_idx == key_idx:
+                continue
+            distinct = {record_keys[m][other_idx] for m in members} - {None}
+            if len(distinct) > 1:
+                return True
+        return False
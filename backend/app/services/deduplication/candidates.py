@@ -0,0 +1,298 @@
+"""
+Candidate Generation for Deduplication
+Normalized embedding matrix + random-hyperplane LSH index with exact re-scoring
+"""
+
+import logging
+import math
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("cleara.dedupe")
+
+# Row chunk used when hashing the matrix, keeps projections bounded in memory
+HASH_CHUNK_SIZE = 65536
+
+# Buckets larger than this are re-scored block by block instead of all at once
+MAX_BUCKET_BLOCK = 2048
+
+# Default tile edge for exact all-pairs similarity (4096 x 4096 float32 = 64MB)
+DEFAULT_TILE_SIZE = 4096
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so that a dot product equals cosine similarity"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    # Zero vectors keep a similarity of 0 with everything, like sklearn
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SimHashIndex:
+    """
+    Random-hyperplane LSH index over a normalized embedding matrix
+
+    Each table hashes a vector to the sign pattern of `bits` random
+    projections. Two vectors at cosine similarity s collide in one table with
+    probability (1 - arccos(s) / pi) ** bits, so the number of tables is
+    chosen to reach the requested recall at the dedupe threshold. When that
+    takes more than max_tables, automatically chosen bits are lowered until
+    it fits (bigger buckets, same recall). A shortfall that remains is
+    logged and kept in expected_recall.
+    Tables are hashed one at a time, so memory stays O(n) per table.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        recall: float = 0.99,
+        bits: int = None,
+        num_tables: int = None,
+        target_bucket_size: int = 64,
+        max_tables: int = 64,
+        seed: int = 42
+    ):
+        self.threshold = threshold
+        self.recall = recall
+        self.bits = bits
+        self.num_tables = num_tables
+        self.target_bucket_size = target_bucket_size
+        self.max_tables = max_tables
+        self.seed = seed
+        self.expected_recall = None
+
+    def configure(self, n: int):
+        """Pick bits per table and table count for n records"""
+        auto_bits = self.bits is None
+        if auto_bits:
+            bits = math.ceil(math.log2(max(n / self.target_bucket_size, 2)))
+            self.bits = int(min(max(bits, 4), 24))
+
+        if self.num_tables is None:
+            tables = self._tables_for_recall(self.bits)
+            while auto_bits and tables > self.max_tables and self.bits > 1:
+                self.bits -= 1
+                tables = self._tables_for_recall(self.bits)
+            self.num_tables = int(min(tables, self.max_tables))
+
+        self.expected_recall = self._recall(self.bits, self.num_tables)
+        if self.expected_recall < self.recall:
+            logger.warning(
+                f"LSH recall capped at {self.expected_recall:.4f} (target {self.recall}) "
+                f"with {self.num_tables} tables of {self.bits} bits"
+            )
+
+    def _collision(self, bits: int) -> float:
+        """Chance that a pair exactly at the threshold shares a bucket in one table"""
+        angle = math.acos(min(max(self.threshold, -1.0), 1.0))
+        return (1.0 - angle / math.pi) ** bits
+
+    def _tables_for_recall(self, bits: int) -> int:
+        collision = self._collision(bits)
+        if collision >= 1.0:
+            return 1
+        if collision <= 0.0:
+            return math.inf
+        return max(math.ceil(math.log(1.0 - self.recall) / math.log(1.0 - collision)), 1)
+
+    def _recall(self, bits: int, tables: int) -> float:
+        return 1.0 - (1.0 - self._collision(bits)) ** tables
+
+    def _hash_table(self, matrix: np.ndarray, planes: np.ndarray) -> np.ndarray:
+        """Hash every row of the matrix to an integer bucket code"""
+        weights = (1 << np.arange(self.bits, dtype=np.int64))
+        codes = np.empty(matrix.shape[0], dtype=np.int64)
+
+        for start in range(0, matrix.shape[0], HASH_CHUNK_SIZE):
+            chunk = matrix[start:start + HASH_CHUNK_SIZE]
+            signs = (chunk @ planes.T) > 0
+            codes[start:start + HASH_CHUNK_SIZE] = signs.astype(np.int64) @ weights
+
+        return codes
+
+    def signatures(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Bucket codes of every row, one row of codes per table
+
+        Planes depend only on the seed, bits and dimension, so indexes with
+        the same configuration hash separate matrices (e.g. shards) compatibly.
+        """
+        n, dim = matrix.shape
+        self.configure(n)
+        rng = np.random.default_rng(self.seed)
+        codes = np.empty((self.num_tables, n), dtype=np.int32 if self.bits < 32 else np.int64)
+        for table in range(self.num_tables):
+            planes = rng.standard_normal((self.bits, dim)).astype(np.float32)
+            codes[table] = self._hash_table(matrix, planes)
+        return codes
+
+    def iter_buckets(self, matrix: np.ndarray) -> Iterator[np.ndarray]:
+        """Yield arrays of row indices that share a bucket in some table"""
+        n, dim = matrix.shape
+        self.configure(n)
+        rng = np.random.default_rng(self.seed)
+
+        for _ in range(self.num_tables):
+            planes = rng.standard_normal((self.bits, dim)).astype(np.float32)
+            yield from iter_code_buckets(self._hash_table(matrix, planes))
+
+
+def iter_code_buckets(codes: np.ndarray) -> Iterator[np.ndarray]:
+    """Yield arrays of positions sharing a code, for codes held by 2+ positions"""
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(codes)]))
+
+    for start, end in zip(starts, ends):
+        if end - start > 1:
+            yield order[start:end]
+
+
+def _score_block(
+    matrix: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    threshold: float,
+    same_block: bool,
+    partition: Optional[np.ndarray] = None
+) -> Iterator[Tuple[int, int, float]]:
+    """Exact similarity for a block of rows x cols, yielding pairs over threshold"""
+    scores = matrix[rows] @ matrix[cols].T
+    hits = scores >= threshold
+    if same_block:
+        hits = np.triu(hits, k=1)
+    if partition is not None:
+        hits &= partition[rows][:, None] != partition[cols][None, :]
+    hits_r, hits_c = np.nonzero(hits)
+
+    for r, c in zip(hits_r, hits_c):
+        i, j = int(rows[r]), int(cols[c])
+        if i == j:
+            continue
+        if i > j:
+            i, j = j, i
+        yield i, j, float(scores[r, c])
+
+
+def _score_bucket(
+    matrix: np.ndarray,
+    members: np.ndarray,
+    threshold: float,
+    partition: Optional[np.ndarray] = None
+) -> Iterator[Tuple[int, int, float]]:
+    """Exact all-pairs re-scoring inside one bucket, blockwise for big buckets"""
+    members = np.sort(members)
+    if partition is not None and len(np.unique(partition[members])) < 2:
+        return
+    for a in range(0, len(members), MAX_BUCKET_BLOCK):
+        rows = members[a:a + MAX_BUCKET_BLOCK]
+        for b in range(a, len(members), MAX_BUCKET_BLOCK):
+            cols = members[b:b + MAX_BUCKET_BLOCK]
+            yield from _score_block(matrix, rows, cols, threshold, (a == b), partition)
+
+
+def iter_similar_pairs(
+    matrix: np.ndarray,
+    threshold: float,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    partition: Optional[np.ndarray] = None
+) -> Iterator[Tuple[int, int, float]]:
+    """
+    Exact all-pairs similarity in fixed-size tiles
+
+    Computes the upper triangle of matrix @ matrix.T one tile_size x tile_size
+    block at a time and yields (i, j, score) for i < j and score >= threshold,
+    ordered by i then j. Peak memory is bounded by the tile, not n^2.
+    With a partition array, only pairs from different partitions are kept.
+    """
+    n = matrix.shape[0]
+    for a in range(0, n, tile_size):
+        rows = matrix[a:a + tile_size]
+        hit_i, hit_j, hit_scores = [], [], []
+
+        for b in range(a, n, tile_size):
+            scores = rows @ matrix[b:b + tile_size].T
+            hits = scores >= threshold
+            if a == b:
+                hits = np.triu(hits, k=1)
+            if partition is not None:
+                hits &= partition[a:a + tile_size][:, None] != partition[b:b + tile_size][None, :]
+            r, c = np.nonzero(hits)
+            if len(r):
+                hit_i.append(r + a)
+                hit_j.append(c + b)
+                hit_scores.append(scores[r, c])
+
+        if not hit_i:
+            continue
+
+        i_all = np.concatenate(hit_i)
+        j_all = np.concatenate(hit_j)
+        s_all = np.concatenate(hit_scores)
+        for k in np.lexsort((j_all, i_all)):
+            yield int(i_all[k]), int(j_all[k]), float(s_all[k])
+
+
+def find_similar_pairs(
+    matrix: np.ndarray,
+    threshold: float,
+    ann_min_records: int = 2048,
+    recall: float = 0.99,
+    partition: Optional[np.ndarray] = None
+) -> Dict[Tuple[int, int], float]:
+    """
+    Find all pairs (i, j), i < j, with cosine similarity >= threshold
+
+    Args:
+        matrix: L2-normalized embeddings (see normalize_embeddings)
+        threshold: Minimum cosine similarity
+        ann_min_records: Below this size every pair is scored exactly
+        recall: Target recall of the LSH stage for larger inputs
+        partition: Optional per-row shard ids; only cross-shard pairs are returned
+
+    Returns:
+        Dict mapping (i, j) to the exact similarity score
+    """
+    n = matrix.shape[0]
+    edges: Dict[Tuple[int, int], float] = {}
+    if n < 2:
+        return edges
+
+    if n < ann_min_records:
+        for i, j, score in iter_similar_pairs(matrix, threshold, partition=partition):
+            edges[(i, j)] = score
+        return edges
+
+    for members in SimHashIndex(threshold=threshold, recall=recall).iter_buckets(matrix):
+        for i, j, score in _score_bucket(matrix, members, threshold, partition):
+            edges[(i, j)] = score
+
+    return edges
+
+
+def find_bucket_pairs(
+    matrix: np.ndarray,
+    codes: np.ndarray,
+    threshold: float,
+    partition: Optional[np.ndarray] = None
+) -> Dict[Tuple[int, int], float]:
+    """
+    Pairs that share an LSH bucket in some table and reach threshold
+
+    codes holds per-table bucket codes for every row of matrix (see
+    SimHashIndex.signatures). With a partition array, buckets whose members
+    all sit in one partition are skipped without scoring and only
+    cross-partition pairs are returned.
+    """
+    edges: Dict[Tuple[int, int], float] = {}
+    for table_codes in codes:
+        for members in iter_code_buckets(table_codes):
+            for i, j, score in _score_bucket(matrix, members, threshold, partition):
+                edges[(i, j)] = score
+    return edges
@@ -0,0 +1,69 @@
+"""
+Duplicate Clustering
+Union-find over candidate edges: transitive, order-independent duplicate groups
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+
+class UnionFind:
+    """Disjoint-set forest with path compression and union by size"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return True
+
+
+def cluster_edges(n: int, edges: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    """
+    Connected components of the similarity graph
+
+    Runs in near-linear time in the number of edges. Components are the same
+    for any edge order, so shards that produce the same edge set (in any
+    order) produce identical clusters.
+
+    Returns:
+        Every record's cluster (singletons included), members sorted, clusters
+        ordered by their smallest member
+    """
+    uf = UnionFind(n)
+    for i, j in edges:
+        uf.union(i, j)
+
+    clusters: Dict[int, List[int]] = {}
+    for idx in range(n):
+        clusters.setdefault(uf.find(idx), []).append(idx)
+
+    # Members are appended in index order, so each list is already sorted
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def strongest_links(edges: Dict[Tuple[int, int], float]) -> Dict[int, float]:
+    """Best similarity each record has with any other record"""
+    best: Dict[int, float] = {}
+    for (i, j), score in edges.items():
+        if score > best.get(i, -1.0):
+            best[i] = score
+        if score > best.get(j, -1.0):
+            best[j] = score
+    return best
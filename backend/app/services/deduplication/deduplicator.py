@@ -3,49 +3,71 @@ Deduplication Service
 AI-powered duplicate detection using sentence embeddings
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import json
 
+from app.core.config import settings
+from app.core.executor import get_compute_executor
+from app.ml.registry import get_model_registry
 from app.models.schemas import DuplicateGroup
+from app.services.deduplication.blocking import Blocker, DEFAULT_BLOCKING_KEYS
+from app.services.deduplication.clustering import cluster_edges, strongest_links
+from app.services.deduplication.embedding_cache import get_embedding_cache
+from app.services.deduplication.sharding import sharded_similar_pairs
+from app.services.deduplication.candidates import (
+    DEFAULT_TILE_SIZE,
+    normalize_embeddings,
+    find_similar_pairs,
+    iter_similar_pairs,
+)
 
 
 class Deduplicator:
     """AI-powered deduplication service"""
     
-    def __init__(self, threshold: float = 0.85):
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        blocking_keys: Sequence[Tuple[str, ...]] = DEFAULT_BLOCKING_KEYS
+    ):
         self.threshold = threshold
+        self.blocking_keys = blocking_keys
+        self.model_name = settings.EMBEDDING_MODEL
         self.model = None
+        self.embedding_cache = get_embedding_cache()
         self._load_model()
     
     def _load_model(self):
-        """Load sentence transformer model"""
-        try:
-            from sentence_transformers import SentenceTransformer
-            # Use lightweight model for fast inference
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        except Exception as e:
-            print(f"Warning: Could not load embedding model: {e}")
-            print("Falling back to simple string comparison")
-            self.model = None
+        """Get the shared sentence transformer model from the process-wide registry"""
+        # Lightweight model for fast inference, loaded once per process.
+        # None when the model cannot be loaded: fall back to simple string comparison
+        self.model = get_model_registry().get(self.model_name)
     
     async def find_duplicates(
         self,
         data: List[Dict[str, Any]],
         fields: Optional[List[str]] = None,
-        keep: str = "first"
+        keep: str = "first",
+        tenant: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Find and remove duplicates
         
+        Blocking, encoding, similarity search and clustering run on the shared
+        compute executor, so the event loop stays free while they do.
+        
         Args:
             data: List of records
             fields: Specific fields to compare (None = all fields)
             keep: Which duplicate to keep ('first', 'last', 'best')
+            tenant: Caller whose compute queue this job counts against
             
         Returns:
             Dict with unique records and duplicate groups
+            
+        Raises:
+            ComputeQueueFull: The tenant already has too many jobs in flight
         """
         if len(data) < 2:
             return {
@@ -54,31 +76,46 @@ class Deduplicator:
                 'duplicate_groups': []
             }
         
-        # Generate embeddings for each record
-        embeddings = self._generate_embeddings(data, fields)
-        
-        # Find duplicate groups
+        executor = get_compute_executor()
+        async with executor.slot(tenant):
+            # Exact/near-exact duplicates by normalized blocking keys, O(n)
+            blocker = Blocker(self.blocking_keys, fields)
+            blocks, residual = await executor.run_in_thread(blocker.build_blocks, data)
+            edges = {}
+            for members in blocks:
+                for idx in members[1:]:
+                    edges[(members[0], idx)] = 1.0
+            
+            # Embeddings only for the records blocking could not settle
+            residual_records = [data[idx] for idx in residual]
+            if self.model is not None and len(residual) >= settings.DEDUP_SHARD_MIN_RECORDS:
+                # Large inputs: encoding + similarity search per shard in worker processes
+                residual_edges = await self._find_sharded_edges(residual_records, fields, blocker)
+            elif len(residual) > 1:
+                # Candidate generation + exact re-scoring of candidate pairs
+                residual_edges = await executor.run_in_thread(
+                    self._find_residual_edges, residual_records, fields
+                )
+            else:
+                residual_edges = {}
+            
+            for (a, b), score in residual_edges.items():
+                edges.setdefault((residual[a], residual[b]), score)
+            
+            return await executor.run_in_thread(self._build_groups, data, edges, keep)
+    
+    def _build_groups(
+        self,
+        data: List[Dict[str, Any]],
+        edges: Dict[Tuple[int, int], float],
+        keep: str
+    ) -> Dict[str, Any]:
+        """Transitive duplicate groups: connected components of the edge graph"""
         duplicate_groups = []
-        seen_indices = set()
         unique_records = []
+        best_scores = strongest_links(edges)
         
-        for i in range(len(data)):
-            if i in seen_indices:
-                continue
-            
-            # Find similar records
-            similar_indices = [i]
-            for j in range(i + 1, len(data)):
-                if j in seen_indices:
-                    continue
-                
-                # Calculate similarity
-                similarity = self._calculate_similarity(embeddings[i], embeddings[j])
-                
-                if similarity >= self.threshold:
-                    similar_indices.append(j)
-                    seen_indices.add(j)
-            
+        for similar_indices in cluster_edges(len(data), edges):
             if len(similar_indices) > 1:
                 # Found duplicates
                 duplicate_records = [data[idx] for idx in similar_indices]
@@ -91,11 +128,8 @@ class Deduplicator:
                 else:  # "best"
                     kept_record = self._select_best_record(duplicate_records)
                 
-                # Calculate similarity scores
-                similarity_scores = []
-                for idx in similar_indices[1:]:
-                    score = self._calculate_similarity(embeddings[i], embeddings[idx])
-                    similarity_scores.append(float(score))
+                # Each removed record's strongest match inside the group
+                similarity_scores = [best_scores[idx] for idx in similar_indices[1:]]
                 
                 duplicate_groups.append(DuplicateGroup(
                     records=duplicate_records,
@@ -107,7 +141,7 @@ class Deduplicator:
                 unique_records.append(kept_record)
             else:
                 # No duplicates found
-                unique_records.append(data[i])
+                unique_records.append(data[similar_indices[0]])
         
         return {
             'unique_records': unique_records,
@@ -118,34 +152,41 @@ class Deduplicator:
     async def analyze_duplicates(
         self,
         data: List[Dict[str, Any]],
-        fields: Optional[List[str]] = None
+        fields: Optional[List[str]] = None,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        tenant: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Analyze duplicates without removing them
         
+        Embeddings are L2-normalized once and compared in tile_size x tile_size
+        blocks, so only pairs above the threshold are ever materialized.
+        
         Returns duplicate groups for review
         """
+        executor = get_compute_executor()
+        async with executor.slot(tenant):
+            return await executor.run_in_thread(self._analyze_pairs, data, fields, tile_size)
+    
+    def _analyze_pairs(
+        self,
+        data: List[Dict[str, Any]],
+        fields: Optional[List[str]],
+        tile_size: int
+    ) -> Dict[str, Any]:
+        """Every pair above the threshold, with a confidence label"""
         embeddings = self._generate_embeddings(data, fields)
+        matrix = normalize_embeddings(embeddings)
         
         duplicate_groups = []
-        seen_pairs = set()
         
-        for i in range(len(data)):
-            for j in range(i + 1, len(data)):
-                pair = tuple(sorted([i, j]))
-                if pair in seen_pairs:
-                    continue
-                
-                similarity = self._calculate_similarity(embeddings[i], embeddings[j])
-                
-                if similarity >= self.threshold:
-                    seen_pairs.add(pair)
-                    duplicate_groups.append({
-                        'record_1': data[i],
-                        'record_2': data[j],
-                        'similarity': float(similarity),
-                        'confidence': 'high' if similarity > 0.95 else 'medium' if similarity > 0.85 else 'low'
-                    })
+        for i, j, similarity in iter_similar_pairs(matrix, self.threshold, tile_size=tile_size):
+            duplicate_groups.append({
+                'record_1': data[i],
+                'record_2': data[j],
+                'similarity': similarity,
+                'confidence': 'high' if similarity > 0.95 else 'medium' if similarity > 0.85 else 'low'
+            })
         
         return {
             'duplicate_groups': duplicate_groups
@@ -157,7 +198,23 @@ class Deduplicator:
         fields: Optional[List[str]] = None
     ) -> np.ndarray:
         """Generate embeddings for records"""
-        # Convert records to text
+        texts = self._record_texts(data, fields)
+        
+        if self.model:
+            # Use sentence transformer, encoding only texts missing from the cache
+            embeddings = self._encode_cached(texts)
+        else:
+            # Fallback: simple character-based vectors
+            embeddings = self._simple_embeddings(texts)
+        
+        return embeddings
+    
+    def _record_texts(
+        self,
+        data: List[Dict[str, Any]],
+        fields: Optional[List[str]] = None
+    ) -> List[str]:
+        """Convert records to the normalized text that gets embedded"""
         texts = []
         for record in data:
             if fields:
@@ -169,15 +226,97 @@ class Deduplicator:
             
             text = ' '.join(text_parts).lower().strip()
             texts.append(text)
+        return texts
+    
+    async def _find_sharded_edges(
+        self,
+        records: List[Dict[str, Any]],
+        fields: Optional[List[str]],
+        blocker: Blocker
+    ) -> Dict[Tuple[int, int], float]:
+        """
+        Similar pairs for large inputs, computed per shard in worker processes
         
-        if self.model:
-            # Use sentence transformer
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
+        Records are sharded by their first blocking key value (or their text
+        when they have none). Cached embeddings are sent along with each
+        shard, and newly encoded ones are persisted here, since the cache has
+        a single writer.
+        """
+        executor = get_compute_executor()
+        texts, shard_keys, keys, cached = await executor.run_in_thread(
+            self._prepare_shards, records, fields, blocker
+        )
+        
+        embeddings, edges = await sharded_similar_pairs(
+            texts, shard_keys, cached, self.model_name, self.threshold
+        )
+        
+        missing = [pos for pos in range(len(texts)) if pos not in cached]
+        if missing:
+            await executor.run_in_thread(
+                self.embedding_cache.put_many,
+                self.model_name, [keys[pos] for pos in missing], embeddings[missing]
+            )
+        return edges
+    
+    def _prepare_shards(
+        self,
+        records: List[Dict[str, Any]],
+        fields: Optional[List[str]],
+        blocker: Blocker
+    ) -> Tuple[List[str], List[str], List[str], Dict[int, np.ndarray]]:
+        """Texts, shard keys, cache keys and cached embeddings for a sharded run"""
+        texts = self._record_texts(records, fields)
+        shard_keys = []
+        for record, text in zip(records, texts):
+            key = next((value for value in blocker.key_values(record) if value is not None), None)
+            shard_keys.append(repr(key) if key is not None else text)
+        
+        keys = [self.embedding_cache.make_key(self.model_name, text) for text in texts]
+        cached = self.embedding_cache.get_many(self.model_name, keys)
+        return texts, shard_keys, keys, cached
+    
+    def _encode_cached(self, texts: List[str]) -> np.ndarray:
+        """Encode texts through the embedding cache (float16 vectors either way)"""
+        keys = [self.embedding_cache.make_key(self.model_name, text) for text in texts]
+        cached = self.embedding_cache.get_many(self.model_name, keys)
+        
+        # Encode each distinct missing text once
+        missing = {}
+        for pos, key in enumerate(keys):
+            if pos not in cached and key not in missing:
+                missing[key] = texts[pos]
+        
+        if missing:
+            encoded = self.model.encode(list(missing.values()), convert_to_numpy=True)
+            encoded = np.asarray(encoded, dtype=np.float16)
+            self.embedding_cache.put_many(self.model_name, list(missing.keys()), encoded)
+            fresh = dict(zip(missing.keys(), encoded))
         else:
-            # Fallback: simple character-based vectors
-            embeddings = self._simple_embeddings(texts)
+            fresh = {}
         
-        return embeddings
+        return np.stack([
+            cached[pos] if pos in cached else fresh[key]
+            for pos, key in enumerate(keys)
+        ]).astype(np.float32)
+    
+    def _find_residual_edges(
+        self,
+        records: List[Dict[str, Any]],
+        fields: Optional[List[str]]
+    ) -> Dict[Tuple[int, int], float]:
+        """Embed records and find their similar pairs (runs on a compute thread)"""
+        return self._find_candidate_edges(self._generate_embeddings(records, fields))
+    
+    def _find_candidate_edges(self, embeddings: np.ndarray) -> Dict[Tuple[int, int], float]:
+        """Pairs (i, j), i < j, whose cosine similarity reaches the threshold"""
+        matrix = normalize_embeddings(embeddings)
+        return find_similar_pairs(
+            matrix,
+            self.threshold,
+            ann_min_records=settings.DEDUP_ANN_MIN_RECORDS,
+            recall=settings.DEDUP_ANN_RECALL
+        )
     
     def _simple_embeddings(self, texts: List[str]) -> np.ndarray:
         """Simple character-based embeddings (fallback)"""
@@ -199,15 +338,6 @@ class Deduplicator:
         
         return np.array(embeddings)
     
-    def _calculate_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
-        """Calculate cosine similarity between two embeddings"""
-        # Reshape for sklearn
-        emb1 = embedding1.reshape(1, -1)
-        emb2 = embedding2.reshape(1, -1)
-        
-        similarity = cosine_similarity(emb1, emb2)[0][0]
-        return similarity
-    
     def _select_best_record(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Select the best record from duplicates
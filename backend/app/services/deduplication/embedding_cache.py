@@ -0,0 +1,308 @@
+"""
+Embedding Cache for Deduplication
+Content-addressed cache with an in-process LRU tier and a memory-mapped disk tier
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one writer process per store
+    fcntl = None
+
+logger = logging.getLogger("cleara.dedupe")
+
+
+class _DiskStore:
+    """
+    Append-only on-disk embedding store for one model
+
+    vectors.f16 is a float16 matrix opened with np.memmap and keys.txt holds
+    one cache key per line after a "dim=" header; line k is the key of row k.
+    Vectors are flushed before their keys are appended, so a crash never
+    leaves a key pointing at an unwritten row, and readers only take complete
+    key lines.
+
+    Several processes may share a store: writers hold an exclusive flock on
+    the lock file and first catch up on rows appended by others. A store
+    whose key file is unreadable is treated as empty and rewritten.
+    """
+
+    def __init__(self, directory: Path, read_only: bool = False):
+        self.directory = directory
+        self.read_only = read_only
+        self.vectors_path = directory / "vectors.f16"
+        self.keys_path = directory / "keys.txt"
+        self.lock_path = directory / "lock"
+        self.index: Dict[str, int] = {}
+        self.rows = 0
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.vectors: Optional[np.memmap] = None
+        self._keys_offset = 0
+
+        if not read_only:
+            directory.mkdir(parents=True, exist_ok=True)
+        self.refresh()
+
+    def _reset(self):
+        self.index = {}
+        self.rows = 0
+        self.dim = None
+        self.capacity = 0
+        self.vectors = None
+        self._keys_offset = 0
+
+    def refresh(self):
+        """Pick up keys and rows appended since the last read, by any process"""
+        if not self.keys_path.exists() or not self.vectors_path.exists():
+            return
+        try:
+            self._read_keys()
+        except (ValueError, UnicodeDecodeError) as e:
+            logger.warning(f"Embedding disk cache {self.directory} is corrupt, starting over: {e}")
+            self._reset()
+            return
+        self._map_vectors()
+
+    def _read_keys(self):
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        # A line without its newline is still being written
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return
+        lines = data[:end].decode("utf-8").splitlines()
+
+        if self.dim is None:
+            header = lines.pop(0)
+            if not header.startswith("dim="):
+                raise ValueError(f"bad header {header!r}")
+            self.dim = int(header[4:])
+            if self.dim <= 0:
+                raise ValueError(f"bad dimension {self.dim}")
+        for line in lines:
+            self.index[line.strip()] = self.rows
+            self.rows += 1
+        self._keys_offset += end
+
+    def _map_vectors(self):
+        """(Re)map the vector file if it grew"""
+        if self.dim is None:
+            return
+        capacity = os.path.getsize(self.vectors_path) // (self.dim * 2)
+        if capacity == self.capacity and self.vectors is not None:
+            return
+        self.capacity = capacity
+        self.vectors = None
+        if capacity:
+            self.vectors = np.memmap(
+                self.vectors_path,
+                dtype=np.float16,
+                mode="r" if self.read_only else "r+",
+                shape=(self.capacity, self.dim)
+            )
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _grow(self, rows_needed: int):
+        """Extend the vector file so that rows_needed rows fit"""
+        new_capacity = max(rows_needed, self.capacity * 2, 1024)
+        self.vectors = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 2)
+        self.capacity = new_capacity
+        self.vectors = np.memmap(
+            self.vectors_path,
+            dtype=np.float16,
+            mode="r+",
+            shape=(self.capacity, self.dim)
+        )
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self.index.get(key)
+        # Rows past the end of the file were never fully written
+        if row is None or row >= self.capacity:
+            return None
+        return np.array(self.vectors[row], dtype=np.float16)
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        """Append new vectors and their keys"""
+        if self.read_only:
+            return
+
+        with self._locked():
+            if self.keys_path.exists() and self.vectors_path.exists():
+                self.refresh()
+            else:
+                self._reset()
+
+            capacity = self.capacity
+            new = list({
+                k: v for k, v in zip(keys, vectors) if self.index.get(k, capacity) >= capacity
+            }.items())
+            if not new:
+                return
+
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                header = f"dim={self.dim}\n".encode("utf-8")
+                with open(self.keys_path, "wb") as f:
+                    f.write(header)
+                self._keys_offset = len(header)
+                with open(self.vectors_path, "wb"):
+                    pass
+                self.capacity = 0
+            elif vectors.shape[1] != self.dim:
+                return
+
+            start = self.rows
+            if start + len(new) > self.capacity:
+                self._grow(start + len(new))
+
+            for offset, (_, vector) in enumerate(new):
+                self.vectors[start + offset] = vector
+            self.vectors.flush()
+
+            lines = "".join(f"{key}\n" for key, _ in new).encode("utf-8")
+            with open(self.keys_path, "ab") as f:
+                f.write(lines)
+            self._keys_offset += len(lines)
+            for offset, (key, _) in enumerate(new):
+                self.index[key] = start + offset
+            self.rows += len(new)
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by hash(model name + normalized record text)
+
+    Vectors are stored as float16 in both tiers. Callers should use the
+    float16-rounded vectors for fresh encodings too, so similarity scores do
+    not depend on whether a row was a cache hit.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_items: int = 100_000,
+        read_only: bool = False
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_items = max_memory_items
+        self.read_only = read_only
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._stores: Dict[str, _DiskStore] = {}
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """Content address of a record text for a given model"""
+        return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _store(self, model_name: str) -> Optional[_DiskStore]:
+        if self.cache_dir is None:
+            return None
+        store = self._stores.get(model_name)
+        if store is None:
+            slug = model_name.replace("/", "__")
+            try:
+                store = _DiskStore(self.cache_dir / slug, read_only=self.read_only)
+            except OSError as e:
+                logger.warning(f"Embedding disk cache unavailable: {e}")
+                self.cache_dir = None
+                return None
+            self._stores[model_name] = store
+        return store
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_name: str, keys: List[str]) -> Dict[int, np.ndarray]:
+        """Look up keys, returning {position: float16 vector} for the hits"""
+        found = {}
+        with self._lock:
+            store = self._store(model_name)
+            if store:
+                store.refresh()
+            for pos, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[pos] = vector
+                    continue
+
+                vector = store.get(key) if store else None
+                if vector is not None:
+                    self.disk_hits += 1
+                    self._remember(key, vector)
+                    found[pos] = vector
+                else:
+                    self.misses += 1
+        return found
+
+    def put_many(self, model_name: str, keys: List[str], vectors: np.ndarray):
+        """Insert freshly encoded vectors into both tiers"""
+        vectors = np.asarray(vectors, dtype=np.float16)
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+            store = self._store(model_name)
+            if store:
+                store.put_many(keys, vectors)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for analytics"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "disk_items": sum(len(s.index) for s in self._stores.values()),
+        }
+
+
+# Global instance
+_embedding_cache = None
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the process-wide embedding cache"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            cache_dir=settings.EMBEDDING_CACHE_DIR or None,
+            max_memory_items=settings.EMBEDDING_CACHE_MEMORY_ITEMS
+        )
+    return _embedding_cache
@@ -3,9 +3,27 @@ Deduplication Engine for Cleara
 Uses embeddings and cosine similarity with AI field resolution
 """
 
+import asyncio
+import json
+import logging
 import numpy as np
 from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.core.executor import ComputeQueueFull, get_compute_executor
+from app.ml.registry import get_model_registry
 from app.services.ai import get_ai_service
+from app.services.deduplication.candidates import normalize_embeddings, find_similar_pairs
+from app.services.deduplication.clustering import cluster_edges
+
+logger = logging.getLogger("cleara.dedupe")
+
+# First retry delay of a failed embedding batch, doubled per attempt
+RETRY_BACKOFF_SECONDS = 0.5
+
+
+class EmbeddingBatchFailed(Exception):
+    """An embedding batch still failed after its last retry"""
+
 
 class DeduplicationEngine:
     """
@@ -24,12 +42,16 @@ class DeduplicationEngine:
     async def detect_duplicates(
         self, 
         data: List[Dict[str, Any]], 
-        threshold: float = 0.85
+        threshold: float = 0.85,
+        tenant: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         1. Generate embeddings (using Gemini text-embedding-004)
-        2. Compute similarity
+        2. Compute similarity (on the compute executor, counted against tenant)
         3. Resolve conflicts via Gemini
+
+        Raises:
+            ComputeQueueFull: The tenant already has too many jobs in flight
         """
         try:
             if not data:
@@ -41,53 +63,165 @@ class DeduplicationEngine:
                 for r in data
             ]
             
-            # 2. Get all embeddings
-            embeddings = []
-            for text in texts:
-                # Check for AI availability implicitly via try/except
-                try:
-                    emb = await self.ai_service.get_embeddings(text)
-                    embeddings.append(emb)
-                except:
-                    # If embedding fails, return original data (abort dedupe)
-                    return data
+            # 2. Get all embeddings (batched provider calls, local fallback)
+            embeddings = await self.get_embeddings(texts)
                 
-            # 3. Find groups
-            unique_records = []
-            visited = [False] * len(data)
+            # 3. Find all groups first, off the event loop
+            executor = get_compute_executor()
+            async with executor.slot(tenant):
+                clusters = await executor.run_in_thread(self._find_groups, embeddings, threshold)
+            groups = [[data[idx] for idx in members] for members in clusters]
             
-            for i in range(len(data)):
-                if visited[i]:
-                    continue
-                    
-                group = [data[i]]
-                visited[i] = True
-                
-                for j in range(i + 1, len(data)):
-                    if visited[j]:
-                        continue
-                        
-                    similarity = self.cosine_similarity(embeddings[i], embeddings[j])
-                    if similarity >= threshold:
-                        group.append(data[j])
-                        visited[j] = True
-                
-                # 4. Resolve group into master record
-                if len(group) > 1:
-                    master = await self.resolve_conflicts(group)
-                    unique_records.append(master)
-                else:
-                    unique_records.append(group[0])
+            # 4. Resolve all duplicate groups into master records concurrently
+            unique_records = await self.resolve_groups(groups)
                     
             return unique_records
+        except ComputeQueueFull:
+            raise
         except Exception as e:
-            print(f"Deduplication failed: {e}")
+            logger.error(f"Deduplication failed: {e}")
             return data
 
+    @staticmethod
+    def _find_groups(embeddings: np.ndarray, threshold: float) -> List[List[int]]:
+        """Index groups of similar embeddings (runs on a compute thread)"""
+        matrix = normalize_embeddings(embeddings)
+        edges = find_similar_pairs(
+            matrix,
+            threshold,
+            ann_min_records=settings.DEDUP_ANN_MIN_RECORDS,
+            recall=settings.DEDUP_ANN_RECALL
+        )
+        return cluster_edges(len(embeddings), edges)
+
+    async def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in batches of settings.MAX_BATCH_SIZE with at most
+        settings.MAX_WORKERS provider calls in flight. Each batch is retried
+        settings.MAX_RETRIES times. If any batch still fails, the batches still
+        queued or retrying are cancelled and the whole input is encoded with
+        the local model instead: provider and local vectors live in different
+        spaces (and dimensions), so they cannot be mixed.
+        """
+        batch_size = max(1, settings.MAX_BATCH_SIZE)
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        semaphore = asyncio.Semaphore(max(1, settings.MAX_WORKERS))
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                for attempt in range(settings.MAX_RETRIES + 1):
+                    try:
+                        return await self.ai_service.get_embeddings_batch(batch)
+                    except Exception as e:
+                        if attempt == settings.MAX_RETRIES:
+                            # The result is all-or-nothing, so the other
+                            # batches are not worth their remaining calls and
+                            # backoff; cancelled before any queued batch can
+                            # take the freed worker
+                            for task in tasks:
+                                if task is not asyncio.current_task():
+                                    task.cancel()
+                            raise EmbeddingBatchFailed(
+                                f"Embedding batch failed after {attempt + 1} attempts: {e}"
+                            ) from e
+                        await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+        tasks = [asyncio.ensure_future(embed_batch(batch)) for batch in batches]
+        try:
+            results = await asyncio.gather(*tasks)
+        except EmbeddingBatchFailed as e:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.warning(f"{e}; encoding all {len(texts)} texts locally")
+            return await self._local_embeddings(texts)
+
+        return np.array([emb for result in results for emb in result], dtype=np.float32)
+
+    async def _local_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Encode texts with the shared local embedding model"""
+        model = get_model_registry().get(settings.EMBEDDING_MODEL)
+        if model is None:
+            raise RuntimeError("No embedding provider or local model available")
+        embeddings = await asyncio.to_thread(model.encode, texts, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    async def resolve_groups(self, groups: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Resolve every group into one record, keeping group order
+
+        - Single records pass through
+        - Groups without conflicting values are merged by rule, no LLM call
+        - Identical groups (same canonical JSON) are only sent once
+        - At most settings.MAX_WORKERS LLM calls run at a time
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.MAX_WORKERS))
+        memo: Dict[str, asyncio.Task] = {}
+
+        async def resolve(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.resolve_conflicts(group)
+                except Exception as e:
+                    logger.warning(f"Conflict resolution failed, using rule-based merge: {e}")
+                    return self.merge_records(group)
+
+        pending = []
+        for group in groups:
+            if len(group) == 1:
+                pending.append(group[0])
+            elif not self.has_conflicts(group):
+                pending.append(self.merge_records(group))
+            else:
+                key = json.dumps(
+                    sorted(json.dumps(record, sort_keys=True, default=str) for record in group)
+                )
+                if key not in memo:
+                    memo[key] = asyncio.ensure_future(resolve(group))
+                pending.append(memo[key])
+
+        if memo:
+            await asyncio.gather(*memo.values())
+
+        resolved = []
+        for item in pending:
+            if isinstance(item, asyncio.Future):
+                item = item.result()
+                # Memoized groups share one result; copy so callers can mutate records
+                if isinstance(item, dict):
+                    item = dict(item)
+            resolved.append(item)
+        return resolved
+
+    @staticmethod
+    def _is_empty(value: Any) -> bool:
+        return value is None or (isinstance(value, str) and value.strip() == "")
+
+    def has_conflicts(self, group: List[Dict[str, Any]]) -> bool:
+        """True if any field has two different non-empty values (ignoring case/whitespace)"""
+        values: Dict[str, set] = {}
+        for record in group:
+            for field, value in record.items():
+                if self._is_empty(value):
+                    continue
+                normalized = value.strip().lower() if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+                seen = values.setdefault(field, set())
+                seen.add(normalized)
+                if len(seen) > 1:
+                    return True
+        return False
+
+    def merge_records(self, group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Deterministic merge: the most complete non-null value per field"""
+        merged: Dict[str, Any] = {}
+        for record in group:
+            for field, value in record.items():
+                if field not in merged or self._is_empty(merged[field]):
+                    merged[field] = value
+                elif not self._is_empty(value) and len(str(value).strip()) > len(str(merged[field]).strip()):
+                    merged[field] = value
+        return merged
+
     async def resolve_conflicts(self, group: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Use Gemini to pick best fields from duplicates"""
-        import json
-        
         prompt = f"""
         Merge these duplicate records into one 'master' record.
         Pick the most complete and accurate values for each field.
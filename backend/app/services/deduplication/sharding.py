@@ -0,0 +1,205 @@
+"""
+Sharded Deduplication
+Splits large inputs into shards by blocking key and runs encoding + similarity
+search per shard in worker processes
+"""
+
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.executor import get_compute_executor
+from app.ml.registry import get_model_registry
+from app.services.deduplication.candidates import (
+    SimHashIndex,
+    find_bucket_pairs,
+    iter_similar_pairs,
+    normalize_embeddings,
+)
+
+# (bits, tables) shared by every shard's LSH index; None scores all pairs exactly
+LSHConfig = Optional[Tuple[int, int]]
+
+
+def stable_hash(value: str) -> int:
+    """Process-independent hash (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def assign_shards(shard_keys: List[str], num_shards: int) -> List[List[int]]:
+    """Positions per shard; records with the same shard key share a shard"""
+    shards: List[List[int]] = [[] for _ in range(num_shards)]
+    for pos, key in enumerate(shard_keys):
+        shards[stable_hash(key) % num_shards].append(pos)
+    return [positions for positions in shards if positions]
+
+
+def lsh_config(n: int, threshold: float, ann_min_records: int, recall: float) -> LSHConfig:
+    """LSH parameters for an input of n records, sized on the whole input"""
+    if n < ann_min_records:
+        return None
+    index = SimHashIndex(threshold=threshold, recall=recall)
+    index.configure(n)
+    return index.bits, index.num_tables
+
+
+def shard_pairs(
+    matrix: np.ndarray,
+    threshold: float,
+    lsh: LSHConfig,
+    recall: float
+) -> Tuple[List[Tuple[int, int, float]], Optional[np.ndarray]]:
+    """
+    Similar pairs inside one shard, plus the shard's LSH codes for the merge
+
+    Every shard hashes with the same planes (same seed, bits and tables), so
+    codes of different shards can be joined on bucket.
+    """
+    if lsh is None:
+        return list(iter_similar_pairs(matrix, threshold)), None
+
+    bits, tables = lsh
+    codes = SimHashIndex(threshold=threshold, recall=recall, bits=bits, num_tables=tables).signatures(matrix)
+    edges = find_bucket_pairs(matrix, codes, threshold)
+    return [(a, b, score) for (a, b), score in edges.items()], codes
+
+
+def cross_shard_pairs(
+    matrix: np.ndarray,
+    partition: np.ndarray,
+    threshold: float,
+    codes: Optional[np.ndarray]
+) -> Dict[Tuple[int, int], float]:
+    """
+    Similar pairs between records of different shards
+
+    With LSH codes, only buckets that span two or more shards are scored;
+    without (small inputs), cross-shard pairs are scored exactly in tiles.
+    """
+    if codes is None:
+        return {(i, j): score for i, j, score in iter_similar_pairs(matrix, threshold, partition=partition)}
+    return find_bucket_pairs(matrix, codes, threshold, partition)
+
+
+def process_shard(
+    texts: List[str],
+    cached: Dict[int, np.ndarray],
+    model_name: str,
+    threshold: float,
+    lsh: LSHConfig,
+    recall: float
+) -> Tuple[np.ndarray, List[Tuple[int, int, float]], Optional[np.ndarray]]:
+    """
+    Worker entry point: encode one shard and find its similar pairs
+
+    Args:
+        texts: Record texts of the shard
+        cached: Already known float16 embeddings by shard position
+        lsh: LSH parameters of the whole input (see lsh_config)
+
+    Returns:
+        (float16 embeddings for every shard row, [(a, b, score)] in shard
+        positions, per-table LSH codes of the shard rows or None)
+    """
+    model = get_model_registry().get(model_name)
+    if model is None:
+        raise RuntimeError(f"Embedding model {model_name} unavailable in worker")
+
+    missing = [pos for pos in range(len(texts)) if pos not in cached]
+    encoded = {}
+    if missing:
+        vectors = model.encode([texts[pos] for pos in missing], convert_to_numpy=True)
+        encoded = dict(zip(missing, np.asarray(vectors, dtype=np.float16)))
+
+    embeddings = np.stack([cached[pos] if pos in cached else encoded[pos] for pos in range(len(texts))])
+    matrix = normalize_embeddings(embeddings.astype(np.float32))
+    edges, codes = shard_pairs(matrix, threshold, lsh, recall)
+    return embeddings, edges, codes
+
+
+async def sharded_similar_pairs(
+    texts: List[str],
+    shard_keys: List[str],
+    cached: Dict[int, np.ndarray],
+    model_name: str,
+    threshold: float
+) -> Tuple[np.ndarray, Dict[Tuple[int, int], float]]:
+    """
+    Find similar pairs across a large input without blocking the event loop
+
+    Shards run in the shared compute process pool and return their LSH codes
+    along with their in-shard pairs. The merge joins those codes bucket by
+    bucket and scores only buckets that span shards, one group of tables per
+    compute thread (numpy releases the GIL).
+
+    Returns:
+        (float16 embeddings for every text, {(i, j): score} with i < j)
+    """
+    executor = get_compute_executor()
+    shards = assign_shards(shard_keys, max(1, settings.MAX_WORKERS))
+    lsh = lsh_config(len(texts), threshold, settings.DEDUP_ANN_MIN_RECORDS, settings.DEDUP_ANN_RECALL)
+
+    results = await asyncio.gather(*(
+        executor.run_in_process(
+            process_shard,
+            [texts[pos] for pos in positions],
+            {k: cached[pos] for k, pos in enumerate(positions) if pos in cached},
+            model_name,
+            threshold,
+            lsh,
+            settings.DEDUP_ANN_RECALL
+        )
+        for positions in shards
+    ))
+
+    embeddings, edges, partition, codes = merge_shards(len(texts), shards, results)
+
+    # Merge step: candidate edges between records of different shards
+    matrix = normalize_embeddings(embeddings.astype(np.float32))
+    if codes is None:
+        groups = [None]
+    else:
+        step = -(-len(codes) // executor.max_workers)
+        groups = [codes[t:t + step] for t in range(0, len(codes), step)]
+    for cross_edges in await asyncio.gather(*(
+        executor.run_in_thread(cross_shard_pairs, matrix, partition, threshold, group)
+        for group in groups
+    )):
+        edges.update(cross_edges)
+
+    return embeddings, edges
+
+
+def merge_shards(
+    n: int,
+    shards: List[List[int]],
+    results: List[Tuple[np.ndarray, List[Tuple[int, int, float]], Optional[np.ndarray]]]
+) -> Tuple[np.ndarray, Dict[Tuple[int, int], float], np.ndarray, Optional[np.ndarray]]:
+    """
+    Scatter per-shard results back to input positions
+
+    Returns:
+        (embeddings, in-shard edges {(i, j): score}, shard id per row,
+        LSH codes per table and row or None)
+    """
+    dim = results[0][0].shape[1]
+    embeddings = np.empty((n, dim), dtype=np.float16)
+    partition = np.empty(n, dtype=np.int32)
+    codes = None
+    edges: Dict[Tuple[int, int], float] = {}
+
+    for shard_id, (positions, (shard_embeddings, shard_edges, shard_codes)) in enumerate(zip(shards, results)):
+        embeddings[positions] = shard_embeddings
+        partition[positions] = shard_id
+        if shard_codes is not None:
+            if codes is None:
+                codes = np.empty((shard_codes.shape[0], n), dtype=shard_codes.dtype)
+            codes[:, positions] = shard_codes
+        # Positions are ascending, so a < b maps to positions[a] < positions[b]
+        for a, b, score in shard_edges:
+            edges[(positions[a], positions[b])] = score
+
+    return embeddings, edges, partition, codes
@@ -0,0 +1,470 @@
+"""
+Batch Cleaning Jobs
+Durable cleaning jobs, processed in checkpointed chunks by a background worker
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.executor import ComputeQueueFull, get_compute_executor
+from app.db.database import create_background_sessionmaker
+from app.db.models import CleaningJob, CleaningJobChunk
+from app.models.schemas import CleaningOptions
+from app.services.cleaning.cleaner import DataCleaner, clean_chunk
+
+logger = logging.getLogger("cleara.jobs")
+
+JOB_TYPE_BATCH_CLEAN = "batch_clean"
+
+
+async def submit_cleaning_job(
+    db: AsyncSession,
+    user_id: str,
+    records: List[Dict[str, Any]],
+    options: Dict[str, Any],
+    explain: bool = False,
+    tenant: Optional[str] = None
+) -> CleaningJob:
+    """
+    Persist a batch cleaning job with its input split into chunks
+
+    tenant is the submitter's compute queue tenant (see get_tenant_id); the
+    worker counts the job's chunks against it, like interactive requests.
+    """
+    chunk_size = max(1, settings.JOB_CHUNK_SIZE)
+    job = CleaningJob(
+        user_id=user_id,
+        tenant=tenant,
+        job_type=JOB_TYPE_BATCH_CLEAN,
+        status="pending",
+        options=options,
+        explain=explain,
+        total_records=len(records),
+        chunk_size=chunk_size,
+        total_chunks=-(-len(records) // chunk_size),
+        chunks_completed=0,
+        records_processed=0,
+        errors_fixed=0,
+        processing_time_ms=0.0,
+        cancel_requested=False
+    )
+    db.add(job)
+    await db.flush()
+
+    for chunk_index, start in enumerate(range(0, len(records), chunk_size)):
+        db.add(CleaningJobChunk(
+            job_id=job.id,
+            chunk_index=chunk_index,
+            status="pending",
+            input_data=records[start:start + chunk_size]
+        ))
+    await db.commit()
+
+    get_job_worker().notify()
+    return job
+
+
+async def get_cleaning_job(db: AsyncSession, job_id: str, user_id: str) -> Optional[CleaningJob]:
+    """A user's batch cleaning job, or None"""
+    result = await db.execute(
+        select(CleaningJob).where(
+            CleaningJob.id == job_id,
+            CleaningJob.user_id == user_id,
+            CleaningJob.job_type == JOB_TYPE_BATCH_CLEAN
+        )
+    )
+    return result.scalars().first()
+
+
+async def cancel_cleaning_job(db: AsyncSession, job: CleaningJob) -> CleaningJob:
+    """
+    Cancel a job
+
+    Pending jobs are cancelled immediately. Processing jobs are flagged and
+    stop at their next chunk boundary; finished jobs are left as they are.
+    """
+    if job.status == "pending":
+        job.status = "cancelled"
+        job.completed_at = datetime.utcnow()
+    elif job.status == "processing":
+        job.cancel_requested = True
+    await db.commit()
+    return job
+
+
+async def get_job_results(
+    db: AsyncSession,
+    job: CleaningJob,
+    offset: int = 0,
+    limit: int = 1000
+) -> List[Dict[str, Any]]:
+    """Cleaned records [offset, offset + limit) of a job, loading only the chunks they span"""
+    if limit <= 0 or offset >= job.total_records:
+        return []
+
+    first_chunk = offset // job.chunk_size
+    last_chunk = (offset + limit - 1) // job.chunk_size
+    result = await db.execute(
+        select(CleaningJobChunk.output_data)
+        .where(
+            CleaningJobChunk.job_id == job.id,
+            CleaningJobChunk.chunk_index >= first_chunk,
+            CleaningJobChunk.chunk_index <= last_chunk
+        )
+        .order_by(CleaningJobChunk.chunk_index)
+    )
+
+    records = [record for output in result.scalars() for record in (output or [])]
+    start = offset - first_chunk * job.chunk_size
+    return records[start:start + limit]
+
+
+def job_status(job: CleaningJob) -> Dict[str, Any]:
+    """Public view of a job's state and progress"""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "cancel_requested": bool(job.cancel_requested),
+        "total_records": job.total_records,
+        "records_processed": job.records_processed,
+        "changes_made": job.errors_fixed,
+        "progress": round(job.chunks_completed / job.total_chunks, 4) if job.total_chunks else 1.0,
+        "processing_time_ms": round(job.processing_time_ms or 0.0, 2),
+        "error": job.error_message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
+
+
+class JobLease:
+    """
+    A worker's hold on a processing job
+
+    heartbeat_at is the job's heartbeat as this worker last wrote it. Every
+    write the worker makes is conditioned on it, so once another worker
+    reclaims the job (which rewrites the heartbeat), the first one's writes
+    match nothing and it stops.
+    """
+
+    def __init__(self, job_id: str, heartbeat_at: datetime):
+        self.job_id = job_id
+        self.heartbeat_at = heartbeat_at
+        self.lost = False
+        # Serializes renewals with checkpoints, which both move the heartbeat
+        self.lock = asyncio.Lock()
+
+    def held(self):
+        """Where-clause matching the job only while this lease holds"""
+        return and_(
+            CleaningJob.id == self.job_id,
+            CleaningJob.status == "processing",
+            CleaningJob.heartbeat_at == self.heartbeat_at
+        )
+
+
+class CleaningJobWorker:
+    """
+    Background worker for batch cleaning jobs
+
+    The job tables are the queue. A job is claimed with a conditional
+    update, so several API processes can share it. The heartbeat doubles as
+    a lease: it is renewed every third of JOB_STALE_SECONDS while the job
+    runs, including while a chunk waits for or holds a compute slot, and a
+    processing job whose heartbeat is older than that is considered
+    abandoned and is claimed again. Every finished chunk is committed
+    together with the job's progress under the lease, so a restarted worker
+    resumes at the first pending chunk and a worker that lost its lease
+    writes nothing more.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float, stale_after: float):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._sessions = create_background_sessionmaker()
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        logger.info(f"Cleaning job worker started ({self.concurrency} slots)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers, e.g. after a submission"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                lease = await self._claim_next()
+            except Exception as e:
+                logger.warning(f"Claiming a cleaning job failed: {e}")
+                lease = None
+
+            if lease is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._process(lease)
+            except asyncio.CancelledError:
+                # Shutdown: the job stays "processing" and is resumed once stale
+                raise
+            except Exception as e:
+                logger.error(f"Cleaning job {lease.job_id} failed: {e}", exc_info=True)
+                await self._mark_failed(lease, str(e))
+
+    async def _claim_next(self) -> Optional[JobLease]:
+        """Atomically move the oldest runnable job to processing; a lease on it or None"""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.stale_after)
+
+        async with self._sessions() as db:
+            result = await db.execute(
+                select(CleaningJob.id, CleaningJob.status, CleaningJob.heartbeat_at)
+                .where(
+                    CleaningJob.job_type == JOB_TYPE_BATCH_CLEAN,
+                    or_(
+                        CleaningJob.status == "pending",
+                        and_(
+                            CleaningJob.status == "processing",
+                            or_(CleaningJob.heartbeat_at.is_(None), CleaningJob.heartbeat_at < stale_before)
+                        )
+                    )
+                )
+                .order_by(CleaningJob.created_at)
+                .limit(self.concurrency * 2)
+            )
+
+            for job_id, job_status_value, heartbeat_at in result.all():
+                # Only succeeds if nobody claimed or renewed the job meanwhile
+                heartbeat_unchanged = (
+                    CleaningJob.heartbeat_at.is_(None) if heartbeat_at is None
+                    else CleaningJob.heartbeat_at == heartbeat_at
+                )
+                claimed = await db.execute(
+                    update(CleaningJob)
+                    .where(
+                        CleaningJob.id == job_id,
+                        CleaningJob.status == job_status_value,
+                        heartbeat_unchanged
+                    )
+                    .values(status="processing", heartbeat_at=now)
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    return JobLease(job_id, now)
+        return None
+
+    async def _process(self, lease: JobLease):
+        keeper = asyncio.create_task(self._keep_lease(lease))
+        try:
+            await self._process_chunks(lease)
+        finally:
+            keeper.cancel()
+            await asyncio.gather(keeper, return_exceptions=True)
+
+    async def _keep_lease(self, lease: JobLease):
+        """Renew the lease until the job ends or the lease is lost"""
+        interval = self.stale_after / 3
+        while not lease.lost:
+            await asyncio.sleep(interval)
+            async with lease.lock:
+                if lease.lost:
+                    return
+                now = datetime.utcnow()
+                try:
+                    async with self._sessions() as db:
+                        renewed = await db.execute(
+                            update(CleaningJob).where(lease.held()).values(heartbeat_at=now)
+                        )
+                        await db.commit()
+                except Exception as e:
+                    # Try again next interval; the lease only lapses after stale_after
+                    logger.warning(f"Renewing the lease of cleaning job {lease.job_id} failed: {e}")
+                    continue
+                if renewed.rowcount == 1:
+                    lease.heartbeat_at = now
+                else:
+                    lease.lost = True
+
+    async def _process_chunks(self, lease: JobLease):
+        job_id = lease.job_id
+        async with self._sessions() as db:
+            job = await db.get(CleaningJob, job_id)
+            if job.started_at is None:
+                job.started_at = datetime.utcnow()
+                await db.commit()
+
+            cleaner = DataCleaner(options=CleaningOptions(**(job.options or {})))
+            explain = bool(job.explain)
+            # One phone region for the whole job, from its first chunk (also on resume)
+            first_records = await db.scalar(
+                select(CleaningJobChunk.input_data)
+                .where(CleaningJobChunk.job_id == job_id, CleaningJobChunk.chunk_index == 0)
+            )
+            phone_region = cleaner.infer_phone_region(first_records or [])
+            # Jobs submitted before tenants were recorded count as anonymous
+            tenant = job.tenant
+            result = await db.execute(
+                select(CleaningJobChunk.id)
+                .where(CleaningJobChunk.job_id == job_id, CleaningJobChunk.status == "pending")
+                .order_by(CleaningJobChunk.chunk_index)
+            )
+            chunk_ids = list(result.scalars())
+
+            for chunk_id in chunk_ids:
+                if lease.lost:
+                    logger.warning(f"Cleaning job {job_id} was reclaimed by another worker")
+                    return
+                # Pick up cancellations made through the API
+                cancel_requested = await db.scalar(
+                    select(CleaningJob.cancel_requested).where(CleaningJob.id == job_id)
+                )
+                if cancel_requested:
+                    if await self._finish(db, lease, "cancelled"):
+                        logger.info(f"Cleaning job {job_id} cancelled")
+                    return
+
+                records = await db.scalar(
+                    select(CleaningJobChunk.input_data).where(CleaningJobChunk.id == chunk_id)
+                )
+                start_time = time.time()
+                results = await self._clean(cleaner, records or [], explain, phone_region, tenant, lease)
+                if results is None:
+                    continue
+                changes_made = results.change_count
+
+                # Checkpoint: chunk output and job progress commit together,
+                # and only while this worker still holds the job
+                async with lease.lock:
+                    if lease.lost:
+                        continue
+                    now = datetime.utcnow()
+                    progressed = await db.execute(
+                        update(CleaningJob)
+                        .where(lease.held())
+                        .values(
+                            chunks_completed=CleaningJob.chunks_completed + 1,
+                            records_processed=CleaningJob.records_processed + len(results),
+                            errors_fixed=CleaningJob.errors_fixed + changes_made,
+                            processing_time_ms=CleaningJob.processing_time_ms + (time.time() - start_time) * 1000,
+                            heartbeat_at=now
+                        )
+                    )
+                    if progressed.rowcount != 1:
+                        await db.rollback()
+                        lease.lost = True
+                        continue
+                    marked = await db.execute(
+                        update(CleaningJobChunk)
+                        .where(CleaningJobChunk.id == chunk_id, CleaningJobChunk.status == "pending")
+                        .values(
+                            status="completed",
+                            output_data=list(results.iter_records()),
+                            changes_made=changes_made,
+                            completed_at=now
+                        )
+                    )
+                    if marked.rowcount != 1:
+                        # Already checkpointed; never count a chunk twice
+                        await db.rollback()
+                        continue
+                    await db.commit()
+                    lease.heartbeat_at = now
+
+            if lease.lost:
+                logger.warning(f"Cleaning job {job_id} was reclaimed by another worker")
+            elif await self._finish(db, lease, "completed"):
+                logger.info(f"Cleaning job {job_id} completed")
+
+    async def _finish(self, db: AsyncSession, lease: JobLease, status: str) -> bool:
+        """Move the job to a final status; False if the lease was lost"""
+        async with lease.lock:
+            finished = await db.execute(
+                update(CleaningJob)
+                .where(lease.held())
+                .values(status=status, completed_at=datetime.utcnow())
+            )
+            await db.commit()
+            if finished.rowcount != 1:
+                lease.lost = True
+            return not lease.lost
+
+    async def _clean(
+        self,
+        cleaner: DataCleaner,
+        records: List[Dict[str, Any]],
+        explain: bool,
+        phone_region: str,
+        tenant: Optional[str],
+        lease: JobLease
+    ):
+        """
+        Clean one chunk on the compute executor; None if the lease was lost meanwhile
+
+        The chunk counts against the submitter's tenant like any request of
+        theirs, but never takes the tenant's last free slot: interactive
+        requests keep that one, and the chunk waits instead.
+        """
+        executor = get_compute_executor()
+        while not lease.lost:
+            try:
+                async with executor.slot(tenant, reserve=1):
+                    # Pure-Python cleaning holds the GIL, so it runs in the process pool
+                    results, _ = await executor.run_in_process(
+                        clean_chunk, records, cleaner.options, explain, phone_region
+                    )
+                # Worker results come back without originals
+                results.originals = records
+                return results
+            except ComputeQueueFull:
+                await asyncio.sleep(self.poll_interval)
+        return None
+
+    async def _mark_failed(self, lease: JobLease, error: str):
+        try:
+            async with self._sessions() as db:
+                await db.execute(
+                    update(CleaningJob)
+                    .where(lease.held())
+                    .values(status="failed", error_message=error, completed_at=datetime.utcnow())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Could not mark cleaning job {lease.job_id} as failed: {e}")
+
+
+# Global instance
+_job_worker = None
+
+def get_job_worker() -> CleaningJobWorker:
+    """Get or create the process-wide cleaning job worker"""
+    global _job_worker
+    if _job_worker is None:
+        _job_worker = CleaningJobWorker(
+            concurrency=settings.JOB_WORKERS,
+            poll_interval=settings.JOB_POLL_INTERVAL,
+            stale_after=settings.JOB_STALE_SECONDS
+        )
+    return _job_worker
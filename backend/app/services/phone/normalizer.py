@@ -0,0 +1,170 @@
+"""
+Phone Number Normalization
+Shared libphonenumber parsing with per-region caching and region inference
+"""
+
+import re
+from itertools import islice
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import phonenumbers
+
+
+DEFAULT_REGION = "US"
+
+# Values sampled per dataset when inferring its default region
+REGION_SAMPLE_SIZE = 200
+
+# Already in E.164: "+" and up to 15 digits, no separators
+_E164_RE = re.compile(r'^\+[1-9]\d{6,14}$')
+
+# Numbers written only with digits and these separators share a cache entry
+_SEPARATORS_RE = re.compile(r'[\s\-.()/]')
+_PLAIN_NUMBER_RE = re.compile(r'^\+?\d*$')
+
+
+class PhoneInfo(NamedTuple):
+    """Outcome of parsing one phone number"""
+    valid: bool
+    possible: bool = False
+    e164: Optional[str] = None
+    international: Optional[str] = None
+    region: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _cache_key(value: str) -> str:
+    """
+    Canonical form for caching: "+"/digits only when the value is just digits
+    and separators (parses the same either way), else the value itself
+    """
+    stripped = _SEPARATORS_RE.sub('', value)
+    return stripped if _PLAIN_NUMBER_RE.match(stripped) else value
+
+
+class PhoneNormalizer:
+    """
+    Phone number parsing shared by cleaning and validation
+
+    Parsed results are cached per (number, default region). Numbers with an
+    explicit country code ("+...") don't depend on the default region and
+    share one entry across regions. The cache is a plain dict cleared when
+    full, so it is safe to share across compute threads.
+    """
+
+    def __init__(self, cache_size: int = 100_000):
+        self.cache_size = cache_size
+        self._cache: Dict[Tuple[str, Optional[str]], PhoneInfo] = {}
+
+    def parse(self, value: Any, region: str = DEFAULT_REGION) -> PhoneInfo:
+        """Parse a number, using region for numbers written without a country code"""
+        key = _cache_key(str(value))
+        return self._parse_key(key, None if key.startswith('+') else region)
+
+    def _parse_key(self, key: str, region: Optional[str]) -> PhoneInfo:
+        """parse for a value already in its cache key form"""
+        cached = self._cache.get((key, region))
+        if cached is not None:
+            return cached
+
+        info = self._parse(key, region)
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[(key, region)] = info
+        return info
+
+    def _parse(self, number: str, region: Optional[str]) -> PhoneInfo:
+        try:
+            parsed = phonenumbers.parse(number, region)
+        except phonenumbers.NumberParseException as e:
+            return PhoneInfo(valid=False, error=str(e))
+
+        # Exactly possible (not just "possible as a local number")
+        possible = phonenumbers.is_possible_number_with_reason(parsed) == phonenumbers.ValidationResult.IS_POSSIBLE
+        if not phonenumbers.is_valid_number(parsed):
+            return PhoneInfo(valid=False, possible=possible)
+
+        return PhoneInfo(
+            valid=True,
+            possible=possible,
+            e164=phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164),
+            international=phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.INTERNATIONAL),
+            region=phonenumbers.region_code_for_number(parsed)
+        )
+
+    def infer_region(
+        self,
+        values: Iterable[Any],
+        default: str = DEFAULT_REGION,
+        sample_size: int = REGION_SAMPLE_SIZE
+    ) -> str:
+        """
+        Most likely default region of a dataset's phone numbers
+
+        Numbers written with a country code nominate their regions; the
+        candidate under which most of the sampled national-format numbers
+        have a possible length wins, with ties going to default. (Possible
+        rather than valid, so placeholder ranges such as US 555 numbers
+        don't push a dataset abroad.)
+        """
+        sample = list(islice(
+            (value for value in values if isinstance(value, str) and value.strip()),
+            sample_size
+        ))
+
+        candidates = {default}
+        national = []
+        for value in sample:
+            if value.lstrip().startswith('+'):
+                info = self.parse(value)
+                if info.valid and info.region:
+                    # The country code's main region (GB, not GG, for +44)
+                    country_code = phonenumbers.country_code_for_region(info.region)
+                    candidates.add(phonenumbers.region_code_for_country_code(country_code))
+            else:
+                national.append(value)
+
+        if len(candidates) == 1 or not national:
+            return default
+
+        def score(region: str) -> Tuple[int, bool]:
+            return sum(self.parse(value, region).possible for value in national), region == default
+
+        return max(sorted(candidates), key=score)
+
+    def parse_batch(self, values: List[Any], region: Optional[str] = None) -> List[PhoneInfo]:
+        """
+        Parse a column of numbers; region is inferred from the column when not given
+
+        Values already in E.164 are their own cache key and need no region,
+        so they skip the separator stripping (they are still validated).
+        """
+        if region is None:
+            region = self.infer_region(values)
+        parse, parse_key, e164 = self.parse, self._parse_key, _E164_RE.match
+        return [
+            parse_key(value, None) if isinstance(value, str) and e164(value) else parse(value, region)
+            for value in values
+        ]
+
+    def to_e164(self, values: List[Any], region: Optional[str] = None) -> List[Optional[str]]:
+        """E.164 form of a column of numbers, None where a value is not a valid number"""
+        if region is None:
+            region = self.infer_region(values)
+
+        present = [idx for idx, value in enumerate(values) if value is not None and value != ""]
+        normalized: List[Optional[str]] = [None] * len(values)
+        for idx, info in zip(present, self.parse_batch([values[idx] for idx in present], region)):
+            normalized[idx] = info.e164
+        return normalized
+
+
+# Global instance
+_phone_normalizer = None
+
+def get_phone_normalizer() -> PhoneNormalizer:
+    """Get or create the process-wide phone normalizer"""
+    global _phone_normalizer
+    if _phone_normalizer is None:
+        _phone_normalizer = PhoneNormalizer()
+    return _phone_normalizer
@@ -6,6 +6,8 @@ Sanitizes and normalizes input before AI processing
 import re
 from typing import Dict, Any, List, Optional
 
+from app.services.schema_detection.field_names import get_field_name_index
+
 
 class Sanitizer:
     """
@@ -17,30 +19,27 @@ class Sanitizer:
     def normalize_keys(data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Key standardization (fname -> first_name, etc.)
-        Standardizes common variations of keys to a canonical format.
+        Standardizes known variations of keys to the canonical fields of
+        FIELD_SYNONYMS, the same names schema detection uses. Only exact
+        matches are renamed: keys that merely contain or resemble a
+        variation (is_mobile_user, hotel_name, emial) are kept as they are.
+        A key is never renamed onto a name the record already has, or that
+        an earlier key was renamed to, so distinct columns stay distinct
+        (phone and mobile both survive).
         """
-        mapping = {
-            "fname": "first_name",
-            "lname": "last_name",
-            "name": "full_name",
-            "addr": "address",
-            "loc": "location",
-            "ph": "phone",
-            "tel": "phone",
-            "cell": "phone",
-            "mob": "phone",
-            "mail": "email",
-            "dob": "date_of_birth",
-            "bday": "birthday",
-            "zip": "postal_code",
-            "postcode": "postal_code",
-        }
-        
+        index = get_field_name_index()
+        clean_keys = [key.lower().strip().replace(" ", "_").replace("-", "_") for key in data]
+        taken = set(clean_keys)
+
         normalized = {}
-        for key, value in data.items():
-            clean_key = key.lower().strip().replace(" ", "_").replace("-", "_")
-            # Map common variations to canonical keys
-            mapped_key = mapping.get(clean_key, clean_key)
+        for clean_key, value in zip(clean_keys, data.values()):
+            # Map known variations to the canonical fields of schema detection
+            mapped_key = index.lookup(clean_key) or clean_key
+            if mapped_key != clean_key:
+                if mapped_key in taken:
+                    mapped_key = clean_key
+                else:
+                    taken.add(mapped_key)
             normalized[mapped_key] = value
             
         return normalized
@@ -0,0 +1,203 @@
+"""
+Schema Fingerprint Cache
+Per-tenant cache of detected schemas, keyed by the layout of the data
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models import SchemaCacheEntry
+from app.services.schema_detection.classifier import classify_value
+
+logger = logging.getLogger("cleara.schema")
+
+# Leading records whose value types go into the fingerprint
+FINGERPRINT_SAMPLE_RECORDS = 3
+
+# Part of every fingerprint: bump it when detection output changes, so old entries stop matching
+# (2: the detector caches only its field mapping and types)
+SCHEMA_CACHE_VERSION = 2
+
+ANONYMOUS_TENANT = "anonymous"
+
+CacheKey = Tuple[str, str]
+
+
+def schema_fingerprint(records: List[Dict[str, Any]], kind: str, options: Iterable[Any] = ()) -> str:
+    """
+    Fingerprint of a dataset's layout
+
+    Hashes the set of column names over all records, plus the type vote of
+    every column's value in the first FINGERPRINT_SAMPLE_RECORDS records. So
+    a new day's export with the same layout matches, while one whose dates
+    turned into free text does not. kind and options keep results of
+    different detectors and detector settings apart.
+    """
+    columns = set()
+    for record in records:
+        columns.update(record)
+    columns = sorted(columns)
+
+    sample = [
+        [None if record.get(column) is None else classify_value(str(record[column]).strip()) for column in columns]
+        for record in records[:FINGERPRINT_SAMPLE_RECORDS]
+    ]
+    payload = json.dumps([SCHEMA_CACHE_VERSION, kind, list(options), columns, sample])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SchemaCache:
+    """
+    Two-tier cache of detected schemas, scoped per tenant
+
+    An in-process LRU sits in front of the schema_cache table, so entries
+    survive restarts and are shared between API processes. The cache is
+    best effort: database errors are logged and cost only the DB tier.
+    Values are JSON-able dicts, deep-copied on the way in and out.
+    """
+
+    def __init__(self, max_memory_items: int = 10_000, persist: bool = True, revalidate: bool = False):
+        self.max_memory_items = max_memory_items
+        self.persist = persist
+        self.revalidate = revalidate
+        self._memory: "OrderedDict[CacheKey, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sessions = None
+        # Background revalidations in flight, one per entry
+        self._refreshing: Dict[CacheKey, asyncio.Task] = {}
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(tenant: Optional[str], fingerprint: str) -> CacheKey:
+        return tenant or ANONYMOUS_TENANT, fingerprint
+
+    async def get(self, tenant: Optional[str], fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Cached schema for a tenant's layout, or None"""
+        key = self._key(tenant, fingerprint)
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(value)
+
+        value = await self._load(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._remember(key, value)
+        self.db_hits += 1
+        return copy.deepcopy(value)
+
+    async def put(self, tenant: Optional[str], fingerprint: str, value: Dict[str, Any]):
+        """Store a schema in both tiers"""
+        key = self._key(tenant, fingerprint)
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        await self._store(key, value)
+
+    def schedule_revalidation(
+        self,
+        tenant: Optional[str],
+        fingerprint: str,
+        detect: Callable[[], Awaitable[Dict[str, Any]]]
+    ):
+        """
+        With revalidation enabled, re-run detect in the background and store
+        its result, so the next hit serves a fresh schema
+        """
+        key = self._key(tenant, fingerprint)
+        if not self.revalidate or key in self._refreshing:
+            return
+        task = asyncio.create_task(self._revalidate(key, detect))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _revalidate(self, key: CacheKey, detect: Callable[[], Awaitable[Dict[str, Any]]]):
+        try:
+            value = await detect()
+        except Exception as e:
+            logger.warning(f"Schema revalidation failed: {e}")
+            return
+        self._remember(key, value)
+        await self._store(key, value)
+
+    def _remember(self, key: CacheKey, value: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _session_factory(self):
+        if self._sessions is None:
+            # Imported here: compute workers import the detector (and so this
+            # module) but never touch the database
+            from app.db.database import create_background_sessionmaker
+            self._sessions = create_background_sessionmaker()
+        return self._sessions
+
+    async def _load(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        if not self.persist:
+            return None
+        tenant, fingerprint = key
+        try:
+            async with self._session_factory()() as db:
+                result = await db.execute(
+                    select(SchemaCacheEntry.result).where(
+                        SchemaCacheEntry.tenant == tenant,
+                        SchemaCacheEntry.fingerprint == fingerprint
+                    )
+                )
+                return result.scalars().first()
+        except Exception as e:
+            logger.warning(f"Schema cache lookup failed: {e}")
+            return None
+
+    async def _store(self, key: CacheKey, value: Dict[str, Any]):
+        if not self.persist:
+            return
+        tenant, fingerprint = key
+        try:
+            async with self._session_factory()() as db:
+                result = await db.execute(
+                    select(SchemaCacheEntry).where(
+                        SchemaCacheEntry.tenant == tenant,
+                        SchemaCacheEntry.fingerprint == fingerprint
+                    )
+                )
+                entry = result.scalars().first()
+                if entry is None:
+                    db.add(SchemaCacheEntry(tenant=tenant, fingerprint=fingerprint, result=value))
+                else:
+                    entry.result = value
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Schema cache write failed: {e}")
+
+
+# Global instance
+_schema_cache = None
+
+def get_schema_cache() -> SchemaCache:
+    """Get or create the process-wide schema cache"""
+    global _schema_cache
+    if _schema_cache is None:
+        _schema_cache = SchemaCache(
+            max_memory_items=settings.SCHEMA_CACHE_MEMORY_ITEMS,
+            persist=settings.SCHEMA_CACHE_PERSIST,
+            revalidate=settings.SCHEMA_CACHE_REVALIDATE
+        )
+    return _schema_cache
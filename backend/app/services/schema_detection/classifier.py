@@ -0,0 +1,104 @@
+"""
+Value Type Classifier
+One precompiled regex scan decides a value's type vote
+"""
+
+import re
+
+
+# Per-type checks, in precedence order (used as-is for non-ASCII values)
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_SEPARATORS_RE = re.compile(r'[\s\-\(\)\+\.]')
+_URL_RE = re.compile(r'^https?://', re.IGNORECASE)
+_DATE_RE = re.compile(
+    r'^\d{4}-\d{2}-\d{2}'  # YYYY-MM-DD
+    r'|^\d{2}/\d{2}/\d{4}'  # MM/DD/YYYY or DD/MM/YYYY
+    r'|^\d{4}/\d{2}/\d{2}'  # YYYY/MM/DD
+)
+_BOOLEAN_VALUES = frozenset(['true', 'false', 'yes', 'no', '1', '0', 't', 'f', 'y', 'n'])
+
+# All checks as one alternation. Branches are tried left to right, so the
+# first type (in precedence order) that matches names the group. Valid for
+# ASCII input, where \d is [0-9] and lower() is case-insensitive matching.
+# The number branch only admits float()'s alphabet; float() has the last word.
+_COMBINED_RE = re.compile(
+    r'(?P<email>[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z)'
+    r'|(?P<phone>[\s\-()+.]*(?:\d[\s\-()+.]*){7,15}\Z)'
+    r'|(?P<url>https?://)'
+    r'|(?P<date>\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{4}/\d{2}/\d{2})'
+    r'|(?P<boolean>(?:true|false|yes|no|1|0|t|f|y|n)\Z)'
+    r'|(?P<number>[+-]?(?:[\d._]+(?:e[+-]?[\d_]+)?|inf|infinity|nan)\Z)',
+    re.IGNORECASE
+)
+
+
+def is_email(value: str) -> bool:
+    """Check if value looks like an email"""
+    return _EMAIL_RE.match(value) is not None
+
+
+def is_phone(value: str) -> bool:
+    """Check if value looks like a phone number"""
+    # Remove common separators
+    digits = _PHONE_SEPARATORS_RE.sub('', value)
+    return digits.isdigit() and 7 <= len(digits) <= 15
+
+
+def is_url(value: str) -> bool:
+    """Check if value looks like a URL"""
+    return _URL_RE.match(value) is not None
+
+
+def is_date(value: str) -> bool:
+    """Check if value looks like a date"""
+    return _DATE_RE.match(value) is not None
+
+
+def is_boolean(value: str) -> bool:
+    """Check if value looks like a boolean"""
+    return value.lower() in _BOOLEAN_VALUES
+
+
+def is_number(value: str) -> bool:
+    """Check if value is a number"""
+    try:
+        float(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _number_type(value: str) -> str:
+    return 'float' if '.' in value else 'integer'
+
+
+def classify_value(value: str) -> str:
+    """
+    Type vote of one stripped value
+
+    Precedence: email > phone > url > date > boolean > number > string
+    (so "2024-01-01" still counts as a phone number: its digits come first).
+    """
+    if value.isascii():
+        match = _COMBINED_RE.match(value)
+        if match is None:
+            return 'string'
+        kind = match.lastgroup
+        if kind == 'number':
+            return _number_type(value) if is_number(value) else 'string'
+        return kind
+
+    # Rare non-ASCII values: Unicode digits/whitespace, so check type by type
+    if is_email(value):
+        return 'email'
+    elif is_phone(value):
+        return 'phone'
+    elif is_url(value):
+        return 'url'
+    elif is_date(value):
+        return 'date'
+    elif is_boolean(value):
+        return 'boolean'
+    elif is_number(value):
+        return _number_type(value)
+    return 'string'
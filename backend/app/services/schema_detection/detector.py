@@ -3,74 +3,202 @@ Schema Detection Service
 AI-powered schema inference and field mapping
 """
 
-from typing import Dict, Any, List, Set
-from collections import defaultdict, Counter
-import re
+from typing import Dict, Any, Iterable, List, Optional, Set
+from collections import Counter
+import asyncio
 
+from app.core.config import settings
+from app.core.executor import get_compute_executor
 from app.models.schemas import FieldSchema
+from app.services.schema_detection.cache import get_schema_cache, schema_fingerprint
+from app.services.schema_detection.classifier import classify_value
+from app.services.schema_detection.field_names import get_field_name_index
+from app.services.schema_detection.profiler import ColumnSketch, SchemaProfiler
 
 
 class SchemaDetector:
     """AI-powered schema detection service"""
     
-    def __init__(self, suggest_types: bool = True, suggest_constraints: bool = True):
+    def __init__(
+        self,
+        suggest_types: bool = True,
+        suggest_constraints: bool = True,
+        settle_votes: Optional[int] = None
+    ):
         self.suggest_types = suggest_types
         self.suggest_constraints = suggest_constraints
+        # Stop classifying a column once its type is settled (0 classifies every value)
+        self.settle_votes = settings.SCHEMA_TYPE_SETTLE_VOTES if settle_votes is None else settle_votes
         
-        # Common field name variations
-        self.field_synonyms = {
-            'email': ['email', 'email_address', 'e_mail', 'user_email', 'contact_email', 'mail'],
-            'name': ['name', 'full_name', 'fullname', 'user_name', 'username', 'display_name'],
-            'first_name': ['first_name', 'firstname', 'fname', 'given_name'],
-            'last_name': ['last_name', 'lastname', 'lname', 'surname', 'family_name'],
-            'phone': ['phone', 'phone_number', 'telephone', 'mobile', 'cell', 'contact_number'],
-            'address': ['address', 'street_address', 'street', 'location'],
-            'city': ['city', 'town', 'municipality'],
-            'state': ['state', 'province', 'region'],
-            'country': ['country', 'nation'],
-            'zip': ['zip', 'zipcode', 'postal_code', 'postcode'],
-            'company': ['company', 'organization', 'org', 'employer', 'company_name'],
-            'title': ['title', 'job_title', 'position', 'role'],
-            'date': ['date', 'created_at', 'updated_at', 'timestamp'],
-            'id': ['id', 'user_id', 'customer_id', 'record_id', 'identifier'],
-        }
+        # Fuzzy field-name resolution, for grouping columns only (never to rename keys)
+        self.field_names = get_field_name_index()
     
-    async def detect_schema(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def detect_schema(
+        self,
+        data: List[Dict[str, Any]],
+        tenant: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Detect schema from sample data
         
+        Records are profiled in one pass into mergeable per-column sketches.
+        Large inputs are split into one chunk per worker, profiled in the
+        shared compute process pool, and the chunk profiles merged in order.
+        
+        A tenant's data with a layout seen before (same column names, same
+        value types in the leading records) reuses the cached field mapping
+        and column types. Examples, nullability and constraints always come
+        from the current data; cached types only spare the classification of
+        most values (a column whose sampled values disagree is classified in
+        full, see SchemaProfiler).
+        
         Args:
             data: Sample records
+            tenant: Caller whose compute queue and schema cache this uses
             
         Returns:
             Dict with detected fields and mapping
+            
+        Raises:
+            ComputeQueueFull: The tenant already has too many jobs in flight
         """
-        # Collect all field names
-        all_fields = defaultdict(list)
+        if not settings.SCHEMA_CACHE_ENABLED or not data:
+            return await self._detect(data, tenant)
         
-        for record in data:
-            for field, value in record.items():
-                all_fields[field].append(value)
+        cache = get_schema_cache()
+        fingerprint = schema_fingerprint(
+            data, "detector", (self.suggest_types, self.suggest_constraints, self.settle_votes)
+        )
+        cached = await cache.get(tenant, fingerprint)
+        if cached is not None:
+            if cache.revalidate:
+                # The background task holds a bounded sample, not the upload
+                sample = self._revalidation_sample(data)
+                cache.schedule_revalidation(
+                    tenant, fingerprint, lambda: self._detect_for_cache(sample)
+                )
+            return await self._detect(data, tenant, known=cached)
         
-        # Group similar field names
-        field_groups = self._group_similar_fields(list(all_fields.keys()))
+        result = await self._detect(data, tenant)
+        await cache.put(tenant, fingerprint, self._schema_for_cache(result))
+        return result
+    
+    async def _detect(
+        self,
+        data: List[Dict[str, Any]],
+        tenant: Optional[str],
+        known: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Detect the schema; known is a cached mapping and types to start from"""
+        executor = get_compute_executor()
+        mapping = known['mapping'] if known else None
+        settled_types = self._settled_types(known) if known else None
+        async with executor.slot(tenant):
+            if len(data) <= settings.COMPUTE_INLINE_MAX_RECORDS:
+                return await executor.run_in_thread(self._detect_schema_sync, data, mapping, settled_types)
+            
+            chunk_size = max(
+                settings.COMPUTE_INLINE_MAX_RECORDS,
+                -(-len(data) // executor.max_workers)
+            )
+            profiles = await asyncio.gather(*(
+                executor.run_in_process(self._profile, data[start:start + chunk_size], settled_types)
+                for start in range(0, len(data), chunk_size)
+            ))
+            
+            profile = profiles[0]
+            for chunk_profile in profiles[1:]:
+                profile.merge(chunk_profile)
+            return self._schema_from_profile(profile, mapping)
+    
+    @staticmethod
+    def _revalidation_sample(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Evenly spaced records, at most SCHEMA_CACHE_REVALIDATE_SAMPLE of them"""
+        step = -(-len(data) // max(1, settings.SCHEMA_CACHE_REVALIDATE_SAMPLE))
+        return data[::step]
+    
+    async def _detect_for_cache(self, sample: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Background re-detection of a revalidation sample
+
+        Runs on one compute thread outside the tenant's slot: a cache hit
+        must not use up a slot the caller's next request may need. The
+        sample is bounded, and the cache runs one revalidation per entry.
+        """
+        executor = get_compute_executor()
+        result = await executor.run_in_thread(self._detect_schema_sync, sample, None, None)
+        return self._schema_for_cache(result)
+    
+    @staticmethod
+    def _schema_for_cache(result: Dict[str, Any]) -> Dict[str, Any]:
+        """What is cached of a result: the field mapping and each field's type"""
+        return {
+            'mapping': result['mapping'],
+            'types': {field.name: field.type for field in result['fields']}
+        }
+    
+    @staticmethod
+    def _settled_types(known: Dict[str, Any]) -> Dict[str, str]:
+        """Cached type of every input field, for the profiler to start from"""
+        types = known['types']
+        return {
+            field: types[name]
+            for field, name in known['mapping'].items()
+            if types.get(name) not in (None, 'unknown')
+        }
+    
+    def _detect_schema_sync(
+        self,
+        data: Iterable[Dict[str, Any]],
+        mapping: Optional[Dict[str, str]] = None,
+        settled_types: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Schema detection proper (no I/O, safe to run in a worker process)"""
+        return self._schema_from_profile(self._profile(data, settled_types), mapping)
+    
+    def _profile(
+        self,
+        data: Iterable[Dict[str, Any]],
+        settled_types: Optional[Dict[str, str]] = None
+    ) -> SchemaProfiler:
+        """One pass over the records into per-field sketches"""
+        return SchemaProfiler(
+            classify_value, settle_votes=self.settle_votes, settled_types=settled_types
+        ).update(data)
+    
+    def _schema_from_profile(
+        self,
+        profile: SchemaProfiler,
+        mapping: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        # Group similar field names (in the cached order, when the mapping is known)
+        if mapping is not None:
+            field_groups = {}
+            for field, standard_name in mapping.items():
+                if field in profile.columns:
+                    field_groups.setdefault(standard_name, []).append(field)
+            for field in profile.columns:
+                if field not in mapping:
+                    field_groups.setdefault(field.lower(), []).append(field)
+        else:
+            field_groups = self._group_similar_fields(list(profile.columns.keys()))
         
         # Detect schema for each group
         detected_fields = []
         field_mapping = {}
         
         for standard_name, variations in field_groups.items():
-            # Collect all values for this field group
-            all_values = []
+            # Combine the sketches of all fields in the group
+            sketch = ColumnSketch()
             for variation in variations:
-                all_values.extend(all_fields[variation])
+                sketch.merge(profile.columns[variation])
                 field_mapping[variation] = standard_name
             
             # Detect field schema
             field_schema = self._detect_field_schema(
                 name=standard_name,
                 variations=variations,
-                values=all_values
+                sketch=sketch
             )
             
             detected_fields.append(field_schema)
@@ -86,43 +214,19 @@ class SchemaDetector:
     
     def _group_similar_fields(self, field_names: List[str]) -> Dict[str, List[str]]:
         """Group similar field names together"""
-        groups = {}
-        assigned = set()
-        
-        # First, match against known synonyms
-        for standard_name, synonyms in self.field_synonyms.items():
-            matching_fields = []
-            for field in field_names:
-                normalized = field.lower().replace('_', '').replace('-', '')
-                for synonym in synonyms:
-                    normalized_synonym = synonym.lower().replace('_', '').replace('-', '')
-                    if normalized == normalized_synonym or normalized in normalized_synonym or normalized_synonym in normalized:
-                        matching_fields.append(field)
-                        assigned.add(field)
-                        break
-            
-            if matching_fields:
-                groups[standard_name] = matching_fields
-        
-        # Add unmatched fields as their own groups
-        for field in field_names:
-            if field not in assigned:
-                groups[field.lower()] = [field]
-        
-        return groups
+        return self.field_names.group(field_names)
     
     def _detect_field_schema(
         self,
         name: str,
         variations: List[str],
-        values: List[Any]
+        sketch: ColumnSketch
     ) -> FieldSchema:
         """Detect schema for a single field"""
-        # Filter out None values for type detection
-        non_null_values = [v for v in values if v is not None]
-        nullable = len(non_null_values) < len(values)
+        # Null values don't take part in type detection
+        nullable = sketch.null_count > 0
         
-        if not non_null_values:
+        if sketch.non_null_count == 0:
             return FieldSchema(
                 name=name,
                 original_names=variations,
@@ -134,15 +238,12 @@ class SchemaDetector:
             )
         
         # Detect type
-        detected_type, type_confidence = self._detect_type(non_null_values)
+        detected_type, type_confidence = self._detect_type(sketch)
         
         # Detect constraints
         constraints = {}
         if self.suggest_constraints:
-            constraints = self._detect_constraints(non_null_values, detected_type)
-        
-        # Get examples (up to 3 unique values)
-        examples = list(set(non_null_values))[:3]
+            constraints = self._detect_constraints(sketch, detected_type)
         
         return FieldSchema(
             name=name,
@@ -150,108 +251,40 @@ class SchemaDetector:
             type=detected_type,
             nullable=nullable,
             constraints=constraints,
-            examples=examples,
+            examples=sketch.examples(3),
             confidence=round(type_confidence, 2)
         )
     
-    def _detect_type(self, values: List[Any]) -> tuple[str, float]:
-        """Detect the data type of values"""
-        # Count types
-        type_counts = defaultdict(int)
-        
-        for value in values:
-            value_str = str(value).strip()
-            
-            # Check for email
-            if self._is_email(value_str):
-                type_counts['email'] += 1
-            # Check for phone
-            elif self._is_phone(value_str):
-                type_counts['phone'] += 1
-            # Check for URL
-            elif self._is_url(value_str):
-                type_counts['url'] += 1
-            # Check for date
-            elif self._is_date(value_str):
-                type_counts['date'] += 1
-            # Check for boolean
-            elif self._is_boolean(value_str):
-                type_counts['boolean'] += 1
-            # Check for number
-            elif self._is_number(value_str):
-                if '.' in value_str:
-                    type_counts['float'] += 1
-                else:
-                    type_counts['integer'] += 1
-            # Default to string
-            else:
-                type_counts['string'] += 1
+    def _detect_type(self, sketch: ColumnSketch) -> tuple[str, float]:
+        """Detect the data type from the column's type votes"""
+        type_counts = sketch.type_votes
         
         # Get most common type
         if type_counts:
             most_common_type = max(type_counts, key=type_counts.get)
-            confidence = type_counts[most_common_type] / len(values)
+            confidence = type_counts[most_common_type] / sketch.non_null_count
             return most_common_type, confidence
         
         return 'string', 0.5
     
-    def _detect_constraints(self, values: List[Any], data_type: str) -> Dict[str, Any]:
+    def _detect_constraints(self, sketch: ColumnSketch, data_type: str) -> Dict[str, Any]:
         """Detect constraints for a field"""
         constraints = {}
         
         if data_type in ['string', 'email', 'phone', 'url']:
             # String length constraints
-            lengths = [len(str(v)) for v in values]
-            constraints['min_length'] = min(lengths)
-            constraints['max_length'] = max(lengths)
+            constraints['min_length'] = sketch.min_length
+            constraints['max_length'] = sketch.max_length
         
         elif data_type in ['integer', 'float']:
             # Numeric constraints
-            numeric_values = [float(v) for v in values if self._is_number(str(v))]
-            if numeric_values:
-                constraints['min'] = min(numeric_values)
-                constraints['max'] = max(numeric_values)
+            if sketch.numeric_count:
+                constraints['min'] = sketch.min_value
+                constraints['max'] = sketch.max_value
         
-        # Check for uniqueness
-        unique_ratio = len(set(str(v) for v in values)) / len(values)
+        # Check for uniqueness (distinct count is estimated for very large columns)
+        unique_ratio = sketch.distinct_count / sketch.non_null_count
         if unique_ratio > 0.95:
             constraints['unique'] = True
         
         return constraints
-    
-    def _is_email(self, value: str) -> bool:
-        """Check if value looks like an email"""
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(email_pattern, value))
-    
-    def _is_phone(self, value: str) -> bool:
-        """Check if value looks like a phone number"""
-        # Remove common separators
-        digits = re.sub(r'[\s\-\(\)\+\.]', '', value)
-        return digits.isdigit() and 7 <= len(digits) <= 15
-    
-    def _is_url(self, value: str) -> bool:
-        """Check if value looks like a URL"""
-        url_pattern = r'^https?://'
-        return bool(re.match(url_pattern, value, re.IGNORECASE))
-    
-    def _is_date(self, value: str) -> bool:
-        """Check if value looks like a date"""
-        date_patterns = [
-            r'^\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-            r'^\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY or DD/MM/YYYY
-            r'^\d{4}/\d{2}/\d{2}',  # YYYY/MM/DD
-        ]
-        return any(re.match(pattern, value) for pattern in date_patterns)
-    
-    def _is_boolean(self, value: str) -> bool:
-        """Check if value looks like a boolean"""
-        return value.lower() in ['true', 'false', 'yes', 'no', '1', '0', 't', 'f', 'y', 'n']
-    
-    def _is_number(self, value: str) -> bool:
-        """Check if value is a number"""
-        try:
-            float(value)
-            return True
-        except (ValueError, TypeError):
-            return False
@@ -0,0 +1,161 @@
+"""
+Field Name Index
+Resolves column names to canonical fields through a token index with a trigram fallback
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+
+# Canonical field -> known name variations (the canonical name comes first)
+FIELD_SYNONYMS: Dict[str, List[str]] = {
+    'email': ['email', 'email_address', 'e_mail', 'user_email', 'contact_email', 'mail'],
+    'name': ['name', 'full_name', 'fullname', 'user_name', 'username', 'display_name'],
+    'first_name': ['first_name', 'firstname', 'fname', 'given_name'],
+    'last_name': ['last_name', 'lastname', 'lname', 'surname', 'family_name'],
+    'phone': ['phone', 'phone_number', 'telephone', 'tel', 'ph', 'mobile', 'mob', 'cell', 'contact_number'],
+    'address': ['address', 'addr', 'street_address', 'street', 'location', 'loc'],
+    'city': ['city', 'town', 'municipality'],
+    'state': ['state', 'province', 'region'],
+    'country': ['country', 'nation'],
+    'zip': ['zip', 'zipcode', 'postal_code', 'postcode'],
+    'company': ['company', 'organization', 'org', 'employer', 'company_name'],
+    'title': ['title', 'job_title', 'position', 'role'],
+    'date_of_birth': ['date_of_birth', 'dob', 'birth_date', 'birthday', 'bday'],
+    'date': ['date', 'created_at', 'updated_at', 'timestamp'],
+    'id': ['id', 'user_id', 'customer_id', 'record_id', 'identifier'],
+}
+
+# Minimum trigram similarity (Dice coefficient) for a fuzzy match
+FUZZY_THRESHOLD = 0.7
+
+_CASE_BOUNDARY_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+_SEPARATOR_RE = re.compile(r'[\W_]+')
+
+
+def tokenize(name: str) -> List[str]:
+    """Lowercase tokens of a field name: "userEmail-Address" -> ["user", "email", "address"]"""
+    spaced = _CASE_BOUNDARY_RE.sub('_', name.strip())
+    return [token for token in _SEPARATOR_RE.split(spaced.lower()) if token]
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f'${key}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FieldNameIndex:
+    """
+    Maps field names to canonical fields in (near) constant time per name
+
+    Names are tokenized (case changes and separators) and looked up by their
+    joined tokens, so "E-Mail", "e_mail" and "eMail" are one key. A name
+    that is not a synonym itself resolves through its longest run of tokens
+    that is one (rightmost on ties: "billing_zip_code" -> zip, "role_id" ->
+    id). Anything else falls back to the closest synonym by trigram
+    similarity, which absorbs typos like "adress". Results are cached per
+    name (a plain dict cleared when full).
+    """
+
+    def __init__(self, synonyms: Dict[str, List[str]] = FIELD_SYNONYMS, cache_size: int = 100_000):
+        self.canonical_fields = list(synonyms)
+        self.cache_size = cache_size
+        self._keys: Dict[str, str] = {}
+        self._trigrams: Dict[str, List[str]] = {}
+        self._trigram_counts: Dict[str, int] = {}
+        self._key_ranks: Dict[str, int] = {}
+        self._cache: Dict[str, Optional[str]] = {}
+
+        for canonical, names in synonyms.items():
+            for name in [canonical, *names]:
+                key = ''.join(tokenize(name))
+                if key in self._keys:
+                    continue
+                self._key_ranks[key] = len(self._keys)
+                self._keys[key] = canonical
+                grams = trigrams(key)
+                self._trigram_counts[key] = len(grams)
+                for gram in grams:
+                    self._trigrams.setdefault(gram, []).append(key)
+
+    def lookup(self, name: str) -> Optional[str]:
+        """
+        Canonical field for name only if name itself is a synonym
+
+        The whole name must match: no longest run of tokens, no trigram
+        fallback ("is_mobile_user" and "emial" give None).
+        """
+        return self._keys.get(''.join(tokenize(name)))
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Canonical field for name, or None if it matches none"""
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+
+        canonical = self._resolve(tokenize(name))
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[name] = canonical
+        return canonical
+
+    def _resolve(self, tokens: List[str]) -> Optional[str]:
+        if not tokens:
+            return None
+        keys = self._keys
+        for size in range(len(tokens), 0, -1):
+            for start in range(len(tokens) - size, -1, -1):
+                canonical = keys.get(''.join(tokens[start:start + size]))
+                if canonical is not None:
+                    return canonical
+        return self._fuzzy(''.join(tokens))
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+
+        if not shared:
+            return None
+        # Ties go to the synonym listed first
+        best_key = max(shared, key=lambda candidate: (
+            2 * shared[candidate] / (len(grams) + self._trigram_counts[candidate]),
+            -self._key_ranks[candidate]
+        ))
+        score = 2 * shared[best_key] / (len(grams) + self._trigram_counts[best_key])
+        return self._keys[best_key] if score >= FUZZY_THRESHOLD else None
+
+    def group(self, field_names: List[str]) -> Dict[str, List[str]]:
+        """
+        Group field names by canonical field
+
+        Canonical groups come in vocabulary order, then unmatched fields as
+        their own lowercased groups, in input order.
+        """
+        matched: Dict[str, List[str]] = {}
+        unmatched: Dict[str, List[str]] = {}
+        for field in field_names:
+            canonical = self.resolve(field)
+            if canonical is None:
+                unmatched.setdefault(field.lower(), []).append(field)
+            else:
+                matched.setdefault(canonical, []).append(field)
+
+        groups = {canonical: matched[canonical] for canonical in self.canonical_fields if canonical in matched}
+        for name, fields in unmatched.items():
+            groups.setdefault(name, []).extend(fields)
+        return groups
+
+
+# Global instance
+_field_name_index = None
+
+def get_field_name_index() -> FieldNameIndex:
+    """Get or create the shared index over FIELD_SYNONYMS"""
+    global _field_name_index
+    if _field_name_index is None:
+        _field_name_index = FieldNameIndex()
+    return _field_name_index
@@ -0,0 +1,309 @@
+"""
+Streaming Column Profiler
+One-pass, constant-memory column sketches that merge across chunks
+"""
+
+import math
+from collections import Counter
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+
+# HyperLogLog precision: 2**12 one-byte registers, ~1.6% standard error
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+_HLL_RANK_BITS = 64 - HLL_PRECISION
+
+# Distinct values counted exactly (as hashes) before switching to HyperLogLog
+EXACT_DISTINCT_LIMIT = 4096
+
+# Values kept in each column's bottom-k sample
+SAMPLE_SIZE = 16
+
+# A column's type is settled when, after enough votes, one type holds this share
+SETTLED_TYPE_SHARE = 0.99
+
+# Once settled, a value is still classified when its hash is a multiple of
+# this, or when it makes up at least 1/SETTLED_CHECK_EVERY of its block
+SETTLED_CHECK_EVERY = 16
+
+# Records split into columns at a time (bounds the per-block column lists)
+PROFILE_BLOCK_RECORDS = 1024
+
+
+def value_hash(value_str: str) -> int:
+    """64-bit hash of a value's string form, stable across processes"""
+    return int.from_bytes(blake2b(value_str.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes"""
+
+    def __init__(self):
+        self.registers = bytearray(HLL_REGISTERS)
+
+    def add(self, hashed: int):
+        index = hashed >> _HLL_RANK_BITS
+        rank = _HLL_RANK_BITS - (hashed & ((1 << _HLL_RANK_BITS) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> float:
+        m = HLL_REGISTERS
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return m * math.log(m / zeros)
+        return raw
+
+
+class ColumnSketch:
+    """
+    Mergeable summary of one column
+
+    Tracks value/null counts, type votes, string length and numeric ranges,
+    distinct values (exact hashes up to EXACT_DISTINCT_LIMIT, HyperLogLog
+    beyond) and a bottom-k sample: the SAMPLE_SIZE distinct values with the
+    smallest hashes, which is the same whatever way the column was chunked.
+
+    With settle_votes, the column stops classifying most values once that
+    many were seen and one type holds SETTLED_TYPE_SHARE of them; later
+    values vote for that type unclassified. A sparse, hash-chosen sample
+    (plus every value frequent in its block) is still classified, and a
+    block with a sampled value of another type un-settles the column and
+    is classified in full. Votes given while settled are extrapolated;
+    everything else is tracked exactly. A column can also start out settled
+    on a type known beforehand (see SchemaProfiler's settled_types).
+    """
+
+    def __init__(self, settle_votes: int = 0):
+        self.settle_votes = settle_votes
+        self.settled_type: Optional[str] = None
+        self.count = 0
+        self.null_count = 0
+        self.type_votes: Counter = Counter()
+        self.min_length: Optional[int] = None
+        self.max_length: Optional[int] = None
+        self.numeric_count = 0
+        self.min_value: Optional[float] = None
+        self.max_value: Optional[float] = None
+        self.hashes: Optional[Set[int]] = set()
+        self.hll: Optional[HyperLogLog] = None
+        self.sample: Dict[int, Any] = {}
+        # Largest hash in a full sample (the admission threshold)
+        self._sample_max: Optional[int] = None
+
+    @property
+    def non_null_count(self) -> int:
+        return self.count - self.null_count
+
+    def add_values(self, values: List[Any], classify: Callable[[str], str]):
+        """
+        Add a block of values
+
+        Repeats are counted at C speed first, so classifying, parsing and
+        hashing run once per distinct string form in the block.
+        """
+        non_null = [value for value in values if value is not None]
+        self.count += len(values)
+        self.null_count += len(values) - len(non_null)
+        if not non_null:
+            return
+
+        strings = list(map(str, non_null))
+        counts = Counter(strings)
+        # First value per string form (later writes win, so go backwards)
+        originals = dict(zip(reversed(strings), reversed(non_null)))
+
+        hashes = {value_str: value_hash(value_str) for value_str in counts}
+        classified: Dict[str, str] = {}
+        settled_type = self.settled_type
+        if settled_type is not None:
+            frequent = len(non_null) / SETTLED_CHECK_EVERY
+            for value_str, count in counts.items():
+                if hashes[value_str] % SETTLED_CHECK_EVERY == 0 or count >= frequent:
+                    classified[value_str] = classify(value_str.strip())
+                    if classified[value_str] != settled_type:
+                        # The sample disagrees: classify this block and the ones after it
+                        settled_type = self.settled_type = None
+                        break
+
+        type_votes = self.type_votes
+        min_length, max_length = self.min_length, self.max_length
+        min_value, max_value = self.min_value, self.max_value
+        for value_str, count in counts.items():
+            if settled_type is not None:
+                type_votes[settled_type] += count
+            else:
+                vote = classified.get(value_str)
+                type_votes[vote if vote is not None else classify(value_str.strip())] += count
+
+            length = len(value_str)
+            if min_length is None or length < min_length:
+                min_length = length
+            if max_length is None or length > max_length:
+                max_length = length
+
+            try:
+                number = float(value_str)
+            except (ValueError, TypeError):
+                pass
+            else:
+                self.numeric_count += count
+                if min_value is None or number < min_value:
+                    min_value = number
+                if max_value is None or number > max_value:
+                    max_value = number
+
+            hashed = hashes[value_str]
+            if self.hashes is not None:
+                self.hashes.add(hashed)
+                if len(self.hashes) > EXACT_DISTINCT_LIMIT:
+                    self._switch_to_hll()
+            else:
+                self.hll.add(hashed)
+            if self._sample_max is None or hashed < self._sample_max:
+                self._sample(hashed, originals[value_str])
+
+        self.min_length, self.max_length = min_length, max_length
+        self.min_value, self.max_value = min_value, max_value
+        if self.settle_votes and settled_type is None:
+            self._check_settled()
+
+    def _sample(self, hashed: int, value: Any):
+        sample = self.sample
+        if self._sample_max is not None:
+            if hashed >= self._sample_max or hashed in sample:
+                return
+            del sample[self._sample_max]
+            sample[hashed] = value
+            self._sample_max = max(sample)
+        elif hashed not in sample:
+            sample[hashed] = value
+            if len(sample) == SAMPLE_SIZE:
+                self._sample_max = max(sample)
+
+    def _check_settled(self):
+        voted = self.non_null_count
+        if voted >= self.settle_votes:
+            leading, votes = self.type_votes.most_common(1)[0]
+            if votes >= SETTLED_TYPE_SHARE * voted:
+                self.settled_type = leading
+
+    def _switch_to_hll(self):
+        self.hll = HyperLogLog()
+        for hashed in self.hashes:
+            self.hll.add(hashed)
+        self.hashes = None
+
+    @property
+    def distinct_count(self) -> float:
+        """Exact while small, HyperLogLog estimate beyond EXACT_DISTINCT_LIMIT"""
+        if self.hashes is not None:
+            return len(self.hashes)
+        return self.hll.estimate()
+
+    def examples(self, limit: int = 3) -> List[Any]:
+        return [self.sample[hashed] for hashed in sorted(self.sample)[:limit]]
+
+    def merge(self, other: "ColumnSketch"):
+        """Fold another sketch of the same column (a later chunk) into this one"""
+        self.count += other.count
+        self.null_count += other.null_count
+        self.type_votes.update(other.type_votes)
+        # Settled only if both sides settled on the same type, or the merged votes settle it
+        if self.settled_type != other.settled_type:
+            self.settled_type = None
+        if self.settle_votes and self.settled_type is None:
+            self._check_settled()
+
+        for attribute, pick in (("min_length", min), ("max_length", max), ("min_value", min), ("max_value", max)):
+            mine, theirs = getattr(self, attribute), getattr(other, attribute)
+            if theirs is not None:
+                setattr(self, attribute, theirs if mine is None else pick(mine, theirs))
+        self.numeric_count += other.numeric_count
+
+        if self.hashes is not None and other.hashes is not None:
+            self.hashes |= other.hashes
+            if len(self.hashes) > EXACT_DISTINCT_LIMIT:
+                self._switch_to_hll()
+        else:
+            if self.hashes is not None:
+                self._switch_to_hll()
+            if other.hashes is not None:
+                for hashed in other.hashes:
+                    self.hll.add(hashed)
+            else:
+                self.hll.merge(other.hll)
+
+        for hashed, value in other.sample.items():
+            self._sample(hashed, value)
+
+
+class SchemaProfiler:
+    """
+    Streams records into one ColumnSketch per field
+
+    classify maps a value's stripped string form to its type vote. Records
+    are taken PROFILE_BLOCK_RECORDS at a time and split into columns. Fields
+    keep first-seen order. Without early type settling (settle_votes=0),
+    merging profiles of consecutive chunks in order gives the same sketches
+    (and so the same type tie-breaks) as one pass over all records. With
+    it, settling is decided per block, so settled columns' votes are
+    extrapolated and can differ with the chunking; only the other
+    statistics stay exact. settled_types starts the given fields out settled
+    on a known type (e.g. from a cached schema), so only the sample checks
+    run on them unless the data disagrees.
+    """
+
+    def __init__(
+        self,
+        classify: Callable[[str], str],
+        settle_votes: int = 0,
+        settled_types: Optional[Dict[str, str]] = None
+    ):
+        self.classify = classify
+        self.settle_votes = settle_votes
+        self.settled_types = settled_types or {}
+        self.columns: Dict[str, ColumnSketch] = {}
+
+    def update(self, records: Iterable[Dict[str, Any]]) -> "SchemaProfiler":
+        block = []
+        for record in records:
+            block.append(record)
+            if len(block) == PROFILE_BLOCK_RECORDS:
+                self._update_block(block)
+                block = []
+        if block:
+            self._update_block(block)
+        return self
+
+    def _update_block(self, records: List[Dict[str, Any]]):
+        # Present values only: a missing field is not a null
+        values_by_field: Dict[str, List[Any]] = {}
+        for record in records:
+            for field, value in record.items():
+                values = values_by_field.get(field)
+                if values is None:
+                    values = values_by_field[field] = []
+                values.append(value)
+
+        for field, values in values_by_field.items():
+            sketch = self.columns.get(field)
+            if sketch is None:
+                sketch = self.columns[field] = ColumnSketch(self.settle_votes)
+                sketch.settled_type = self.settled_types.get(field)
+            sketch.add_values(values, self.classify)
+
+    def merge(self, other: "SchemaProfiler") -> "SchemaProfiler":
+        for field, sketch in other.columns.items():
+            if field in self.columns:
+                self.columns[field].merge(sketch)
+            else:
+                self.columns[field] = sketch
+        return self
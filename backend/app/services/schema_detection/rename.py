@@ -0,0 +1,44 @@
+"""
+Column Rename Plans
+Field mappings compiled once, then applied to records, CSV headers and streams
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping
+
+
+class RenamePlan:
+    """
+    A field mapping prepared for bulk application
+
+    Records: a record sharing no key with the mapping is passed through
+    as-is after one C-level set check, with no copy. Others are rebuilt key by key, in
+    their original key order. Two keys mapped to the same name keep the
+    later value at the first key's position.
+
+    Tabular input: renaming is positional, so only the header changes and
+    rows pass through untouched. Columns mapped to the same name both stay.
+    """
+
+    def __init__(self, mapping: Mapping[str, str]):
+        self.mapping = dict(mapping)
+        self._untouched = self.mapping.keys().isdisjoint
+
+    def rename_header(self, columns: Iterable[str]) -> List[str]:
+        """Column names of a tabular header, renamed in place"""
+        rename = self.mapping.get
+        return [rename(column, column) for column in columns]
+
+    def apply(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """record with its keys renamed (record itself if none is mapped)"""
+        if self._untouched(record):
+            return record
+        rename = self.mapping.get
+        return {rename(key, key): value for key, value in record.items()}
+
+    def apply_many(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        untouched = self._untouched
+        rename = self.mapping.get
+        return [
+            record if untouched(record) else {rename(key, key): value for key, value in record.items()}
+            for record in records
+        ]
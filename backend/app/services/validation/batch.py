@@ -0,0 +1,230 @@
+"""
+Batch Validation
+Validate many records column by column, with per-row error bitmaps
+"""
+
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.executor import get_compute_executor
+from app.services.phone.normalizer import get_phone_normalizer
+from app.services.validation.dates import DateParser
+from app.services.validation.patterns import get_pattern_cache
+from app.services.validation.validator import DataValidator
+
+
+# Bit i of a row's bitmap stands for rule i; 53 bits keep bitmaps exact as JSON numbers
+MAX_BATCH_RULES = 53
+
+# Rule types whose checks only apply to strings
+_STRING_TYPES = {"email", "phone", "url", "date", "name", "custom"}
+
+# (error, suggestion) for a failing value
+Failure = Tuple[str, Optional[str]]
+
+
+class BatchValidationResult(NamedTuple):
+    """Outcome of validating a batch"""
+    bitmaps: np.ndarray                          # int64 per row, bit i set when rule i failed
+    error_counts: List[int]                      # failing rows per rule
+    details: Optional[Dict[int, List[Dict[str, Any]]]] = None  # failures of invalid rows, by row
+
+
+def _value_key(value: Any) -> Hashable:
+    """Dict key for a value; keeps 1, 1.0 and True apart"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return type(value), value
+    return type(value), repr(value)
+
+
+def _as_number(value: Any) -> float:
+    """value as a float, NaN if it is not numeric"""
+    if isinstance(value, bool):
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return np.nan
+    return np.nan
+
+
+class BatchValidator:
+    """
+    Validates a list of records against a list of rules, one column at a time
+
+    A rule runs once per distinct value of its column: type checks reuse
+    DataValidator's per-value checks, allowed values are a set lookup and
+    length/range limits are numpy comparisons. Per-value outcomes are then
+    broadcast back to the rows. Rules are BatchValidationRule-like objects
+    (field, type, required, pattern, allowed_values, min/max_length,
+    min/max_value).
+    """
+
+    def __init__(self, validator: Optional[DataValidator] = None):
+        self.validator = validator or DataValidator()
+
+    async def validate(
+        self,
+        records: List[Dict[str, Any]],
+        rules: Sequence[Any],
+        details: bool = False,
+        phone_region: Optional[str] = None,
+        tenant: Optional[str] = None
+    ) -> BatchValidationResult:
+        """
+        Validate records on a compute thread
+
+        Raises:
+            ValueError: A rule cannot be applied (InvalidPatternError for unusable patterns)
+            ComputeQueueFull: The tenant already has too many jobs in flight
+        """
+        executor = get_compute_executor()
+        async with executor.slot(tenant):
+            return await executor.run_in_thread(self.validate_sync, records, rules, details, phone_region)
+
+    def validate_sync(
+        self,
+        records: List[Dict[str, Any]],
+        rules: Sequence[Any],
+        details: bool = False,
+        phone_region: Optional[str] = None
+    ) -> BatchValidationResult:
+        if len(rules) > MAX_BATCH_RULES:
+            raise ValueError(f"At most {MAX_BATCH_RULES} rules per batch")
+        get_pattern_cache().check_rules(rules)
+
+        bitmaps = np.zeros(len(records), dtype=np.int64)
+        error_counts = []
+        failures_by_rule = []
+
+        for bit, rule in enumerate(rules):
+            column = [record.get(rule.field) for record in records]
+            codes, distinct = self._factorize(column)
+            region = phone_region
+            if rule.type == "phone" and region is None:
+                region = get_phone_normalizer().infer_region(distinct)
+
+            failures = self._check_distinct(rule, distinct, region)
+            failed = np.array([failure is not None for failure in failures], dtype=bool)
+            failed_rows = failed[codes] if len(codes) else np.zeros(0, dtype=bool)
+
+            bitmaps |= failed_rows.astype(np.int64) << bit
+            error_counts.append(int(failed_rows.sum()))
+            failures_by_rule.append((codes, distinct, failures))
+
+        expanded = None
+        if details:
+            expanded = {}
+            for row in np.flatnonzero(bitmaps).tolist():
+                expanded[row] = [
+                    {
+                        "field": rule.field,
+                        "value": distinct[codes[row]],
+                        "error": failures[codes[row]][0],
+                        "suggestion": failures[codes[row]][1]
+                    }
+                    for rule, (codes, distinct, failures) in zip(rules, failures_by_rule)
+                    if failures[codes[row]] is not None
+                ]
+
+        return BatchValidationResult(bitmaps=bitmaps, error_counts=error_counts, details=expanded)
+
+    @staticmethod
+    def _factorize(column: List[Any]) -> Tuple[np.ndarray, List[Any]]:
+        """Code per row into the list of distinct values"""
+        index: Dict[Hashable, int] = {}
+        distinct: List[Any] = []
+        codes = np.empty(len(column), dtype=np.int64)
+        for row, value in enumerate(column):
+            key = _value_key(value)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(distinct)
+                distinct.append(value)
+            codes[row] = code
+        return codes, distinct
+
+    def _check_distinct(self, rule: Any, values: List[Any], phone_region: Optional[str]) -> List[Optional[Failure]]:
+        """First failure of every distinct value, None where the value passes"""
+        failures: List[Optional[Failure]] = [None] * len(values)
+        missing = np.array([value is None or value == "" for value in values], dtype=bool)
+        # Values still subject to checks
+        pending = ~missing
+
+        def fail(mask: np.ndarray, error: str):
+            for idx in np.flatnonzero(mask & pending).tolist():
+                failures[idx] = (error, None)
+            pending[mask] = False
+
+        if rule.required:
+            for idx in np.flatnonzero(missing).tolist():
+                failures[idx] = ("Field is required", None)
+
+        # Type checks, one call per distinct value
+        check = self._type_check(rule, [values[idx] for idx in np.flatnonzero(pending)], phone_region)
+        if check is not None:
+            for idx in np.flatnonzero(pending).tolist():
+                failure = check(values[idx])
+                if failure is not None:
+                    failures[idx] = failure
+                    pending[idx] = False
+
+        if rule.allowed_values is not None:
+            allowed = {_value_key(value) for value in rule.allowed_values}
+            not_allowed = np.array([_value_key(value) not in allowed for value in values], dtype=bool)
+            fail(not_allowed, "Value is not one of the allowed values")
+
+        if rule.min_length is not None or rule.max_length is not None:
+            lengths = np.array([len(value) if isinstance(value, str) else len(str(value)) for value in values])
+            if rule.min_length is not None:
+                fail(lengths < rule.min_length, f"Value is shorter than {rule.min_length} characters")
+            if rule.max_length is not None:
+                fail(lengths > rule.max_length, f"Value is longer than {rule.max_length} characters")
+
+        if rule.min_value is not None or rule.max_value is not None:
+            numbers = np.array([_as_number(value) for value in values], dtype=np.float64)
+            fail(np.isnan(numbers), "Value is not a number")
+            with np.errstate(invalid="ignore"):
+                if rule.min_value is not None:
+                    fail(numbers < rule.min_value, f"Value is below the minimum of {rule.min_value}")
+                if rule.max_value is not None:
+                    fail(numbers > rule.max_value, f"Value is above the maximum of {rule.max_value}")
+
+        return failures
+
+    def _type_check(self, rule: Any, values: List[Any], phone_region: Optional[str]):
+        """Per-value check for the rule's type over values, or None for untyped rules"""
+        if rule.type not in _STRING_TYPES or (rule.type == "custom" and not rule.pattern):
+            return None
+
+        validator = self.validator
+        if rule.type == "custom":
+            # Unusable patterns were refused by check_rules before any value ran
+            single = lambda value: validator._validate_pattern(rule.field, value, rule.pattern)
+        elif rule.type == "email":
+            single = lambda value: validator._validate_email(rule.field, value)
+        elif rule.type == "phone":
+            # The column's distinct numbers in one parse_batch call
+            numbers = [value for value in values if isinstance(value, str)]
+            parsed = dict(zip(numbers, get_phone_normalizer().parse_batch(numbers, phone_region)))
+            single = lambda value: validator._phone_validation(rule.field, value, parsed[value])
+        elif rule.type == "url":
+            single = lambda value: validator._validate_url(rule.field, value)
+        elif rule.type == "date":
+            # Format order inferred for this column
+            parser = DateParser.infer(values)
+            single = lambda value: validator._validate_date(rule.field, value, parser)
+        else:
+            single = lambda value: validator._validate_name(rule.field, value)
+
+        def check(value: Any) -> Optional[Failure]:
+            if not isinstance(value, str):
+                return "Expected a string", None
+            result = single(value)
+            return None if result.valid else (result.error, result.suggestion)
+
+        return check
@@ -0,0 +1,114 @@
+"""
+Date Parsing
+Regex-gated strptime over the supported date formats, with per-column format order
+"""
+
+import re
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+
+# Supported formats, in the order a lone value is tried
+DATE_FORMATS: Tuple[str, ...] = (
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y/%m/%d',
+    '%B %d, %Y',
+    '%d %B %Y',
+)
+
+# Values sampled per column when inferring its format order
+FORMAT_SAMPLE_SIZE = 200
+
+# Gates accept (at least) everything strptime accepts for the format, so a
+# value only pays for the strptime calls that can succeed. strptime's %d
+# also matches a space-padded day, and format spaces match any whitespace.
+_DAY = r'(?:\d{1,2}| \d)'
+_MONTH = r'\d{1,2}'
+_YEAR = r'\d{4}'
+_MONTH_NAME = r'[^\W\d_]+'
+_FORMAT_GATES: Dict[str, "re.Pattern[str]"] = {
+    '%Y-%m-%d': re.compile(rf'{_YEAR}-{_MONTH}-{_DAY}'),
+    '%m/%d/%Y': re.compile(rf'{_MONTH}/{_DAY}/{_YEAR}'),
+    '%d/%m/%Y': re.compile(rf'{_DAY}/{_MONTH}/{_YEAR}'),
+    '%Y/%m/%d': re.compile(rf'{_YEAR}/{_MONTH}/{_DAY}'),
+    '%B %d, %Y': re.compile(rf'{_MONTH_NAME}\s+{_DAY},\s+{_YEAR}'),
+    '%d %B %Y': re.compile(rf'{_DAY}\s+{_MONTH_NAME}\s+{_YEAR}'),
+}
+
+_UNSEEN = object()
+
+
+def _parse_format(value: str, fmt: str) -> Optional[datetime]:
+    # Formats without a gate (passed to DateParser by callers) go straight to strptime
+    gate = _FORMAT_GATES.get(fmt)
+    if gate is not None and not gate.fullmatch(value):
+        return None
+    try:
+        return datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+
+
+class DateParser:
+    """
+    Parses date strings against a list of formats, first match wins
+
+    Each of DATE_FORMATS is guarded by a regex gate, so non-matching formats
+    cost a regex check instead of a raised ValueError; other formats are
+    tried with strptime alone. Results are cached per distinct string (a
+    plain dict cleared when full).
+    """
+
+    def __init__(self, formats: Sequence[str] = DATE_FORMATS, cache_size: int = 100_000):
+        self.formats = tuple(formats)
+        self.cache_size = cache_size
+        self._cache: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def infer(cls, values: Iterable[Any], sample_size: int = FORMAT_SAMPLE_SIZE) -> "DateParser":
+        """
+        Parser for one column, with formats ordered by how many sampled values they parse
+
+        Ties keep DATE_FORMATS order, so a column of "25/12/2024"-style
+        dates reads "01/02/2024" day-first while a lone value (or a column
+        that never disambiguates) stays month-first.
+        """
+        sample = list(islice((value for value in values if isinstance(value, str)), sample_size))
+        wins = {
+            fmt: sum(_parse_format(value, fmt) is not None for value in sample)
+            for fmt in DATE_FORMATS
+        }
+        order = sorted(DATE_FORMATS, key=lambda fmt: (-wins[fmt], DATE_FORMATS.index(fmt)))
+        return cls(order)
+
+    def to_iso(self, value: str) -> Optional[str]:
+        """value as YYYY-MM-DD, or None if no format matches"""
+        cached = self._cache.get(value, _UNSEEN)
+        if cached is not _UNSEEN:
+            return cached
+
+        iso = None
+        for fmt in self.formats:
+            parsed = _parse_format(value, fmt)
+            if parsed is not None:
+                iso = parsed.strftime('%Y-%m-%d')
+                break
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[value] = iso
+        return iso
+
+
+# Global instance
+_date_parser = None
+
+def get_date_parser() -> DateParser:
+    """Get or create the process-wide parser (DATE_FORMATS order)"""
+    global _date_parser
+    if _date_parser is None:
+        _date_parser = DateParser()
+    return _date_parser
@@ -0,0 +1,440 @@
+"""
+Custom Pattern Cache
+Bounded cache of compiled user patterns, with catastrophic-backtracking protection
+"""
+
+import logging
+import re
+import sys
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple, Union
+
+import regex
+
+from app.core.config import settings
+
+logger = logging.getLogger("cleara.validation")
+
+
+def _load_parser():
+    """
+    The stdlib regex parser and its MAXREPEAT, or (None, None)
+
+    The backtracking analysis walks the parse tree of the stdlib parser,
+    which is not a public API: it moved to re._parser in Python 3.11 and
+    sre_parse is a deprecated alias since. Without either one the analysis
+    is skipped and the match time budget is the only guard.
+    """
+    if sys.version_info >= (3, 11):
+        try:
+            from re import _constants, _parser
+            return _parser, _constants.MAXREPEAT
+        except ImportError:
+            pass
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            import sre_constants
+            import sre_parse
+        return sre_parse, sre_constants.MAXREPEAT
+    except ImportError:
+        return None, None
+
+
+sre_parse, MAXREPEAT = _load_parser()
+if sre_parse is None:
+    logger.warning("Regex parser not available, custom patterns are not checked for backtracking")
+
+SAFETY_MODES = ("reject", "timeout", "off")
+
+# Repeats with at least this many iterations count as "many" when nested
+_LARGE_REPEAT = 10
+
+
+class InvalidPatternError(ValueError):
+    """Raised for a custom pattern that does not compile or is refused as unsafe"""
+
+    def __init__(self, pattern: str, reason: str, field: Optional[str] = None):
+        self.pattern = pattern
+        self.reason = reason
+        self.field = field
+        where = f" for '{field}'" if field else ""
+        super().__init__(f"Invalid regex pattern{where}: {reason}")
+
+
+# Characters tried against classes when checking whether two atoms overlap
+# (plus every literal of the pattern itself)
+_PROBE_CHARS = frozenset(
+    [chr(code) for code in range(256)] + list("\u0100\u0142\u03a9\u0416\u0663\u4e2d\u2028\u3000")
+)
+
+_CATEGORY_PATTERNS = {
+    "CATEGORY_DIGIT": re.compile(r"\d"),
+    "CATEGORY_NOT_DIGIT": re.compile(r"\D"),
+    "CATEGORY_SPACE": re.compile(r"\s"),
+    "CATEGORY_NOT_SPACE": re.compile(r"\S"),
+    "CATEGORY_WORD": re.compile(r"\w"),
+    "CATEGORY_NOT_WORD": re.compile(r"\W"),
+    "CATEGORY_LINEBREAK": re.compile(r"\n"),
+    "CATEGORY_NOT_LINEBREAK": re.compile(r"[^\n]"),
+}
+
+# Group prefixes whose body is matched as written: (?:, (?P<name>, (?i:
+_GROUP_PREFIX_RE = re.compile(r"\?(?::|P<\w+>|[aiLmsux]*(?:-[imsx]+)?:)")
+# Quantifier right after a group; a trailing + makes it possessive
+_QUANTIFIER_RE = re.compile(r"(\*|\+|\{(\d*),(\d*)\}|\{(\d+)\})(\+?)")
+
+_NESTED = "nested quantifiers can backtrack catastrophically"
+_ALTERNATIVES = "overlapping alternatives under a quantifier can backtrack catastrophically"
+
+
+def _literals(node):
+    """Every literal character anywhere in a parsed pattern"""
+    if isinstance(node, tuple) and len(node) == 2 and str(node[0]) == "LITERAL":
+        yield chr(node[1])
+    elif isinstance(node, (list, tuple)) or hasattr(node, "data"):
+        for part in getattr(node, "data", node):
+            yield from _literals(part)
+
+
+class _CharSets:
+    """First-character sets of parsed pattern items, over a probe alphabet"""
+
+    def __init__(self, items, ignore_case: bool):
+        self.ignore_case = ignore_case
+        self.probes = set(_PROBE_CHARS) | set(_literals(items))
+        if ignore_case:
+            self.probes |= {ch.swapcase() for ch in self.probes}
+
+    def _fold(self, chars: set) -> set:
+        return chars | {ch.swapcase() for ch in chars} if self.ignore_case else chars
+
+    def _in_class(self, items) -> set:
+        negate = bool(items) and str(items[0][0]) == "NEGATE"
+        matched = set()
+        for op, av in items:
+            name = str(op)
+            if name == "LITERAL":
+                matched.add(chr(av))
+            elif name == "RANGE":
+                matched |= {ch for ch in self.probes if av[0] <= ord(ch) <= av[1]}
+            elif name == "CATEGORY":
+                category = _CATEGORY_PATTERNS.get(str(av))
+                matched |= {ch for ch in self.probes if category is None or category.match(ch)}
+            elif name != "NEGATE":
+                # Unknown member: assume it can match anything
+                matched |= self.probes
+        matched = self._fold(matched)
+        return self.probes - matched if negate else matched
+
+    def first(self, items) -> Tuple[set, bool]:
+        """(characters a match of items can start with, whether items can match empty)"""
+        chars: set = set()
+        for item in items:
+            item_chars, nullable = self._first_item(item)
+            chars |= item_chars
+            if not nullable:
+                return chars, False
+        return chars, True
+
+    def _first_item(self, item) -> Tuple[set, bool]:
+        op, av = item
+        name = str(op)
+        if name == "LITERAL":
+            return self._fold({chr(av)}), False
+        if name == "NOT_LITERAL":
+            return self.probes - self._fold({chr(av)}), False
+        if name == "ANY":
+            return set(self.probes), False
+        if name == "IN":
+            return self._in_class(av), False
+        if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            low, _, body = av
+            chars, nullable = self.first(body)
+            return chars, nullable or low == 0
+        if name == "SUBPATTERN":
+            return self.first(av[-1])
+        if name == "ATOMIC_GROUP":
+            return self.first(av)
+        if name == "BRANCH":
+            firsts = [self.first(branch) for branch in av[1]]
+            return set().union(*(chars for chars, _ in firsts)), any(nullable for _, nullable in firsts)
+        if name == "GROUPREF_EXISTS":
+            yes = self.first(av[1])
+            no = self.first(av[2]) if av[2] else (set(), True)
+            return yes[0] | no[0], yes[1] or no[1]
+        if name == "GROUPREF":
+            return set(self.probes), True
+        # Anchors and lookarounds match no characters
+        return set(), True
+
+
+# Parsed items that match exactly one character
+_SINGLE_CHAR_OPS = ("LITERAL", "NOT_LITERAL", "IN", "ANY")
+
+
+def _split_top_level(text: str, separator: Optional[str] = None):
+    """
+    Scan a pattern source, skipping escapes and character classes
+
+    With a separator, returns text split at that character outside groups;
+    without, returns (group body, text after the group) for every group.
+    """
+    parts, groups, opened = [], [], []
+    depth, last, i = 0, 0, 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "[":
+            i += 1
+            if text[i:i + 1] == "^":
+                i += 1
+            if text[i:i + 1] == "]":
+                i += 1
+            while i < len(text) and text[i] != "]":
+                i += 2 if text[i] == "\\" else 1
+        elif ch == "(":
+            opened.append(i)
+            depth += 1
+        elif ch == ")" and opened:
+            start = opened.pop()
+            depth -= 1
+            groups.append((text[start + 1:i], text[i + 1:]))
+        elif ch == separator and depth == 0:
+            parts.append(text[last:i])
+            last = i + 1
+        i += 1
+    if separator is None:
+        return groups
+    return parts + [text[last:]]
+
+
+def _quantified_alternations(pattern: str):
+    """Alternatives of every group written as (x|y|...) and repeated unboundedly or many times"""
+    for body, after in _split_top_level(pattern):
+        quantifier = _QUANTIFIER_RE.match(after)
+        if quantifier is None or quantifier.group(5):
+            continue
+        if quantifier.group(4) is not None:
+            many = int(quantifier.group(4)) >= _LARGE_REPEAT
+        elif quantifier.group(1).startswith("{"):
+            many = not quantifier.group(3) or int(quantifier.group(3)) >= _LARGE_REPEAT
+        else:
+            many = True
+        if not many:
+            continue
+        if body.startswith("?"):
+            prefix = _GROUP_PREFIX_RE.match(body)
+            if prefix is None:
+                continue
+            body = body[prefix.end():]
+        alternatives = _split_top_level(body, "|")
+        if len(alternatives) > 1:
+            yield alternatives
+
+
+def find_backtracking_risk(pattern: str) -> Optional[str]:
+    """
+    Why pattern may backtrack catastrophically (exponentially), or None
+
+    Flags, under a repeat that runs unboundedly or many times:
+    - an unbounded (or long) variable repeat nested inside it that can
+      split the same text between iterations in more than one way, e.g.
+      (a+)+, (\\w+\\s?)* or (.*x){20}. A mandatory character the inner
+      repeat cannot match fixes the split, so (\\w+\\.)* and ( \\w+)* are
+      fine, as are optional parts like (ab?)*.
+    - alternatives that can start with the same character, e.g. (a|a)*b,
+      (a|aa)* or (\\w|\\d)+$. Distinct ones like (com|org)+ are fine.
+    Possessive repeats and atomic groups never backtrack and are skipped.
+    Character overlap is decided over a probe alphabet (Latin-1, a few
+    other scripts and the pattern's own literals). Always None when the
+    stdlib parser is not available (see _load_parser).
+    """
+    if sre_parse is None:
+        return None
+    parsed = sre_parse.parse(pattern)
+    chars = _CharSets(parsed, ignore_case=bool(parsed.state.flags & re.IGNORECASE))
+
+    def overlapping(firsts) -> bool:
+        for a in range(len(firsts)):
+            for b in range(a + 1, len(firsts)):
+                if firsts[a][0] & firsts[b][0] or (firsts[a][1] and firsts[b][1]):
+                    return True
+        return False
+
+    def walk(items, loop_follow: Optional[set], follow: set) -> Optional[str]:
+        # loop_follow: what can come after items without leaving the enclosing
+        # repeat (None outside of one); follow: what can come after items at all
+        in_loop = loop_follow is not None
+        for idx, (op, av) in enumerate(items):
+            name = str(op)
+            rest_chars, rest_nullable = chars.first(items[idx + 1:])
+            after = rest_chars | follow if rest_nullable else rest_chars
+            loop_after = (rest_chars | loop_follow if rest_nullable else rest_chars) if in_loop else None
+
+            if name in ("MAX_REPEAT", "MIN_REPEAT"):
+                low, high, body = av
+                many = high == MAXREPEAT or high >= _LARGE_REPEAT
+                body_first = chars.first(body)[0]
+                # Ambiguous only if the loop can go on with a character that
+                # would also extend this repeat
+                if in_loop and many and low != high and body_first & loop_after:
+                    return _NESTED
+                # Inside the body, a match is followed by the next iteration or by what follows the repeat
+                body_follow = body_first | after if high > 1 else after
+                if many:
+                    body_loop_follow = body_first | (loop_after or set())
+                elif in_loop:
+                    body_loop_follow = body_first | loop_after if high > 1 else loop_after
+                else:
+                    body_loop_follow = None
+                found = walk(body, body_loop_follow, body_follow)
+            elif name == "SUBPATTERN":
+                found = walk(av[-1], loop_after, after)
+            elif name == "BRANCH":
+                if in_loop:
+                    firsts = []
+                    for branch in av[1]:
+                        branch_chars, nullable = chars.first(branch)
+                        firsts.append((branch_chars | after if nullable else branch_chars, nullable))
+                    if overlapping(firsts):
+                        return _ALTERNATIVES
+                found = next((f for f in (walk(b, loop_after, after) for b in av[1]) if f), None)
+            elif name in ("ASSERT", "ASSERT_NOT"):
+                found = walk(av[1], set() if in_loop else None, set())
+            elif name == "GROUPREF_EXISTS":
+                found = walk(av[1], loop_after, after) or (walk(av[2], loop_after, after) if av[2] else None)
+            else:
+                # Literals, classes, anchors, POSSESSIVE_REPEAT, ATOMIC_GROUP
+                found = None
+            if found:
+                return found
+        return None
+
+    found = walk(parsed, None, set())
+    if found:
+        return found
+
+    # re merges alternatives of single characters, e.g. (\\w|\\d), into one
+    # class before the parsed tree can show them, so check them as written
+    for alternatives in _quantified_alternations(pattern):
+        try:
+            parts = [sre_parse.parse(alternative, parsed.state.flags) for alternative in alternatives]
+        except re.error:
+            continue
+        if all(len(part) == 1 and str(part[0][0]) in _SINGLE_CHAR_OPS for part in parts):
+            if overlapping([chars.first(part) for part in parts]):
+                return _ALTERNATIVES
+    return None
+
+
+class PatternCache:
+    """
+    LRU of compiled custom patterns, keyed by pattern string
+
+    Custom patterns use the syntax of the `regex` module, a superset of
+    `re` (it adds e.g. \\p{L} and [[:alpha:]]): they are compiled and run
+    by `regex` only, with a per-value time budget; a match that runs out
+    of it fails validation. Compile failures are cached too, so a bad rule
+    is parsed once. The static analysis cannot catch every pattern that
+    backtracks badly, so the budget is the guard. On top of it, "reject"
+    mode refuses patterns the analysis flags (best-effort, at compile
+    time, and skipped for syntax the stdlib parser does not know);
+    "timeout" and "off" skip the analysis.
+    """
+
+    def __init__(self, max_size: int = 1024, mode: str = "reject", timeout: float = 0.05):
+        if mode not in SAFETY_MODES:
+            raise ValueError(f"Unknown pattern safety mode '{mode}'")
+        self.max_size = max_size
+        self.mode = mode
+        self.timeout = timeout
+        self._patterns: "OrderedDict[str, Union[Any, InvalidPatternError]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, pattern: str):
+        """
+        Compiled pattern (from cache when possible)
+
+        Raises:
+            InvalidPatternError: The pattern does not compile or is refused as unsafe
+        """
+        with self._lock:
+            compiled = self._patterns.get(pattern)
+            if compiled is not None:
+                self._patterns.move_to_end(pattern)
+
+        if compiled is None:
+            compiled = self._compile(pattern)
+            with self._lock:
+                self._patterns[pattern] = compiled
+                if len(self._patterns) > self.max_size:
+                    self._patterns.popitem(last=False)
+
+        if isinstance(compiled, InvalidPatternError):
+            # A fresh exception each time, so cached ones don't collect tracebacks
+            raise InvalidPatternError(compiled.pattern, compiled.reason)
+        return compiled
+
+    def _compile(self, pattern: str):
+        try:
+            compiled = regex.compile(pattern)
+        except regex.error as e:
+            return InvalidPatternError(pattern, str(e))
+
+        if self.mode == "reject":
+            try:
+                with warnings.catch_warnings():
+                    # e.g. FutureWarning for [[:alpha:]], a nested set to `re`
+                    warnings.simplefilter("ignore")
+                    risk = find_backtracking_risk(pattern)
+            except re.error:
+                # Syntax only `regex` knows, e.g. \p{L}: nothing to analyse with
+                logger.debug("Backtracking analysis skipped for pattern %r", pattern)
+                risk = None
+            if risk is not None:
+                return InvalidPatternError(pattern, risk)
+        return compiled
+
+    def match(self, pattern: str, value: str) -> bool:
+        """
+        Whether pattern matches at the start of value
+
+        Raises:
+            InvalidPatternError: The pattern does not compile or is refused as unsafe
+            TimeoutError: The match ran out of its time budget
+        """
+        return self.compile(pattern).match(value, timeout=self.timeout) is not None
+
+    def check_rules(self, rules: Iterable[Any]):
+        """
+        Compile every custom pattern of a rule set up front
+
+        Raises:
+            InvalidPatternError: For the first rule whose pattern is unusable
+        """
+        for rule in rules:
+            if rule.type == "custom" and rule.pattern:
+                try:
+                    self.compile(rule.pattern)
+                except InvalidPatternError as e:
+                    raise InvalidPatternError(e.pattern, e.reason, field=rule.field)
+
+
+# Global instance
+_pattern_cache = None
+
+def get_pattern_cache() -> PatternCache:
+    """Get or create the process-wide pattern cache"""
+    global _pattern_cache
+    if _pattern_cache is None:
+        _pattern_cache = PatternCache(
+            max_size=settings.PATTERN_CACHE_SIZE,
+            mode=settings.PATTERN_SAFETY_MODE,
+            timeout=settings.PATTERN_MATCH_TIMEOUT
+        )
+    return _pattern_cache
@@ -6,10 +6,11 @@ Validate data against various rules and patterns
 import re
 from typing import Any, Optional
 from email_validator import validate_email, EmailNotValidError
-import phonenumbers
-from datetime import datetime
 
 from app.models.schemas import ValidationRule, FieldValidation
+from app.services.validation.dates import DateParser, get_date_parser
+from app.services.validation.patterns import InvalidPatternError, get_pattern_cache
+from app.services.phone.normalizer import DEFAULT_REGION, PhoneInfo, get_phone_normalizer
 
 
 class DataValidator:
@@ -108,40 +109,30 @@ class DataValidator:
                 suggestion=None
             )
     
-    def _validate_phone(self, field: str, value: str) -> FieldValidation:
+    def _validate_phone(self, field: str, value: str, region: str = DEFAULT_REGION) -> FieldValidation:
         """Validate phone number"""
-        try:
-            # Parse phone number (default to US if no country code)
-            parsed = phonenumbers.parse(value, "US")
+        # Parse phone number (default to region if no country code); cached per number
+        return self._phone_validation(field, value, get_phone_normalizer().parse(value, region))
+    
+    def _phone_validation(self, field: str, value: str, info: PhoneInfo) -> FieldValidation:
+        """Validation result of an already parsed phone number"""
+        if info.valid:
+            # Format as international
+            formatted = info.international
             
-            if phonenumbers.is_valid_number(parsed):
-                # Format as international
-                formatted = phonenumbers.format_number(
-                    parsed,
-                    phonenumbers.PhoneNumberFormat.INTERNATIONAL
-                )
-                
-                return FieldValidation(
-                    field=field,
-                    valid=True,
-                    value=value,
-                    error=None,
-                    suggestion=formatted if formatted != value else None
-                )
-            else:
-                return FieldValidation(
-                    field=field,
-                    valid=False,
-                    value=value,
-                    error="Invalid phone number",
-                    suggestion=None
-                )
-        except phonenumbers.NumberParseException as e:
+            return FieldValidation(
+                field=field,
+                valid=True,
+                value=value,
+                error=None,
+                suggestion=formatted if formatted != value else None
+            )
+        else:
             return FieldValidation(
                 field=field,
                 valid=False,
                 value=value,
-                error=f"Invalid phone number: {str(e)}",
+                error=f"Invalid phone number: {info.error}" if info.error else "Invalid phone number",
                 suggestion=None
             )
     
@@ -169,33 +160,20 @@ class DataValidator:
                 suggestion=suggestion
             )
     
-    def _validate_date(self, field: str, value: str) -> FieldValidation:
+    def _validate_date(self, field: str, value: str, parser: Optional[DateParser] = None) -> FieldValidation:
         """Validate date"""
-        # Try common date formats
-        date_formats = [
-            '%Y-%m-%d',
-            '%m/%d/%Y',
-            '%d/%m/%Y',
-            '%Y/%m/%d',
-            '%B %d, %Y',
-            '%d %B %Y',
-        ]
+        # Try common date formats (see DATE_FORMATS); cached per distinct value
+        iso_format = (parser or get_date_parser()).to_iso(value)
         
-        for fmt in date_formats:
-            try:
-                parsed_date = datetime.strptime(value, fmt)
-                # Suggest ISO format
-                iso_format = parsed_date.strftime('%Y-%m-%d')
-                
-                return FieldValidation(
-                    field=field,
-                    valid=True,
-                    value=value,
-                    error=None,
-                    suggestion=iso_format if iso_format != value else None
-                )
-            except ValueError:
-                continue
+        if iso_format is not None:
+            # Suggest ISO format
+            return FieldValidation(
+                field=field,
+                valid=True,
+                value=value,
+                error=None,
+                suggestion=iso_format if iso_format != value else None
+            )
         
         return FieldValidation(
             field=field,
@@ -246,9 +224,9 @@ class DataValidator:
         )
     
     def _validate_pattern(self, field: str, value: str, pattern: str) -> FieldValidation:
-        """Validate against custom regex pattern"""
+        """Validate against custom regex pattern (compiled once, see PatternCache)"""
         try:
-            if re.match(pattern, value):
+            if get_pattern_cache().match(pattern, value):
                 return FieldValidation(
                     field=field,
                     valid=True,
@@ -264,11 +242,19 @@ class DataValidator:
                     error=f"Value does not match pattern: {pattern}",
                     suggestion=None
                 )
-        except re.error as e:
+        except InvalidPatternError as e:
+            return FieldValidation(
+                field=field,
+                valid=False,
+                value=value,
+                error=f"Invalid regex pattern: {e.reason}",
+                suggestion=None
+            )
+        except TimeoutError:
             return FieldValidation(
                 field=field,
                 valid=False,
                 value=value,
-                error=f"Invalid regex pattern: {str(e)}",
+                error="Pattern match timed out",
                 suggestion=None
             )
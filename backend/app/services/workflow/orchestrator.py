@@ -23,9 +23,16 @@ class ClearaWorkflowService:
         self.analytics = get_analytics()
         self.dedupe = get_dedupe_engine()
 
-    async def execute(self, raw_data: List[Dict[str, Any]], user_id: str) -> Dict[str, Any]:
+    async def execute(
+        self,
+        raw_data: List[Dict[str, Any]],
+        tenant: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Execute the full 9-step workflow
+        
+        tenant is the caller's get_tenant_id value, so compute work and
+        cached schemas share one tenant with the /v1 endpoints.
         """
         start_time = time.time()
         
@@ -34,7 +41,7 @@ class ClearaWorkflowService:
         preprocessed_data = [self.sanitizer.to_canonical_json(r) for r in raw_data]
         
         # Step 3: Schema Detection (Using first record as sample)
-        schema_info = await self.ai.detect_schema(preprocessed_data[0]) if preprocessed_data else {}
+        schema_info = await self.ai.detect_schema(preprocessed_data[0], tenant=tenant) if preprocessed_data else {}
         
         # Step 4 & 5: Cleaning + Validation
         # Process in batches or individually
@@ -46,7 +53,7 @@ class ClearaWorkflowService:
             cleaned_records.append(cleaned_record)
             
         # Step 6: Deduplication
-        unique_records = await self.dedupe.detect_duplicates(cleaned_records)
+        unique_records = await self.dedupe.detect_duplicates(cleaned_records, tenant=tenant)
         
         # Step 7: Enrichment
         final_records = []
@@ -0,0 +1,86 @@
+"""
+Cleaning Throughput Benchmark
+Compares per-record cleaning with the compiled, columnar batch path on synthetic contact rows
+
+Usage (from backend/):
+    python benchmarks/bench_cleaning.py --rows 1000000
+
+The per-record baseline is DataCleaner._clean_record_sync, the path that
+clean_record still takes. Outputs of every path are checked equal before
+timings are printed. The target is 10x the baseline throughput.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+sys.path.append('.')
+
+from app.models.schemas import CleaningOptions
+from app.services.cleaning.cleaner import DataCleaner
+
+TARGET_SPEEDUP = 10.0
+
+NAMES = ["  john  DOE ", "jane smith", "BOB\tmcdonald", "alice", "O'brien  pat", "Mary-Jane WATSON"]
+EMAILS = ["john@gmial.com", "Jane@Yahooo.com ", "x@gmail.com", "bad-email", "a@hotmial.co.uk", "bob@example.org"]
+PHONES = ["555-123-4567", "1 (555) 123 4567", "12345", " +44 20 7946 0958 ", "5551234567"]
+CITIES = [" New York ", "los angeles", None, "CHICAGO", "  austin"]
+
+
+def make_rows(count: int, seed: int = 1):
+    """Synthetic contact rows: mostly one layout, with a second layout mixed in"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        if i % 7 == 0:
+            rows.append({"id": i, "name": rng.choice(NAMES), "notes": "call  back  later"})
+        else:
+            rows.append({
+                "id": i,
+                "full_name": rng.choice(NAMES),
+                "email": rng.choice(EMAILS),
+                "phone": rng.choice(PHONES),
+                "city": rng.choice(CITIES),
+            })
+    return rows
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--explain", action="store_true", help="Record change explanations")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    cleaner = DataCleaner(CleaningOptions())
+    print(f"{args.rows:,} rows, explain={args.explain}")
+
+    baseline, t_baseline = timed(lambda: [cleaner._clean_record_sync(row, args.explain) for row in rows])
+    records, t_records = timed(lambda: cleaner.clean_batch(rows, args.explain))
+    compact, t_compact = timed(lambda: cleaner.clean_batch_compact(rows, args.explain, include_original=False))
+
+    assert [r.model_dump() for r in baseline] == [r.model_dump() for r in records]
+    assert [r.cleaned for r in baseline] == compact.cleaned
+
+    for label, seconds in (
+        ("per-record baseline", t_baseline),
+        ("clean_batch (CleanedRecord models)", t_records),
+        ("clean_batch_compact (no originals)", t_compact),
+    ):
+        speedup = t_baseline / seconds
+        print(f"  {label:<38} {seconds:7.2f}s  {args.rows / seconds:>11,.0f} rows/s  x{speedup:.1f}")
+
+    best = t_baseline / min(t_records, t_compact)
+    verdict = "met" if best >= TARGET_SPEEDUP else f"not met ({best:.1f}x of {TARGET_SPEEDUP:.0f}x on one core)"
+    print(f"Target {TARGET_SPEEDUP:.0f}x: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
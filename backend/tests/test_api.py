@@ -2,9 +2,11 @@
 Test suite for Cleara API
 """
 
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.models.schemas import CleanResponse
 
 client = TestClient(app)
 
@@ -87,6 +89,32 @@ def test_clean_data_email_typo():
     assert data["success"] is True
 
 
+@pytest.mark.parametrize("include_original", [True, False])
+def test_clean_data_matches_response_model(include_original):
+    """The chunk-encoded body is a valid CleanResponse"""
+    payload = {
+        "data": [
+            {"name": "  john DOE  ", "email": "john@gmial.com"},
+            {"name": "Jane", "email": "jane@example.com"}
+        ],
+        "options": {"trim": True, "normalize_case": True, "fix_emails": True},
+        "explain": True
+    }
+    
+    response = client.post(f"/v1/clean?include_original={str(include_original).lower()}", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    parsed = CleanResponse.model_validate(body)
+    assert set(body) == set(CleanResponse.model_fields)
+    assert parsed.total_records == 2
+    assert len(parsed.data) == 2
+    assert parsed.data[0].cleaned["name"] == "John Doe"
+    assert parsed.data[0].changes
+    assert all(("original" in record) is include_original for record in body["data"])
+    if include_original:
+        assert parsed.data[0].original == payload["data"][0]
+
+
 def test_clean_data_empty():
     """Test cleaning with empty data"""
     payload = {
@@ -97,6 +125,20 @@ def test_clean_data_empty():
     assert response.status_code == 422  # Validation error
 
 
+def test_clean_data_stream():
+    """Test NDJSON streaming cleaning"""
+    body = '{"name": "  john DOE  "}\n\n{"name": "jane smith"}\n'
+
+    response = client.post(
+        "/v1/clean/stream?normalize_case=true",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"name": "John Doe"}, {"name": "Jane Smith"}]
+
+
 # ============================================================================
 # VALIDATION TESTS
 # ============================================================================
@@ -152,6 +194,28 @@ def test_validate_phone():
     assert response.status_code == 200
 
 
+def test_validate_batch():
+    """Test batch validation bitmaps"""
+    payload = {
+        "data": [
+            {"email": "test@example.com", "age": 34},
+            {"email": "not-an-email", "age": 210}
+        ],
+        "rules": [
+            {"field": "email", "type": "email", "required": True},
+            {"field": "age", "min_value": 0, "max_value": 130}
+        ],
+        "details": True
+    }
+    
+    response = client.post("/v1/validate/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["errors"] == [0, 3]
+    assert [error["field"] for error in data["details"]["1"]] == ["email", "age"]
+
+
 # ============================================================================
 # DEDUPLICATION TESTS
 # ============================================================================
@@ -228,6 +292,20 @@ def test_schema_apply():
     assert data["success"] is True
 
 
+def test_schema_apply_stream():
+    """Test streaming schema mapping of a CSV file"""
+    body = 'user_email,age\r\njohn@example.com,30\r\n"jane@example.com",25\r\n'
+
+    response = client.post(
+        "/v1/schema-detect/apply/stream",
+        params={"mapping": json.dumps({"user_email": "email"})},
+        content=body,
+        headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.text == 'email,age\r\njohn@example.com,30\r\n"jane@example.com",25\r\n'
+
+
 # ============================================================================
 # ENRICHMENT TESTS
 # ============================================================================
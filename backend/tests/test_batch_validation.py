@@ -0,0 +1,182 @@
+"""
+Tests for column-wise batch validation
+"""
+
+import threading
+from typing import Any, List, NamedTuple, Optional
+
+import numpy as np
+import pytest
+
+from app.services.phone.normalizer import get_phone_normalizer
+from app.services.validation.batch import MAX_BATCH_RULES, BatchValidator
+from app.services.validation.patterns import InvalidPatternError
+
+
+class Rule(NamedTuple):
+    """Same fields as the API's BatchValidationRule"""
+    field: str
+    type: str = "any"
+    required: bool = False
+    pattern: Optional[str] = None
+    allowed_values: Optional[List[Any]] = None
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+
+def _failed(bitmap: int, rules: int) -> List[int]:
+    return [bit for bit in range(rules) if bitmap >> bit & 1]
+
+
+def test_bitmaps_set_one_bit_per_failing_rule():
+    """Bit i of a row is set exactly when rule i fails on that row"""
+    records = [
+        {"email": "a@example.com", "age": 30},
+        {"email": "not-an-email", "age": 30},
+        {"email": "b@example.com", "age": 200},
+        {"email": "broken", "age": -1},
+    ]
+    rules = [Rule("email", "email"), Rule("age", min_value=0, max_value=120)]
+    result = BatchValidator().validate_sync(records, rules)
+
+    assert [_failed(int(bitmap), 2) for bitmap in result.bitmaps] == [[], [0], [1], [0, 1]]
+    assert result.error_counts == [2, 2]
+    assert result.details is None
+
+
+def test_details_list_failures_of_invalid_rows_only():
+    records = [{"age": 5}, {"age": "old"}, {"age": 500}]
+    result = BatchValidator().validate_sync(records, [Rule("age", min_value=0, max_value=120)], details=True)
+
+    assert list(result.details) == [1, 2]
+    assert result.details[1] == [{"field": "age", "value": "old", "error": "Value is not a number", "suggestion": None}]
+    assert result.details[2][0]["error"] == "Value is above the maximum of 120"
+
+
+def test_required_and_missing_values():
+    """Missing or empty values fail only required rules and skip the other checks"""
+    records = [{"name": ""}, {}, {"name": None}, {"name": "Ann"}]
+    rules = [Rule("name", "name", required=True), Rule("name", "name", min_length=2)]
+    result = BatchValidator().validate_sync(records, rules, details=True)
+
+    assert result.error_counts == [3, 0]
+    assert {failure["error"] for row in result.details.values() for failure in row} == {"Field is required"}
+
+
+def test_each_distinct_value_is_checked_once():
+    validator = BatchValidator()
+    calls = []
+    single = validator.validator._validate_email
+    validator.validator._validate_email = lambda field, value: calls.append(value) or single(field, value)
+
+    records = [{"email": "a@example.com"}, {"email": "bad"}] * 50
+    result = validator.validate_sync(records, [Rule("email", "email")])
+
+    assert sorted(calls) == ["a@example.com", "bad"]
+    assert result.error_counts == [50]
+
+
+def test_equal_values_of_different_types_stay_apart():
+    """1, 1.0 and True share a hash but are separate distinct values"""
+    records = [{"flag": 1}, {"flag": 1.0}, {"flag": True}, {"flag": "1"}]
+    result = BatchValidator().validate_sync(records, [Rule("flag", allowed_values=[1])])
+
+    assert [int(bitmap) for bitmap in result.bitmaps] == [0, 1, 1, 1]
+
+
+def test_typed_rules_reject_non_strings():
+    result = BatchValidator().validate_sync([{"url": 42}], [Rule("url", "url")], details=True)
+    assert result.details[0][0]["error"] == "Expected a string"
+
+
+def test_length_limits_use_the_string_form():
+    records = [{"code": "ab"}, {"code": "abcd"}, {"code": 12345}]
+    result = BatchValidator().validate_sync(records, [Rule("code", min_length=3, max_length=4)], details=True)
+
+    assert sorted(result.details) == [0, 2]
+    assert result.details[0][0]["error"] == "Value is shorter than 3 characters"
+    assert result.details[2][0]["error"] == "Value is longer than 4 characters"
+
+
+def test_phone_region_is_inferred_per_column():
+    """National numbers of a UK dataset are read as UK numbers"""
+    records = [{"phone": "+44 20 7946 0958"}, {"phone": "020 7946 0018"}, {"phone": "020 7946 0321"}]
+    result = BatchValidator().validate_sync(records, [Rule("phone", "phone")], details=True)
+    assert result.error_counts == [0]
+
+    forced = BatchValidator().validate_sync(records, [Rule("phone", "phone")], phone_region="US")
+    assert forced.error_counts == [2]
+
+
+def test_phone_column_is_parsed_in_one_batch(monkeypatch):
+    """Distinct numbers go to the normalizer's batch API in one call per rule"""
+    normalizer = get_phone_normalizer()
+    calls = []
+    parse_batch = normalizer.parse_batch
+    monkeypatch.setattr(
+        normalizer, "parse_batch", lambda values, region=None: calls.append(list(values)) or parse_batch(values, region)
+    )
+
+    records = [{"phone": "+12025550143"}, {"phone": "nope"}, {"phone": 5}, {"phone": "+12025550143"}]
+    result = BatchValidator().validate_sync(records, [Rule("phone", "phone")], phone_region="US")
+
+    assert calls == [["+12025550143", "nope"]]
+    assert result.error_counts == [2]
+
+
+def test_unusable_pattern_is_refused_before_any_value_runs():
+    rules = [Rule("id", "custom", pattern="(a+)+$"), Rule("code", "custom", pattern="[")]
+    with pytest.raises(InvalidPatternError) as exc_info:
+        BatchValidator().validate_sync([{"id": "a", "code": "b"}], rules)
+    assert exc_info.value.field == "id"
+
+
+def test_rule_limit_keeps_bitmaps_exact():
+    """The last of MAX_BATCH_RULES rules still gets its own bit, one more is refused"""
+    rules = [Rule("x", allowed_values=["ok"]) for _ in range(MAX_BATCH_RULES - 1)] + [Rule("y", allowed_values=["ok"])]
+    result = BatchValidator().validate_sync([{"x": "ok", "y": "bad"}, {"x": "bad", "y": "ok"}], rules)
+
+    assert result.bitmaps.dtype == np.int64
+    assert int(result.bitmaps[0]) == 1 << (MAX_BATCH_RULES - 1)
+    assert int(result.bitmaps[1]) == (1 << (MAX_BATCH_RULES - 1)) - 1
+    # Every bitmap survives a round trip through a JSON (double) number
+    assert all(int(float(bitmap)) == int(bitmap) for bitmap in result.bitmaps)
+    assert result.error_counts == [1] * (MAX_BATCH_RULES - 1) + [1]
+
+    with pytest.raises(ValueError):
+        BatchValidator().validate_sync([{"x": "ok"}], rules + [Rule("x")])
+
+
+def test_empty_batch():
+    result = BatchValidator().validate_sync([], [Rule("x", "email", required=True)])
+    assert len(result.bitmaps) == 0
+    assert result.error_counts == [0]
+
+
+@pytest.mark.asyncio
+async def test_validate_matches_validate_sync():
+    records = [{"email": "a@example.com"}, {"email": "bad"}]
+    rules = [Rule("email", "email")]
+    result = await BatchValidator().validate(records, rules, details=True, tenant="key:test")
+    expected = BatchValidator().validate_sync(records, rules, details=True)
+
+    assert result.bitmaps.tolist() == expected.bitmaps.tolist()
+    assert result.details == expected.details
+
+
+@pytest.mark.asyncio
+async def test_small_batches_run_off_the_event_loop(monkeypatch):
+    threads = []
+    validator = BatchValidator()
+    validate_sync = validator.validate_sync
+
+    def recording_validate_sync(*args):
+        threads.append(threading.current_thread().name)
+        return validate_sync(*args)
+
+    monkeypatch.setattr(validator, "validate_sync", recording_validate_sync)
+    await validator.validate([{"email": "a@example.com"}], [Rule("email", "email")])
+
+    assert threads and threads[0].startswith("cleara-compute")
@@ -0,0 +1,64 @@
+"""
+Tests for deduplication blocking keys
+"""
+
+import pytest
+
+from app.services.deduplication.blocking import Blocker, _fields_for_kind
+
+
+@pytest.mark.parametrize("kind, field", [
+    ("email", "email"),
+    ("email", "user_email"),
+    ("email", "E-Mail"),
+    ("email", "contactEmail"),
+    ("phone", "phone_number"),
+    ("phone", "home_phone"),
+    ("phone", "mobile"),
+    ("name", "full_name"),
+    ("name", "customer_name"),
+    ("name", "lastName"),
+    ("postal_code", "zip"),
+    ("postal_code", "billing_postcode"),
+    ("postal_code", "postal_code"),
+])
+def test_field_aliases_match(kind, field):
+    """Alias names, with or without one qualifier, select the field"""
+    assert _fields_for_kind([field], kind) == [field]
+
+
+@pytest.mark.parametrize("kind, field", [
+    ("name", "hotel_name"),
+    ("name", "product_name"),
+    ("name", "username_changed"),
+    ("email", "email_verified"),
+    ("email", "mailing_list"),
+    ("phone", "is_mobile_user"),
+    ("phone", "detail"),
+    ("phone", "cancelled_at"),
+    ("phone", "hotel"),
+    ("postal_code", "zip_file"),
+])
+def test_field_aliases_reject_other_fields(kind, field):
+    """Fields that merely contain an alias are not selected"""
+    assert _fields_for_kind([field], kind) == []
+
+
+def test_unknown_kind_matches_exact_name():
+    """Kinds without aliases match the field of the same name only"""
+    assert _fields_for_kind(["city", "city_code"], "city") == ["city"]
+
+
+def test_blocks_ignore_lookalike_fields():
+    """A shared hotel name does not block different guests together"""
+    data = [
+        {"hotel_name": "Grand", "zip": "10001", "email": "a@example.com"},
+        {"hotel_name": "Grand", "zip": "10001", "email": "b@example.com"},
+        {"name": "Jo Doe", "zip": "10001", "email": "jo@example.com"},
+        {"name": "jo  doe", "zip": "10001", "email": "JO@example.com"},
+    ]
+    blocks, residual = Blocker().build_blocks(data)
+
+    # Both the email and the name + postal code keys block 2 and 3
+    assert blocks == [[2, 3], [2, 3]]
+    assert residual == [0, 1, 2]
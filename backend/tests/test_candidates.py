@@ -0,0 +1,57 @@
+"""
+Tests for deduplication candidate generation
+"""
+
+import logging
+
+import numpy as np
+
+from app.services.deduplication.candidates import (
+    SimHashIndex,
+    find_similar_pairs,
+    iter_similar_pairs,
+    normalize_embeddings,
+)
+
+
+def _clustered_embeddings(clusters=300, per_cluster=10, dim=32, noise=0.15, seed=7):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    points = np.repeat(centers, per_cluster, axis=0)
+    points += noise * rng.standard_normal(points.shape)
+    return normalize_embeddings(points)
+
+
+def test_lsh_recall_against_brute_force():
+    """LSH candidates find (nearly) every pair that exact scoring finds"""
+    matrix = _clustered_embeddings()
+    threshold = 0.85
+
+    exact = {(i, j): score for i, j, score in iter_similar_pairs(matrix, threshold)}
+    approx = find_similar_pairs(matrix, threshold, ann_min_records=0, recall=0.99)
+
+    assert exact
+    assert set(approx) <= set(exact)
+    assert len(set(approx) & set(exact)) / len(exact) >= 0.99
+    for pair, score in approx.items():
+        assert abs(score - exact[pair]) < 1e-5
+
+
+def test_table_cap_lowers_bits_to_keep_recall():
+    """With the table cap binding, fewer bits per table keep the target recall"""
+    index = SimHashIndex(threshold=0.85, recall=0.99, max_tables=8)
+    index.configure(1_000_000)
+
+    assert index.num_tables <= 8
+    assert index.expected_recall >= 0.99
+
+
+def test_table_cap_shortfall_is_logged(caplog):
+    """Fixed bits that cannot reach the recall within the cap log a warning"""
+    index = SimHashIndex(threshold=0.85, recall=0.99, bits=24, max_tables=4)
+    with caplog.at_level(logging.WARNING, logger="cleara.dedupe"):
+        index.configure(1_000_000)
+
+    assert index.num_tables == 4
+    assert index.expected_recall < 0.99
+    assert "recall capped" in caplog.text
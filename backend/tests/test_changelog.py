@@ -0,0 +1,96 @@
+"""
+Tests for compact cleaning results
+"""
+
+import pytest
+
+from app.services.cleaning.changelog import (
+    OP_CODES,
+    ChangeLog,
+    CleanedBatch,
+    change_confidence,
+)
+
+
+def test_change_log_stores_each_value_once():
+    """Before/after strings are shared across entries"""
+    log = ChangeLog()
+    log.add(0, 0, OP_CODES["trim"], " a ", "a")
+    log.add(2, 0, OP_CODES["trim"], " a ", "a")
+    log.add(2, 1, OP_CODES["case"], "a", "A")
+
+    assert len(log) == 3
+    assert log.values == [" a ", "a", "A"]
+    assert log.by_row() == {0: [0], 2: [1, 2]}
+
+
+@pytest.mark.parametrize("change_types, confidence", [
+    ([], 1.0),
+    (["trim"], 0.94),
+    (["trim", "case"], 0.87),
+    (["typo", "format"], 0.8),
+    (["typo"] * 10, 0.0),
+])
+def test_change_confidence(change_types, confidence):
+    """0.05 per change plus a penalty per change type, clamped to [0, 1]"""
+    assert change_confidence(change_types) == pytest.approx(confidence)
+
+
+def _batch(originals=None):
+    batch = CleanedBatch(2, explain=True, originals=originals)
+    batch.cleaned = [{"name": "A"}, {"name": "b"}]
+    batch.changes.add(0, batch.field_id("name"), OP_CODES["trim"], " a", "a")
+    batch.changes.add(0, batch.field_id("name"), OP_CODES["case"], "a", "A")
+    return batch
+
+
+def test_iter_records_shape():
+    """Records come out in CleanedRecord's shape, changes in recorded order"""
+    batch = _batch(originals=[{"name": " a"}, {"name": "b"}])
+    first, second = batch.iter_records()
+
+    assert first["original"] == {"name": " a"}
+    assert first["cleaned"] == {"name": "A"}
+    assert [(c["type"], c["before"], c["after"]) for c in first["changes"]] == [("trim", " a", "a"), ("case", "a", "A")]
+    assert first["changes"][0]["description"] == "Removed leading/trailing whitespace"
+    assert first["confidence"] == pytest.approx(change_confidence(["trim", "case"]))
+    assert second == {"original": {"name": "b"}, "cleaned": {"name": "b"}, "changes": [], "confidence": 1.0}
+    assert (batch.change_count, batch.changed_record_count) == (2, 1)
+
+
+def test_iter_records_without_originals():
+    """Originals are left out when not kept or not asked for"""
+    assert "original" not in next(_batch().iter_records())
+    assert "original" not in next(_batch(originals=[{}, {}]).iter_records(include_original=False))
+
+
+def test_batch_without_explain_has_no_changes():
+    batch = CleanedBatch(1)
+    batch.cleaned = [{"a": 1}]
+    assert batch.changes is None
+    assert list(batch.iter_records()) == [{"cleaned": {"a": 1}, "changes": [], "confidence": 1.0}]
+    assert (batch.change_count, batch.changed_record_count) == (0, 0)
+
+
+def test_concat_offsets_rows_and_remaps_fields():
+    """Joined batches keep every change on the right row and field"""
+    first = _batch()
+    second = CleanedBatch(1, explain=True)
+    second.cleaned = [{"email": "x@gmail.com", "name": "C"}]
+    second.changes.add(0, second.field_id("email"), OP_CODES["typo"], "x@gmial.com", "x@gmail.com")
+    second.changes.add(0, second.field_id("name"), OP_CODES["case"], "c", "C")
+
+    merged = CleanedBatch.concat([first, second], explain=True)
+
+    assert len(merged) == 3
+    assert merged.originals is None
+    records = list(merged.iter_records())
+    assert [(c["field"], c["type"]) for c in records[2]["changes"]] == [("email", "typo"), ("name", "case")]
+    assert [c["type"] for c in records[0]["changes"]] == ["trim", "case"]
+    assert merged.field_names == ["name", "email"]
+
+
+def test_concat_keeps_originals_only_if_every_batch_has_them():
+    with_originals = _batch(originals=[{"n": 1}, {"n": 2}])
+    assert CleanedBatch.concat([with_originals, with_originals], True).originals == [{"n": 1}, {"n": 2}] * 2
+    assert CleanedBatch.concat([with_originals, _batch()], True).originals is None
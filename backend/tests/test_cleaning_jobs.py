@@ -0,0 +1,254 @@
+"""
+Tests for the batch cleaning job worker
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.executor import ComputeExecutor
+from app.db.models import Base, CleaningJob, CleaningJobChunk
+from app.services.jobs import cleaning_jobs
+from app.services.jobs.cleaning_jobs import (
+    CleaningJobWorker,
+    cancel_cleaning_job,
+    get_job_results,
+    submit_cleaning_job,
+)
+
+TENANT = "key:0123456789abcdef"
+RECORDS = [{"name": f"  person {i}  ", "email": f"p{i}@gmial.com"} for i in range(5)]
+
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ComputeExecutor(max_workers=1, max_pending_per_tenant=2)
+    monkeypatch.setattr(cleaning_jobs, "get_compute_executor", lambda: executor)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_CHUNK_SIZE", 2)
+
+
+def make_worker(sessions, stale_after=60.0):
+    worker = CleaningJobWorker(concurrency=1, poll_interval=0.01, stale_after=stale_after)
+    worker._sessions = sessions
+    return worker
+
+
+async def submit(sessions):
+    async with sessions() as db:
+        job = await submit_cleaning_job(
+            db, user_id="user-1", records=RECORDS, options={"trim": True}, tenant=TENANT
+        )
+        return job.id
+
+
+async def load(sessions, job_id):
+    async with sessions() as db:
+        job = await db.get(CleaningJob, job_id)
+        chunks = (await db.execute(
+            select(CleaningJobChunk.status).where(CleaningJobChunk.job_id == job_id)
+            .order_by(CleaningJobChunk.chunk_index)
+        )).scalars().all()
+        return job, chunks
+
+
+@pytest.mark.asyncio
+async def test_claim_is_exclusive(sessions):
+    """A pending job is claimed by exactly one worker"""
+    job_id = await submit(sessions)
+
+    lease = await make_worker(sessions)._claim_next()
+    assert lease.job_id == job_id
+    assert await make_worker(sessions)._claim_next() is None
+
+    job, _ = await load(sessions, job_id)
+    assert job.status == "processing"
+    assert job.tenant == TENANT
+
+
+@pytest.mark.asyncio
+async def test_only_stale_jobs_are_reclaimed(sessions):
+    """A processing job is claimed again only once its heartbeat is stale"""
+    job_id = await submit(sessions)
+    await make_worker(sessions)._claim_next()
+
+    assert await make_worker(sessions, stale_after=60)._claim_next() is None
+
+    async with sessions() as db:
+        await db.execute(
+            update(CleaningJob).where(CleaningJob.id == job_id)
+            .values(heartbeat_at=datetime.utcnow() - timedelta(seconds=120))
+        )
+        await db.commit()
+    lease = await make_worker(sessions, stale_after=60)._claim_next()
+    assert lease.job_id == job_id
+
+
+@pytest.mark.asyncio
+async def test_job_runs_to_completion(sessions, executor):
+    """Every chunk is cleaned, checkpointed and counted once"""
+    job_id = await submit(sessions)
+    worker = make_worker(sessions)
+    await worker._process(await worker._claim_next())
+
+    job, chunks = await load(sessions, job_id)
+    assert job.status == "completed"
+    assert chunks == ["completed"] * 3
+    assert (job.chunks_completed, job.records_processed) == (3, 5)
+    async with sessions() as db:
+        results = await get_job_results(db, job, offset=1, limit=3)
+    assert [r["cleaned"]["name"] for r in results] == ["Person 1", "Person 2", "Person 3"]
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_checkpointed_chunks(sessions, executor):
+    """A reclaimed job resumes at its first pending chunk"""
+    job_id = await submit(sessions)
+    async with sessions() as db:
+        await db.execute(
+            update(CleaningJobChunk)
+            .where(CleaningJobChunk.job_id == job_id, CleaningJobChunk.chunk_index == 0)
+            .values(status="completed", output_data=[{"done": 1}, {"done": 2}])
+        )
+        await db.execute(
+            update(CleaningJob).where(CleaningJob.id == job_id).values(
+                status="processing",
+                chunks_completed=1,
+                records_processed=2,
+                heartbeat_at=datetime.utcnow() - timedelta(hours=1)
+            )
+        )
+        await db.commit()
+
+    worker = make_worker(sessions)
+    await worker._process(await worker._claim_next())
+
+    job, chunks = await load(sessions, job_id)
+    assert job.status == "completed"
+    assert (job.chunks_completed, job.records_processed) == (3, 5)
+    async with sessions() as db:
+        results = await get_job_results(db, job, limit=3)
+    assert results[:2] == [{"done": 1}, {"done": 2}]
+    assert results[2]["cleaned"]["name"] == "Person 2"
+
+
+@pytest.mark.asyncio
+async def test_cancel_pending_and_processing_jobs(sessions, executor):
+    """Pending jobs cancel at once; processing jobs stop at the next chunk"""
+    pending_id = await submit(sessions)
+    async with sessions() as db:
+        job = await cancel_cleaning_job(db, await db.get(CleaningJob, pending_id))
+        assert job.status == "cancelled"
+
+    job_id = await submit(sessions)
+    worker = make_worker(sessions)
+    lease = await worker._claim_next()
+    assert lease.job_id == job_id
+    async with sessions() as db:
+        job = await cancel_cleaning_job(db, await db.get(CleaningJob, job_id))
+        assert job.status == "processing" and job.cancel_requested
+
+    await worker._process(lease)
+    job, chunks = await load(sessions, job_id)
+    assert job.status == "cancelled"
+    assert chunks == ["pending"] * 3
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_a_chunk_waits(sessions, executor):
+    """A chunk waiting for a compute slot keeps its job from being reclaimed"""
+    job_id = await submit(sessions)
+    worker = make_worker(sessions, stale_after=0.3)
+    lease = await worker._claim_next()
+    claimed_at = lease.heartbeat_at
+
+    # The tenant's one interactive request leaves no slot for background work
+    async with executor.slot(TENANT):
+        task = asyncio.create_task(worker._process(lease))
+        await asyncio.sleep(0.6)
+        assert lease.heartbeat_at > claimed_at
+        assert await make_worker(sessions, stale_after=0.3)._claim_next() is None
+    await task
+
+    job, _ = await load(sessions, job_id)
+    assert job.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_stops_the_worker(sessions, executor):
+    """Once another worker holds the job, the first one writes nothing more"""
+    job_id = await submit(sessions)
+    worker = make_worker(sessions, stale_after=0.3)
+    lease = await worker._claim_next()
+
+    async with executor.slot(TENANT):
+        task = asyncio.create_task(worker._process(lease))
+        await asyncio.sleep(0.05)
+        # Another worker reclaims the job (claiming rewrites the heartbeat)
+        async with sessions() as db:
+            await db.execute(
+                update(CleaningJob).where(CleaningJob.id == job_id)
+                .values(heartbeat_at=datetime.utcnow() + timedelta(hours=1))
+            )
+            await db.commit()
+        await asyncio.wait_for(task, timeout=5)
+
+    assert lease.lost
+    job, chunks = await load(sessions, job_id)
+    assert job.status == "processing"
+    assert job.chunks_completed == 0
+    assert chunks == ["pending"] * 3
+
+
+@pytest.mark.asyncio
+async def test_init_db_adds_missing_job_columns(tmp_path):
+    """Databases created before batch jobs get the new cleaning_jobs columns"""
+    from sqlalchemy import inspect, text
+    from app.db.database import add_missing_columns
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE cleaning_jobs (id VARCHAR(36) PRIMARY KEY, user_id VARCHAR(36) NOT NULL, "
+            "job_type VARCHAR(50) NOT NULL, status VARCHAR(50))"
+        ))
+        await conn.execute(text(
+            "INSERT INTO cleaning_jobs (id, user_id, job_type, status) VALUES ('old', 'u', 'clean', 'completed')"
+        ))
+        await conn.run_sync(Base.metadata.create_all)
+        added = await conn.run_sync(add_missing_columns)
+        columns = await conn.run_sync(
+            lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns("cleaning_jobs")}
+        )
+        again = await conn.run_sync(add_missing_columns)
+    await engine.dispose()
+
+    assert {"cleaning_jobs.tenant", "cleaning_jobs.heartbeat_at", "cleaning_jobs.cancel_requested"} <= set(added)
+    assert {"tenant", "heartbeat_at", "chunks_completed", "options"} <= columns
+    assert again == []
+
+    sessions = sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}"), class_=AsyncSession)
+    async with sessions() as db:
+        job = await db.get(CleaningJob, "old")
+        assert job.chunks_completed == 0
+        assert job.cancel_requested is False
@@ -0,0 +1,174 @@
+"""
+Tests for compiled cleaning plans
+"""
+
+import pickle
+
+import pytest
+
+from app.models.schemas import CleaningOptions
+from app.services.cleaning.changelog import CleanedBatch
+from app.services.cleaning.cleaner import DataCleaner, clean_chunk
+from app.services.cleaning.plan import CleaningPlan, ValueMemo
+from app.services.phone.normalizer import get_phone_normalizer
+
+RECORDS = [
+    {"full_name": "  john  DOE ", "email": "John@gmial.com ", "phone": "555-123-4567", "city": " NYC ", "id": 1},
+    {"full_name": "jane smith", "email": None, "phone": "(555) 123 4567", "city": 42, "id": 2},
+    {"full_name": "  john  DOE ", "email": "x@example.com", "phone": "12345", "city": "la", "id": 3},
+]
+
+
+def _ops(plan):
+    return {field: [name for name, _ in ops] for field, ops in zip(plan.fields, plan.operations)}
+
+
+def test_compile_selects_operations_per_column():
+    """Options and field names are resolved once, at compile time"""
+    cleaner = DataCleaner(CleaningOptions())
+    plan = CleaningPlan.compile(cleaner, ("full_name", "email", "phone", "city"))
+    assert _ops(plan) == {
+        "full_name": ["trim", "whitespace", "case"],
+        "email": ["trim", "whitespace", "typo"],
+        "phone": ["trim", "whitespace", "format"],
+        "city": ["trim", "whitespace"],
+    }
+
+    cleaner = DataCleaner(CleaningOptions(trim=False, normalize_whitespace=False, fix_phones=False))
+    plan = CleaningPlan.compile(cleaner, ("UserName", "phone"))
+    assert _ops(plan) == {"UserName": ["case"], "phone": []}
+
+
+@pytest.mark.parametrize("explain", [False, True])
+@pytest.mark.parametrize("options", [
+    CleaningOptions(),
+    CleaningOptions(trim=False),
+    CleaningOptions(normalize_case=False, fix_emails=False),
+])
+def test_apply_matches_per_record_cleaning(options, explain):
+    """Column-wise results equal clean_record's, changes and order included"""
+    cleaner = DataCleaner(options)
+    expected = [cleaner._clean_record_sync(record, explain).model_dump() for record in RECORDS]
+
+    batch = CleanedBatch(len(RECORDS), explain=explain, originals=RECORDS)
+    CleaningPlan.compile(cleaner, tuple(RECORDS[0])).apply(batch, RECORDS)
+
+    assert [record.model_dump() for record in batch.to_cleaned_records()] == expected
+    assert all(list(cleaned) == list(record) for cleaned, record in zip(batch.cleaned, RECORDS))
+
+
+def test_apply_writes_to_given_rows():
+    """A layout group fills its own positions of a shared batch"""
+    cleaner = DataCleaner(CleaningOptions())
+    batch = CleanedBatch(4)
+    plan = CleaningPlan.compile(cleaner, ("name",))
+    plan.apply(batch, [{"name": " a "}, {"name": "b"}], rows=[3, 1])
+
+    assert batch.cleaned == [None, {"name": "B"}, None, {"name": "A"}]
+
+
+def test_memo_cleans_each_distinct_value_once():
+    """Repeated values are looked up, not recomputed"""
+    cleaner = DataCleaner(CleaningOptions())
+    memo = ValueMemo()
+    records = [{"name": " ann lee "}] * 5 + [{"name": "bo"}]
+    CleaningPlan.compile(cleaner, ("name",)).apply(CleanedBatch(len(records)), records, memo=memo)
+
+    stats = memo.stats()
+    assert (stats["hits"], stats["misses"], stats["items"]) == (4, 2, 2)
+
+
+def test_memo_is_bounded():
+    """Past max_items the least recently used values are evicted"""
+    cleaner = DataCleaner(CleaningOptions())
+    memo = ValueMemo(max_items=2)
+    records = [{"name": name} for name in ("a", "b", "c", "a")]
+    batch = CleanedBatch(len(records))
+    plan = CleaningPlan.compile(cleaner, ("name",))
+    plan.apply(batch, records, memo=memo)
+
+    assert memo.stats()["items"] == 2
+    assert memo.evictions == 1
+    assert [record["name"] for record in batch.cleaned] == ["A", "B", "C", "A"]
+
+    plan.apply(CleanedBatch(1), [{"name": "a"}], memo=memo)
+    assert (memo.misses, memo.evictions) == (4, 2)
+
+
+def test_memo_merge_adds_worker_counters():
+    memo = ValueMemo()
+    memo.merge({"hits": 3, "misses": 1, "evictions": 0, "items": 1})
+    memo.merge({"hits": 1, "misses": 1, "evictions": 2, "items": 1})
+    assert memo.stats() == {"hits": 4, "misses": 2, "evictions": 2, "hit_rate": 0.6667, "items": 2}
+
+
+def test_clean_batch_mixed_layouts_keep_input_order():
+    """Records are grouped by layout but come back in input order"""
+    cleaner = DataCleaner(CleaningOptions())
+    records = [{"name": " x "}, {"email": "a@gmial.com"}, {"name": "y", "id": 1}, {"name": "z "}]
+    batch = cleaner.clean_batch_compact(records, explain=True)
+
+    assert batch.cleaned == [{"name": "X"}, {"email": "a@gmail.com"}, {"name": "Y", "id": 1}, {"name": "Z"}]
+    assert [r.model_dump() for r in batch.to_cleaned_records()] == [
+        cleaner._clean_record_sync(record, True).model_dump() for record in records
+    ]
+
+
+def test_clean_chunk_matches_cleaner_and_pickles():
+    """The process-pool entry point pickles by reference and cleans like a DataCleaner"""
+    options = CleaningOptions()
+    assert pickle.loads(pickle.dumps(clean_chunk)) is clean_chunk
+
+    batch, stats = clean_chunk(RECORDS, options, explain=True, phone_region="US")
+    expected = DataCleaner(options).clean_batch_compact(RECORDS, explain=True, phone_region="US")
+    assert batch.cleaned == expected.cleaned
+    assert batch.originals is None
+    assert set(stats) >= {"hits", "misses"}
+
+
+def test_phone_region_is_passed_not_kept():
+    """Batches with different regions on one cleaner do not affect each other"""
+    cleaner = DataCleaner(CleaningOptions())
+    records = [{"phone": "020 7946 0958"}]
+
+    assert cleaner.clean_batch_compact(records, phone_region="GB").cleaned == [{"phone": "+44 20 7946 0958"}]
+    assert cleaner.clean_batch_compact(records, phone_region="US").cleaned == [{"phone": "020 7946 0958"}]
+    assert cleaner.clean_batch_compact(records, phone_region="GB").cleaned == [{"phone": "+44 20 7946 0958"}]
+    assert not hasattr(cleaner, "phone_region")
+
+
+def test_compiled_plan_binds_phone_region():
+    """The plan's phone operation reads national numbers in its compile-time region"""
+    cleaner = DataCleaner(CleaningOptions())
+    batch = CleanedBatch(1)
+    CleaningPlan.compile(cleaner, ("phone",), "GB").apply(batch, [{"phone": "020 7946 0958"}])
+
+    assert batch.cleaned == [{"phone": "+44 20 7946 0958"}]
+
+
+def test_phone_column_is_parsed_in_one_batch(monkeypatch):
+    """Numbers the US formats don't cover go to the normalizer's batch API, once per column"""
+    normalizer = get_phone_normalizer()
+    calls = []
+    parse_batch = normalizer.parse_batch
+    monkeypatch.setattr(
+        normalizer, "parse_batch", lambda values, region=None: calls.append(list(values)) or parse_batch(values, region)
+    )
+
+    records = [{"phone": number} for number in ("020 7946 0958", "020 7946 0018", "020 7946 0958", "12345")]
+    batch = DataCleaner(CleaningOptions()).clean_batch_compact(records, phone_region="GB")
+
+    assert calls == [["020 7946 0958", "020 7946 0018", "12345"]]
+    assert [record["phone"] for record in batch.cleaned] == [
+        "+44 20 7946 0958", "+44 20 7946 0018", "+44 20 7946 0958", "12345"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_clean_record_defaults_to_the_default_region():
+    """A single record is not a dataset: its own numbers don't pick the region"""
+    record = {"phone": "020 7946 0958", "mobile_phone": "+44 20 7946 0321"}
+    cleaner = DataCleaner(CleaningOptions())
+
+    assert (await cleaner.clean_record(record)).cleaned["phone"] == "020 7946 0958"
+    assert (await cleaner.clean_record(record, phone_region="GB")).cleaned["phone"] == "+44 20 7946 0958"
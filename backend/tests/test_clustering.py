@@ -0,0 +1,57 @@
+"""
+Tests for union-find duplicate clustering
+"""
+
+import random
+
+from app.services.deduplication.clustering import UnionFind, cluster_edges, strongest_links
+
+
+def test_chain_becomes_one_group():
+    """A~B and B~C put A and C together even though they were never compared"""
+    assert cluster_edges(3, [(0, 1), (1, 2)]) == [[0, 1, 2]]
+    assert cluster_edges(4, [(2, 3), (0, 1), (1, 3)]) == [[0, 1, 2, 3]]
+
+
+def test_singletons_are_kept():
+    assert cluster_edges(4, []) == [[0], [1], [2], [3]]
+    assert cluster_edges(5, [(1, 3)]) == [[0], [1, 3], [2], [4]]
+    assert cluster_edges(0, []) == []
+
+
+def test_self_and_repeated_edges_are_harmless():
+    assert cluster_edges(3, [(0, 0), (0, 2), (2, 0), (0, 2)]) == [[0, 2], [1]]
+
+
+def test_clusters_do_not_depend_on_edge_order():
+    rng = random.Random(7)
+    n = 200
+    edges = [(rng.randrange(n), rng.randrange(n)) for _ in range(150)]
+    expected = cluster_edges(n, edges)
+
+    for _ in range(20):
+        shuffled = [(j, i) if rng.random() < 0.5 else (i, j) for i, j in edges]
+        rng.shuffle(shuffled)
+        clusters = cluster_edges(n, shuffled)
+        assert clusters == expected
+        # The representative (first, smallest member) is the same too
+        assert [members[0] for members in clusters] == [members[0] for members in expected]
+
+
+def test_union_find_roots_agree_within_a_group():
+    uf = UnionFind(6)
+    assert uf.union(0, 1)
+    assert uf.union(2, 3)
+    assert uf.union(1, 3)
+    assert not uf.union(0, 2)
+
+    assert len({uf.find(idx) for idx in (0, 1, 2, 3)}) == 1
+    assert uf.find(4) == 4 and uf.find(5) == 5
+    assert uf.size[uf.find(0)] == 4
+
+
+def test_strongest_links_takes_the_best_edge_per_record():
+    edges = {(0, 1): 0.86, (1, 2): 0.97, (0, 2): 0.9, (3, 4): 0.88}
+
+    assert strongest_links(edges) == {0: 0.9, 1: 0.97, 2: 0.97, 3: 0.88, 4: 0.88}
+    assert strongest_links({}) == {}
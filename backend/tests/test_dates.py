@@ -0,0 +1,100 @@
+"""
+Tests for regex-gated date parsing
+"""
+
+from datetime import datetime
+from typing import Optional
+
+import pytest
+
+from app.services.validation.dates import DATE_FORMATS, DateParser
+
+
+def _strptime_iso(value: str) -> Optional[str]:
+    """Reference: plain strptime over DATE_FORMATS, first match wins"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+@pytest.mark.parametrize("value", [
+    "2024-01-05",
+    "2024-1-5",
+    "2024-01- 5",
+    "01/05/2024",
+    "1/5/2024",
+    "1/ 5/2024",
+    "25/12/2024",
+    "2024/12/25",
+    "March 5, 2024",
+    "march  5,   2024",
+    "March 05,\t2024",
+    "5 March 2024",
+    " 5 March 2024",
+    "05 DECEMBER 2024",
+    "2024-02-30",
+    "13/13/2024",
+    "2024-01-05 ",
+    " 2024-01-05",
+    "2024-01-05T10:00",
+    "Mar 5, 2024",
+    "5 Mar 2024",
+    "05.01.2024",
+    "20240105",
+    "2024/1/5/",
+    "",
+    "not a date",
+    "١٢/٠٥/٢٠٢٤",
+])
+def test_gates_never_reject_what_strptime_accepts(value):
+    """Gated parsing gives the same result as trying every format with strptime"""
+    assert DateParser().to_iso(value) == _strptime_iso(value)
+
+
+def test_value_matching_no_gate_is_invalid():
+    """Formats outside DATE_FORMATS fail without raising"""
+    parser = DateParser()
+    for value in ("05.01.2024", "Jan 5 2024", "2024-01-05T10:00:00Z", "5th March 2024"):
+        assert parser.to_iso(value) is None
+
+
+def test_format_without_a_gate_uses_strptime():
+    """Caller-supplied formats that have no gate are still parsed"""
+    parser = DateParser(['%d.%m.%Y', '%Y-%m-%d'])
+
+    assert parser.to_iso("05.01.2024") == "2024-01-05"
+    assert parser.to_iso("2024-01-05") == "2024-01-05"
+    assert parser.to_iso("32.01.2024") is None
+
+
+def test_infer_orders_formats_by_column():
+    """A day-first column reads ambiguous dates day-first"""
+    parser = DateParser.infer(["25/12/2024", "31/01/2024", "01/02/2024"])
+    assert parser.formats.index('%d/%m/%Y') < parser.formats.index('%m/%d/%Y')
+    assert parser.to_iso("01/02/2024") == "2024-02-01"
+
+
+def test_infer_keeps_default_order_on_ties():
+    """A lone ambiguous value, or no sample at all, stays month-first"""
+    assert DateParser.infer(["01/02/2024"]).to_iso("01/02/2024") == "2024-01-02"
+    assert DateParser.infer([]).formats == DATE_FORMATS
+    assert DateParser.infer([None, 5, "x"]).formats == DATE_FORMATS
+
+
+def test_infer_samples_only_the_first_values():
+    values = ["12/25/2024"] * 3 + ["25/12/2024"] * 10
+    assert DateParser.infer(values, sample_size=3).formats[0] == '%m/%d/%Y'
+
+
+def test_results_are_cached_and_cache_is_bounded():
+    parser = DateParser(cache_size=2)
+    assert parser.to_iso("2024-01-05") == "2024-01-05"
+    assert parser.to_iso("nope") is None
+    assert parser._cache == {"2024-01-05": "2024-01-05", "nope": None}
+
+    # Full: cleared before the next value is stored
+    parser.to_iso("2024-01-06")
+    assert parser._cache == {"2024-01-06": "2024-01-06"}
@@ -0,0 +1,258 @@
+"""
+Tests for the LLM-assisted deduplication engine
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.ml.registry import ModelRegistry
+from app.services.deduplication import engine as engine_module
+from app.services.deduplication.engine import DeduplicationEngine
+
+
+class StubProvider:
+    """Embedding provider whose batches fail as told"""
+
+    def __init__(self, failures=None, hang=False):
+        # Batch (by first text) -> number of calls that fail before it works;
+        # None fails for good
+        self.failures = failures or {}
+        self.hang = hang
+        self.calls = []
+
+    async def get_embeddings_batch(self, batch):
+        self.calls.append(list(batch))
+        key = batch[0]
+        if key in self.failures:
+            left = self.failures[key]
+            if left is None:
+                raise RuntimeError("provider down")
+            if left > 0:
+                self.failures[key] = left - 1
+                raise RuntimeError("flaky")
+        elif self.hang:
+            # Stands in for batches still retrying when another one gives up
+            await asyncio.Event().wait()
+        return [[float(len(text)), 1.0] for text in batch]
+
+
+class LocalModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded.append(list(texts))
+        return np.zeros((len(texts), 3))
+
+
+def _engine(provider):
+    engine = DeduplicationEngine.__new__(DeduplicationEngine)
+    engine.ai_service = provider
+    return engine
+
+
+@pytest.fixture
+def local_model(monkeypatch):
+    model = LocalModel()
+    monkeypatch.setattr(engine_module, "get_model_registry", lambda: ModelRegistry(loader=lambda name: model))
+    return model
+
+
+@pytest.fixture(autouse=True)
+def embedding_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "MAX_WORKERS", 2)
+    monkeypatch.setattr(settings, "MAX_RETRIES", 2)
+    monkeypatch.setattr(engine_module, "RETRY_BACKOFF_SECONDS", 0)
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_batched_in_order(local_model):
+    provider = StubProvider()
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    embeddings = await _engine(provider).get_embeddings(texts)
+
+    assert sorted(provider.calls) == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert embeddings.dtype == np.float32
+    assert embeddings[:, 0].tolist() == [1, 2, 3, 4, 5]
+    assert local_model.encoded == []
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried(local_model):
+    provider = StubProvider(failures={"ccc": 2})
+
+    embeddings = await _engine(provider).get_embeddings(["a", "bb", "ccc"])
+
+    assert provider.calls.count(["ccc"]) == 3
+    assert embeddings[:, 0].tolist() == [1, 2, 3]
+    assert local_model.encoded == []
+
+
+@pytest.mark.asyncio
+async def test_exhausted_batch_falls_back_to_local_model(local_model):
+    provider = StubProvider(failures={"ccc": None})
+    texts = ["a", "bb", "ccc"]
+
+    embeddings = await _engine(provider).get_embeddings(texts)
+
+    assert provider.calls.count(["ccc"]) == settings.MAX_RETRIES + 1
+    # Provider and local vectors cannot be mixed: everything is encoded locally
+    assert local_model.encoded == [texts]
+    assert embeddings.shape == (3, 3)
+
+
+@pytest.mark.asyncio
+async def test_fallback_cancels_other_batches(local_model):
+    """Batches still in flight or queued are not waited for"""
+    provider = StubProvider(failures={"a": None}, hang=True)
+    texts = [str(k) * 3 for k in range(10)]
+    texts[0] = "a"
+
+    embeddings = await asyncio.wait_for(_engine(provider).get_embeddings(texts), timeout=5)
+
+    assert local_model.encoded == [texts]
+    assert embeddings.shape == (10, 3)
+    # One worker retried the failing batch, the other held one hung batch;
+    # the three queued batches never reached the provider
+    assert len(provider.calls) == settings.MAX_RETRIES + 2
+
+
+@pytest.mark.asyncio
+async def test_fallback_without_local_model_raises(monkeypatch):
+    def missing(name):
+        raise OSError("not installed")
+
+    monkeypatch.setattr(engine_module, "get_model_registry", lambda: ModelRegistry(loader=missing))
+    provider = StubProvider(failures={"a": None})
+
+    with pytest.raises(RuntimeError):
+        await _engine(provider).get_embeddings(["a"])
+
+
+class StubResolver:
+    """Stands in for the LLM call in resolve_conflicts"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, group):
+        self.calls.append(group)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_on is not None and group[0]["name"] == self.fail_on:
+                raise RuntimeError("LLM unavailable")
+            return {"name": group[0]["name"].upper(), "resolved": True}
+        finally:
+            self.in_flight -= 1
+
+
+def _resolving_engine(resolver):
+    engine = _engine(StubProvider())
+    engine.resolve_conflicts = resolver
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_identical_groups_are_resolved_once():
+    resolver = StubResolver()
+    group = [{"name": "ann", "city": "Oslo"}, {"name": "ann", "city": "Bergen"}]
+    # Same records in another order: same canonical group
+    reordered = [dict(group[1]), dict(group[0])]
+
+    resolved = await _resolving_engine(resolver).resolve_groups([group, reordered])
+
+    assert len(resolver.calls) == 1
+    assert resolved == [{"name": "ANN", "resolved": True}] * 2
+    # Memoized results are copies
+    assert resolved[0] is not resolved[1]
+
+
+@pytest.mark.asyncio
+async def test_groups_without_conflicts_skip_the_llm():
+    resolver = StubResolver()
+    engine = _resolving_engine(resolver)
+    groups = [
+        [{"name": "solo"}],
+        [{"name": "Bo", "email": None}, {"name": " bo ", "email": "bo@example.com"}, {"name": "bo", "email": ""}],
+    ]
+
+    resolved = await engine.resolve_groups(groups)
+
+    assert resolver.calls == []
+    assert resolved == [{"name": "solo"}, {"name": "Bo", "email": "bo@example.com"}]
+
+
+def test_has_conflicts_ignores_case_whitespace_and_empty_values():
+    engine = _resolving_engine(StubResolver())
+
+    assert not engine.has_conflicts([{"a": "X ", "b": None}, {"a": "x", "b": "y"}])
+    assert engine.has_conflicts([{"a": "x"}, {"a": "z"}])
+    assert engine.has_conflicts([{"a": 1}, {"a": 2}])
+
+
+def test_merge_records_keeps_the_most_complete_value():
+    engine = _resolving_engine(StubResolver())
+
+    merged = engine.merge_records([
+        {"name": "J Smith", "phone": None},
+        {"name": "John Smith", "phone": "555"},
+        {"name": "", "phone": "5"},
+    ])
+
+    assert merged == {"name": "John Smith", "phone": "555"}
+
+
+@pytest.mark.asyncio
+async def test_llm_calls_are_bounded_by_max_workers():
+    resolver = StubResolver()
+    groups = [[{"name": f"n{k}"}, {"name": f"m{k}"}] for k in range(8)]
+
+    resolved = await _resolving_engine(resolver).resolve_groups(groups)
+
+    assert len(resolver.calls) == 8
+    assert resolver.max_in_flight == settings.MAX_WORKERS
+    assert [record["name"] for record in resolved] == [f"N{k}" for k in range(8)]
+
+
+@pytest.mark.asyncio
+async def test_failed_resolution_falls_back_per_group():
+    resolver = StubResolver(fail_on="bad")
+    groups = [
+        [{"name": "bad", "city": "Oslo"}, {"name": "bad", "city": "Trondheim"}],
+        [{"name": "ok"}, {"name": "fine"}],
+    ]
+
+    resolved = await _resolving_engine(resolver).resolve_groups(groups)
+
+    # Only the failing group is merged by rule
+    assert resolved == [{"name": "bad", "city": "Trondheim"}, {"name": "OK", "resolved": True}]
+
+
+@pytest.mark.asyncio
+async def test_detect_duplicates_groups_off_the_event_loop(monkeypatch):
+    calls = []
+    find_groups = DeduplicationEngine._find_groups
+
+    def recording_find_groups(embeddings, threshold):
+        calls.append(threading.current_thread().name)
+        return find_groups(embeddings, threshold)
+
+    monkeypatch.setattr(DeduplicationEngine, "_find_groups", staticmethod(recording_find_groups))
+    engine = _resolving_engine(StubResolver())
+    data = [{"name": "ann"}, {"name": "ann"}, {"name": "zebedee"}]
+
+    unique = await engine.detect_duplicates(data, threshold=0.99, tenant="key:a")
+
+    assert calls and calls[0].startswith("cleara-compute")
+    assert unique == [{"name": "ann"}, {"name": "zebedee"}]
@@ -0,0 +1,165 @@
+"""
+Tests for email domain correction
+"""
+
+import pytest
+
+from app.services.cleaning.email_domains import (
+    ALLOWED_DOMAINS,
+    KNOWN_DOMAINS,
+    DomainCorrector,
+    is_typo_edit,
+    osa_distance,
+    split_domain,
+)
+
+
+@pytest.fixture(scope="module")
+def corrector():
+    return DomainCorrector()
+
+
+@pytest.mark.parametrize("typo, domain", [
+    ("gmial.com", "gmail.com"),
+    ("gmail.con", "gmail.com"),
+    ("gmal.com", "gmail.com"),
+    ("yahooo.com", "yahoo.com"),
+    ("hotmial.com", "hotmail.com"),
+    ("gmail.cmo", "gmail.com"),
+    ("outlok.com", "outlook.com"),
+    ("iclod.com", "icloud.com"),
+    ("hotmial.co.uk", "hotmail.co.uk"),
+    ("hotmial.con", "hotmail.com"),
+    ("liev.com", "live.com"),
+    ("outlok.con", "outlook.com"),
+    ("gmail.cpm", "gmail.com"),
+    ("gmaill.com", "gmail.com"),
+])
+def test_typos_are_corrected(corrector, typo, domain):
+    """Common misspellings map to the intended domain"""
+    assert corrector.correct(typo) == domain
+
+
+@pytest.mark.parametrize("domain", [
+    "email.com",
+    "mail.ru",
+    "gmx.net",
+    "yahoo.fr",
+    "hotmail.de",
+    "live.co.uk",
+    "att.com",
+    "cox.com",
+    "ge.com",
+    "gm.com",
+    "ms.com",
+    "ee.com",
+    "box.net",
+    "max.com",
+    "hive.com",
+    "soho.com",
+    "hotmail.ca",
+    "hotmail.co",
+    "yahoo.cm",
+    "cloud.com",
+    "horizon.net",
+    "webb.de",
+    "mails.com",
+    "mymail.com",
+    "tmail.com",
+    "hmail.com",
+    "amail.com",
+    "gnail.com",
+])
+def test_real_domains_are_kept(corrector, domain):
+    """Real domains one or two edits from a known one are not rewritten"""
+    assert corrector.correct(domain) == domain
+
+
+@pytest.mark.parametrize("domain", ["example.com", "acme-corp.io", "university.edu", "x.co"])
+def test_unrelated_domains_are_kept(corrector, domain):
+    """Domains far from every known domain pass through"""
+    assert corrector.correct(domain) == domain
+
+
+def test_known_and_allowed_domains_do_not_overlap():
+    """A domain is either a correction target or merely allowed"""
+    assert not set(KNOWN_DOMAINS) & set(ALLOWED_DOMAINS)
+
+
+def test_two_edits_need_a_malformed_suffix(corrector):
+    """A second edit is only corrected when it is in a malformed suffix"""
+    assert corrector.correct("outlok.con") == "outlook.com"
+    assert corrector.correct("outlok.net") == "outlok.net"
+    assert corrector.correct("gmial.cm") == "gmial.cm"
+    # Two slips in the name: a different name, not a typo
+    assert corrector.correct("gmia.com") == "gmia.com"
+
+
+@pytest.mark.parametrize("domain", ["ge.com", "gm.com", "ms.com", "max.com", "aol.con"])
+def test_short_names_are_never_corrected(corrector, domain):
+    """Two- and three-letter names are left alone, even next to a known domain"""
+    assert corrector.correct(domain) == domain
+
+
+@pytest.mark.parametrize("domain", ["hotmail.ca", "hotmail.co", "gmail.net", "yahoo.co.jp", "outlook.de"])
+def test_well_formed_suffixes_are_kept(corrector, domain):
+    """A real top-level domain is never swapped for another"""
+    assert corrector.correct(domain) == domain
+
+
+def test_names_get_no_substitutions(corrector):
+    """hive/live differ in one letter; liev/live are a transposition"""
+    assert corrector.correct("hive.com") == "hive.com"
+    assert corrector.correct("liev.com") == "live.com"
+    assert corrector.correct("gnail.com") == "gnail.com"
+
+
+@pytest.mark.parametrize("typed, intended, slip", [
+    ("gmial", "gmail", True),
+    ("mgail", "gmail", True),
+    ("yahooo", "yahoo", True),
+    ("ggmail", "gmail", True),
+    ("gmal", "gmail", True),
+    ("gmai", "gmail", True),
+    ("outlok", "outlook", True),
+    ("gmail", "gmail", False),
+    ("tmail", "gmail", False),
+    ("gmali", "gmail", True),
+    ("mails", "mail", False),
+    ("mymail", "ymail", False),
+    ("cloud", "icloud", False),
+    ("gimal", "gmail", False),
+])
+def test_is_typo_edit(typed, intended, slip):
+    """Swaps, doubled letters and dropped letters past the first are slips"""
+    assert is_typo_edit(typed, intended) is slip
+
+
+@pytest.mark.parametrize("domain, parts", [
+    ("gmail.com", ("gmail", "com")),
+    ("hotmail.co.uk", ("hotmail", "co.uk")),
+    ("mail.example.co.uk", ("example", "co.uk")),
+    ("a.b.example.com", ("example", "com")),
+    ("localhost", ("localhost", "")),
+])
+def test_split_domain(domain, parts):
+    assert split_domain(domain) == parts
+
+
+def test_custom_allowlist():
+    """Callers can allow their own lookalike domains"""
+    corrector = DomainCorrector(allowed=("gmail.cpm",))
+    assert corrector.correct("gmail.cpm") == "gmail.cpm"
+    assert DomainCorrector(allowed=()).correct("gmail.cpm") == "gmail.com"
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("gmail.com", "gmail.com", 0),
+    ("gmial.com", "gmail.com", 1),
+    ("gmal.com", "gmail.com", 1),
+    ("email.com", "gmail.com", 1),
+    ("gamil.cmo", "gmail.com", 2),
+])
+def test_osa_distance(a, b, distance):
+    """Adjacent transpositions count as one edit"""
+    assert osa_distance(a, b, 2) == distance
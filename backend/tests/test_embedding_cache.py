@@ -0,0 +1,97 @@
+"""
+Tests for the embedding cache disk tier
+"""
+
+import logging
+
+import numpy as np
+
+from app.services.deduplication.embedding_cache import EmbeddingCache, _DiskStore
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float16)
+
+
+def test_disk_store_round_trip(tmp_path):
+    """Vectors written by one store are read back by a fresh one"""
+    keys = [f"k{i}" for i in range(5)]
+    vectors = _vectors(5)
+    _DiskStore(tmp_path).put_many(keys, vectors)
+
+    store = _DiskStore(tmp_path, read_only=True)
+    assert store.dim == 8
+    for key, vector in zip(keys, vectors):
+        assert np.array_equal(store.get(key), vector)
+    assert store.get("missing") is None
+
+
+def test_disk_store_shared_between_writers(tmp_path):
+    """Two writers on one directory append without clobbering each other's rows"""
+    first, second = _DiskStore(tmp_path), _DiskStore(tmp_path)
+    a, b = _vectors(3, seed=1), _vectors(3, seed=2)
+    first.put_many(["a0", "a1", "a2"], a)
+    second.put_many(["b0", "b1", "b2"], b)
+    first.refresh()
+
+    for store in (first, second, _DiskStore(tmp_path)):
+        for i in range(3):
+            assert np.array_equal(store.get(f"a{i}"), a[i])
+            assert np.array_equal(store.get(f"b{i}"), b[i])
+
+
+def test_disk_store_ignores_partial_key_line(tmp_path):
+    """A key line still being written is not indexed"""
+    _DiskStore(tmp_path).put_many(["a"], _vectors(1))
+    with open(tmp_path / "keys.txt", "a", encoding="utf-8") as f:
+        f.write("half")
+
+    store = _DiskStore(tmp_path)
+    assert store.get("a") is not None
+    assert "half" not in store.index
+
+
+def test_disk_store_drops_rows_missing_from_vector_file(tmp_path):
+    """Keys whose rows were cut off are misses, and are written again"""
+    vectors = _vectors(2)
+    _DiskStore(tmp_path).put_many(["a", "b"], vectors)
+    with open(tmp_path / "vectors.f16", "r+b") as f:
+        f.truncate(8 * 2)
+
+    store = _DiskStore(tmp_path)
+    assert np.array_equal(store.get("a"), vectors[0])
+    assert store.get("b") is None
+
+    store.put_many(["b"], vectors[1:])
+    assert np.array_equal(_DiskStore(tmp_path).get("b"), vectors[1])
+
+
+def test_disk_store_corrupt_header_starts_over(tmp_path, caplog):
+    """An unreadable key file is logged and the store is rewritten"""
+    _DiskStore(tmp_path).put_many(["a"], _vectors(1))
+    (tmp_path / "keys.txt").write_text("garbage\na\n", encoding="utf-8")
+
+    with caplog.at_level(logging.WARNING, logger="cleara.dedupe"):
+        store = _DiskStore(tmp_path)
+    assert "corrupt" in caplog.text
+    assert store.get("a") is None
+
+    vectors = _vectors(1, dim=4)
+    store.put_many(["c"], vectors)
+    reloaded = _DiskStore(tmp_path)
+    assert reloaded.dim == 4
+    assert np.array_equal(reloaded.get("c"), vectors[0])
+
+
+def test_embedding_cache_tiers(tmp_path):
+    """Hits come from memory first, then from disk after a restart"""
+    cache = EmbeddingCache(cache_dir=str(tmp_path))
+    key = EmbeddingCache.make_key("model/a", "john doe")
+    cache.put_many("model/a", [key], _vectors(1))
+
+    assert set(cache.get_many("model/a", [key, "other"])) == {0}
+    assert cache.memory_hits == 1 and cache.misses == 1
+
+    restarted = EmbeddingCache(cache_dir=str(tmp_path))
+    assert set(restarted.get_many("model/a", [key])) == {0}
+    assert restarted.disk_hits == 1
@@ -0,0 +1,101 @@
+"""
+Tests for the shared compute executor
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.executor import ComputeExecutor, ComputeQueueFull
+
+
+@pytest.fixture
+def executor():
+    executor = ComputeExecutor(max_workers=2, max_pending_per_tenant=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_slot_limits_pending_jobs_per_tenant(executor):
+    """A tenant past its limit fails fast; other tenants are unaffected"""
+    async with executor.slot("key:a"):
+        async with executor.slot("key:a"):
+            with pytest.raises(ComputeQueueFull) as exc_info:
+                async with executor.slot("key:a"):
+                    pass
+            assert exc_info.value.tenant == "key:a"
+            assert exc_info.value.limit == 2
+
+            async with executor.slot("key:b"):
+                assert executor.stats()["pending_jobs"] == 3
+
+
+@pytest.mark.asyncio
+async def test_slot_reserve_leaves_room_for_other_jobs(executor):
+    """A reserving job never takes the tenant's last free slot"""
+    async with executor.slot("key:a", reserve=1):
+        with pytest.raises(ComputeQueueFull):
+            async with executor.slot("key:a", reserve=1):
+                pass
+        async with executor.slot("key:a"):
+            pass
+
+    # Capped at limit - 1, so an idle tenant can always run one job
+    async with executor.slot("key:b", reserve=5):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_slot_is_released_on_error(executor):
+    """Slots are returned even when the job raises"""
+    with pytest.raises(ValueError):
+        async with executor.slot("key:a"):
+            raise ValueError("boom")
+
+    stats = executor.stats()
+    assert stats["pending_jobs"] == 0
+    assert stats["active_tenants"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_without_limit_and_without_tenant():
+    """A limit of 0 disables the check; a missing tenant counts as anonymous"""
+    executor = ComputeExecutor(max_workers=1, max_pending_per_tenant=0)
+    try:
+        async with executor.slot(None):
+            async with executor.slot(None):
+                async with executor.slot(None):
+                    assert executor._pending == {"anonymous": 3}
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_in_thread_uses_compute_threads(executor):
+    """Thread jobs run off the event loop thread, on the compute pool"""
+    name = await executor.run_in_thread(lambda: threading.current_thread().name)
+    assert name.startswith("cleara-compute")
+
+
+@pytest.mark.asyncio
+async def test_run_in_process(executor):
+    """Process jobs run in a lazily started pool and return their result"""
+    assert executor.stats()["process_pool_started"] is False
+
+    results = await asyncio.gather(
+        executor.run_in_process(pow, 2, 10),
+        executor.run_in_process(sorted, [3, 1, 2], reverse=True)
+    )
+
+    assert results == [1024, [3, 2, 1]]
+    assert executor.stats()["process_pool_started"] is True
+
+
+def test_stats(executor):
+    """Stats report the configured limits"""
+    stats = executor.stats()
+    assert stats["max_workers"] == 2
+    assert stats["max_pending_per_tenant"] == 2
+    assert stats["pending_jobs"] == 0
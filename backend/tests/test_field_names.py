@@ -0,0 +1,60 @@
+"""
+Tests for field-name resolution used by schema detection
+"""
+
+import pytest
+
+from app.services.schema_detection.field_names import FieldNameIndex, tokenize
+
+
+def test_tokenize_splits_case_and_separators():
+    assert tokenize("userEmail-Address") == ["user", "email", "address"]
+    assert tokenize("  HTTPStatus_code ") == ["http", "status", "code"]
+    assert tokenize("__") == []
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("E-Mail", "email"),
+    ("eMail", "email"),
+    ("Phone Number", "phone"),
+    ("billing_zip_code", "zip"),
+    ("role_id", "id"),
+    ("adress", "address"),
+    ("width", None),
+    ("valid", None),
+    ("statement", None),
+    ("", None),
+])
+def test_resolve(name, expected):
+    assert FieldNameIndex().resolve(name) == expected
+
+
+def test_group_keeps_vocabulary_then_input_order():
+    groups = FieldNameIndex().group(["Notes", "email", "fname", "Email Address", "first_name", "notes"])
+    assert groups == {
+        "email": ["email", "Email Address"],
+        "first_name": ["fname", "first_name"],
+        "notes": ["Notes", "notes"],
+    }
+
+
+def test_resolve_is_cached():
+    index = FieldNameIndex(cache_size=1)
+    assert index.resolve("fname") == "first_name"
+    assert index._cache == {"fname": "first_name"}
+    index.resolve("lname")
+    assert index._cache == {"lname": "last_name"}
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("E-Mail", "email"),
+    ("Full Name", "name"),
+    ("postcode", "zip"),
+    ("billing_zip_code", None),
+    ("is_mobile_user", None),
+    ("adress", None),
+    ("", None),
+])
+def test_lookup_matches_whole_names_only(name, expected):
+    """No longest-run or trigram fallback"""
+    assert FieldNameIndex().lookup(name) == expected
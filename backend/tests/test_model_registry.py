@@ -0,0 +1,114 @@
+"""
+Tests for the process-wide model registry
+"""
+
+import threading
+
+from app.ml.registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded.append(list(texts))
+        return [[0.0] for _ in texts]
+
+
+class CountingLoader:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, name):
+        with self.lock:
+            self.calls.append(name)
+        if self.fail:
+            raise RuntimeError("no weights")
+        return FakeModel(name)
+
+
+def test_model_is_loaded_once_and_shared():
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+
+    first = registry.get("mini")
+    assert registry.get("mini") is first
+    assert registry.is_loaded("mini")
+    assert loader.calls == ["mini"]
+
+    registry.get("other")
+    assert loader.calls == ["mini", "other"]
+
+
+def test_concurrent_first_use_loads_once():
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(registry.get("mini"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == ["mini"]
+    assert all(model is results[0] for model in results)
+
+
+def test_failed_load_is_remembered():
+    """Requests fall back at once instead of retrying the load on every call"""
+    loader = CountingLoader(fail=True)
+    registry = ModelRegistry(loader=loader)
+
+    assert registry.get("mini") is None
+    assert registry.get("mini") is None
+    assert loader.calls == ["mini"]
+    assert not registry.is_loaded("mini")
+    assert registry.status()["mini"] == {"loaded": False, "error": "no weights"}
+
+
+def test_warm_up_runs_one_inference():
+    registry = ModelRegistry(loader=CountingLoader())
+    registry.warm_up("mini")
+
+    model = registry.get("mini")
+    assert len(model.encoded) == 1
+    assert registry.status()["mini"]["warmup_ms"] is not None
+
+
+def test_warm_up_skips_unavailable_model():
+    registry = ModelRegistry(loader=CountingLoader(fail=True))
+    registry.warm_up("mini")
+
+    assert registry.status()["mini"]["loaded"] is False
+
+
+def test_preload_without_warm_up():
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+    registry.preload(["mini", "other"], warm_up=False)
+
+    assert loader.calls == ["mini", "other"]
+    assert registry.get("mini").encoded == []
+    assert registry.status()["mini"]["warmup_ms"] is None
+
+
+def test_status_reports_load_metrics():
+    registry = ModelRegistry(loader=CountingLoader())
+    registry.get("mini")
+
+    info = registry.status()["mini"]
+    assert info["loaded"] is True
+    assert info["error"] is None
+    assert info["load_time_ms"] >= 0
+    # FakeModel has no torch parameters
+    assert info["parameter_bytes"] is None
+    assert set(info) == {"loaded", "load_time_ms", "parameter_bytes", "rss_delta_bytes", "warmup_ms", "error"}
+
+    # status returns copies
+    registry.status()["mini"]["loaded"] = False
+    assert registry.status()["mini"]["loaded"] is True
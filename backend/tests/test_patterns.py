@@ -0,0 +1,193 @@
+"""
+Tests for custom pattern safety checks and the pattern cache
+"""
+
+import time
+
+import pytest
+
+import regex
+
+from app.services.validation import patterns
+from app.services.validation.patterns import (
+    InvalidPatternError,
+    PatternCache,
+    find_backtracking_risk,
+)
+
+
+@pytest.mark.parametrize("pattern", [
+    # Nested quantifiers
+    r"(a+)+",
+    r"(\w+\s?)*",
+    r"(.*x){20}",
+    r"(\w+\.\w+)*$",
+    r"(\d+\.?)+x",
+    r"((ab)+)*",
+    r"(a+|b)*",
+    r"(x+x+)+y",
+    # Overlapping alternatives under a quantifier
+    r"(a|a)*b",
+    r"(a|aa)*b",
+    r"(a|b|a)+",
+    r"(.|a)*",
+    r"(\w|\d)+$",
+    r"(?:x|\w)+y",
+    r"(?:a|a){20}",
+    r"(?i)(a|A)+",
+    r"(ж|\w)+!",
+])
+def test_risky_patterns_are_flagged(pattern):
+    assert find_backtracking_risk(pattern) is not None
+
+
+@pytest.mark.parametrize("pattern", [
+    r"^\d{3}-\d{4}$",
+    r"^[A-Z]{2}\d{6}$",
+    r"\w+@\w+\.\w+",
+    r"\d+-\d+",
+    r"[A-Z]+\d*",
+    r"\d{2}\d{2}",
+    r"(ab?)*",
+    r"(com|org|net)+",
+    r"(?:x|y)+",
+    r"(a|ab)*c",
+    r"(a|b){3}",
+    r"(a|a){2}",
+    r"(\w|\s)*?x",
+    r"^(\+\d{1,3})?\d{10}$",
+    r"[(|]+",
+    r"\(a|a\)*",
+    r"(a++)+",
+    r"(?>a+)+",
+    # A mandatory character the inner repeat cannot match fixes the split
+    r"^(\w+\.)*\w+$",
+    r"^\w+( \w+)*$",
+    r"^([a-z0-9]+-)*[a-z0-9]+$",
+    r"^[\w.+-]+@([\w-]+\.)+[a-z]{2,}$",
+    r"(\s*\w+\s*,)*",
+    r"((a+b)+c)*",
+    # Adjacent overlapping repeats are only polynomial
+    r"^.*\d+$",
+    r"\d*\d*\d*x",
+    r"(\d*)(\d*)x",
+])
+def test_safe_patterns_are_accepted(pattern):
+    assert find_backtracking_risk(pattern) is None
+
+
+@pytest.mark.parametrize("pattern", [r"^(\w+\.)*\w+$", r"^\w+( \w+)*$", r"^.*\d+$"])
+def test_reject_mode_accepts_linear_and_polynomial_patterns(pattern):
+    """Common patterns must keep working under the default mode"""
+    compiled = PatternCache(mode="reject").compile(pattern)
+    assert isinstance(compiled, regex.Pattern)
+
+
+@pytest.mark.parametrize("mode", ["reject", "timeout", "off"])
+def test_every_pattern_runs_on_regex(mode):
+    cache = PatternCache(mode=mode, timeout=0.05)
+    assert isinstance(cache.compile(r"^\d{3}$"), regex.Pattern)
+    assert cache.match(r"^\d{3}$", "123")
+
+
+@pytest.mark.parametrize("mode", ["timeout", "off"])
+def test_match_out_of_budget_raises_timeout(mode):
+    cache = PatternCache(mode=mode, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        cache.match(r"^(a|aa)+$", "a" * 60 + "b")
+
+
+def test_unflagged_exponential_pattern_is_time_limited():
+    """Regression: ^(a?){28}a{28}$ took 18 s on plain `re` under the default mode"""
+    pattern = r"^(a?){28}a{28}$"
+    assert find_backtracking_risk(pattern) is None
+
+    cache = PatternCache(timeout=0.05)
+    assert isinstance(cache.compile(pattern), regex.Pattern)
+    start = time.perf_counter()
+    try:
+        assert cache.match(pattern, "a" * 28)
+    except TimeoutError:
+        pass
+    assert time.perf_counter() - start < 1
+
+
+def test_timeout_mode_runs_risky_patterns_with_a_budget():
+    cache = PatternCache(mode="timeout", timeout=0.05)
+    assert isinstance(cache.compile(r"(a+)+$"), regex.Pattern)
+
+    assert cache.match(r"(a+)+$", "aaa")
+    assert not cache.match(r"^.*\d+$", "x" * 1000)
+
+
+def test_reject_mode_refuses_risky_patterns():
+    cache = PatternCache(mode="reject")
+    with pytest.raises(InvalidPatternError) as exc_info:
+        cache.compile(r"(a|a)*b")
+    assert "overlapping alternatives" in exc_info.value.reason
+
+    assert cache.match(r"^\d{3}-\d{4}$", "555-1234")
+
+
+def test_off_mode_compiles_everything():
+    assert PatternCache(mode="off").match(r"\d*\d*\d*x", "12x")
+
+
+def test_parser_is_found_on_this_python():
+    parser, maxrepeat = patterns._load_parser()
+    assert parser is not None and maxrepeat is not None
+    assert find_backtracking_risk(r"(a+)+") is not None
+
+
+def test_missing_parser_skips_the_analysis(monkeypatch):
+    """Without the stdlib parser patterns still compile and run with the time budget"""
+    monkeypatch.setattr(patterns, "sre_parse", None)
+    assert find_backtracking_risk(r"(a+)+") is None
+
+    cache = PatternCache(mode="reject", timeout=0.05)
+    assert isinstance(cache.compile(r"(a+)+$"), regex.Pattern)
+    with pytest.raises(TimeoutError):
+        cache.match(r"^(a|aa)+$", "a" * 60 + "b")
+
+
+@pytest.mark.parametrize("mode", ["reject", "timeout", "off"])
+@pytest.mark.parametrize("pattern, value", [
+    (r"^\p{L}+$", "Zoë"),
+    (r"^[[:alpha:]]+$", "abc"),
+    (r"^\w++!$", "abc!"),
+])
+def test_regex_only_syntax_is_accepted(mode, pattern, value):
+    """Patterns are validated by the engine that runs them, not by `re`"""
+    cache = PatternCache(mode=mode, timeout=0.05)
+    assert cache.match(pattern, value)
+
+
+def test_regex_compile_errors_are_refused():
+    with pytest.raises(InvalidPatternError):
+        PatternCache().compile(r"\p{NoSuchProperty}")
+
+
+def test_compile_errors_are_cached_and_raised_fresh():
+    cache = PatternCache()
+    with pytest.raises(InvalidPatternError) as first:
+        cache.compile("[")
+    with pytest.raises(InvalidPatternError) as second:
+        cache.compile("[")
+    assert first.value is not second.value
+    assert first.value.reason == second.value.reason
+
+
+def test_cache_is_bounded():
+    cache = PatternCache(max_size=2)
+    for pattern in ("a", "b", "c"):
+        cache.compile(pattern)
+    assert list(cache._patterns) == ["b", "c"]
+
+
+def test_check_rules_names_the_field():
+    class Rule:
+        field, type, pattern = "code", "custom", r"(\w|\d)+$"
+
+    with pytest.raises(InvalidPatternError) as exc_info:
+        PatternCache().check_rules([Rule()])
+    assert exc_info.value.field == "code"
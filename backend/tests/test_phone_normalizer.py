@@ -0,0 +1,113 @@
+"""
+Tests for shared phone number parsing
+"""
+
+import pytest
+
+from app.services.phone.normalizer import DEFAULT_REGION, PhoneNormalizer, _cache_key
+
+GB_NATIONAL = "020 7946 0958"
+GB_E164 = "+442079460958"
+
+
+@pytest.fixture
+def normalizer():
+    return PhoneNormalizer()
+
+
+@pytest.mark.parametrize("value, key", [
+    ("(555) 123-4567", "5551234567"),
+    ("555.123.4567", "5551234567"),
+    ("+1 555 123 4567", "+15551234567"),
+    ("+44 (0)20/7946-0958", "+4402079460958"),
+    ("555-CALL-NOW", "555-CALL-NOW"),
+    ("ext. 12", "ext. 12"),
+])
+def test_cache_key(value, key):
+    """Digits-and-separators values share a key; anything else is kept as is"""
+    assert _cache_key(value) == key
+
+
+def test_equivalent_formats_share_a_cache_entry(normalizer):
+    infos = [normalizer.parse(value) for value in ("(202) 555-0143", "202-555-0143", "202.555.0143")]
+    assert len(set(infos)) == 1
+    assert len(normalizer._cache) == 1
+
+
+def test_country_code_numbers_ignore_the_region(normalizer):
+    """"+..." numbers parse the same in every region and share one entry"""
+    assert normalizer.parse("+44 20 7946 0958", "US") == normalizer.parse("+44 20 7946 0958", "GB")
+    assert list(normalizer._cache) == [(GB_E164, None)]
+
+
+def test_national_numbers_are_cached_per_region(normalizer):
+    assert normalizer.parse(GB_NATIONAL, "GB").e164 == GB_E164
+    assert not normalizer.parse(GB_NATIONAL, "US").valid
+    assert len(normalizer._cache) == 2
+
+
+def test_cache_is_cleared_when_full():
+    normalizer = PhoneNormalizer(cache_size=2)
+    for value in ("+12025550143", "+12025550144", "+12025550145"):
+        normalizer.parse(value)
+    assert list(normalizer._cache) == [("+12025550145", None)]
+
+
+def test_unparseable_values_report_an_error(normalizer):
+    info = normalizer.parse("not a number")
+    assert not info.valid
+    assert info.error
+
+
+@pytest.mark.parametrize("values, region", [
+    ([GB_NATIONAL, "020 7946 0018", "+44 20 7946 0321"], "GB"),
+    (["(202) 555-0143", "202-555-0144"], DEFAULT_REGION),
+    ([GB_NATIONAL, "020 7946 0018"], DEFAULT_REGION),
+    (["+44 20 7946 0321", "555-123-4567", "(555) 987-6543"], DEFAULT_REGION),
+    (["+44 20 7946 0321"], DEFAULT_REGION),
+    ([], DEFAULT_REGION),
+])
+def test_infer_region(normalizer, values, region):
+    """
+    Only regions nominated by country-code numbers compete, scored by how
+    many national numbers are possible there; ties and no evidence keep the default
+    """
+    assert normalizer.infer_region(values) == region
+
+
+def test_infer_region_samples_the_first_values(normalizer):
+    values = ["+44 20 7946 0321", GB_NATIONAL, "020 7946 0018"]
+    assert normalizer.infer_region(values, sample_size=1) == DEFAULT_REGION
+    assert normalizer.infer_region(values, sample_size=2) == "GB"
+
+
+def test_parse_batch_matches_parse(normalizer):
+    values = [GB_NATIONAL, GB_E164, "+44 20 7946 0958", "garbage", "", 2025550143]
+    assert normalizer.parse_batch(values, "GB") == [PhoneNormalizer().parse(value, "GB") for value in values]
+
+
+def test_parse_batch_infers_the_region(normalizer):
+    infos = normalizer.parse_batch(["+44 20 7946 0321", GB_NATIONAL, "020 7946 0018"])
+    assert [info.region for info in infos] == ["GB"] * 3
+
+
+def test_e164_values_skip_the_cache_key(normalizer, monkeypatch):
+    """Values already in E.164 are looked up as they are, without a region"""
+    from app.services.phone import normalizer as module
+    calls = []
+    monkeypatch.setattr(module, "_cache_key", lambda value: calls.append(value) or _cache_key(value))
+
+    assert normalizer.parse_batch([GB_E164, GB_NATIONAL], "GB")[0].e164 == GB_E164
+    assert calls == [GB_NATIONAL]
+    assert (GB_E164, None) in normalizer._cache
+
+
+def test_to_e164(normalizer):
+    values = [GB_E164, GB_NATIONAL, None, "", "garbage"]
+    assert normalizer.to_e164(values, "GB") == [GB_E164, GB_E164, None, None, None]
+
+
+@pytest.mark.parametrize("value", ["+10000000000", "+999123456789", "+4400000000"])
+def test_to_e164_validates_e164_values(normalizer, value):
+    """Well-formed but invalid E.164 numbers are not passed through"""
+    assert normalizer.to_e164([value], "US") == [None]
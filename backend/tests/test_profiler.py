@@ -0,0 +1,215 @@
+"""
+Tests for the streaming column profiler
+"""
+
+import pytest
+
+from app.services.schema_detection.classifier import classify_value
+from app.services.schema_detection.profiler import (
+    EXACT_DISTINCT_LIMIT,
+    PROFILE_BLOCK_RECORDS,
+    SAMPLE_SIZE,
+    ColumnSketch,
+    HyperLogLog,
+    SchemaProfiler,
+    value_hash,
+)
+
+
+def _classify(value: str) -> str:
+    return "integer" if value.lstrip("-").isdigit() else "string"
+
+
+def _hll(values) -> HyperLogLog:
+    hll = HyperLogLog()
+    for value in values:
+        hll.add(value_hash(str(value)))
+    return hll
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 50_000, 200_000])
+def test_hll_estimate_is_close(n):
+    """Within a few standard errors (~1.6%) at small and large cardinalities"""
+    assert _hll(range(n)).estimate() == pytest.approx(n, rel=0.05)
+
+
+def test_hll_ignores_repeats():
+    assert _hll(list(range(1000)) * 5).estimate() == pytest.approx(1000, rel=0.05)
+
+
+def test_hll_empty_is_zero():
+    assert HyperLogLog().estimate() == 0
+
+
+def test_hll_merge_equals_union():
+    """Merging registers gives exactly the sketch of the union"""
+    a, b = _hll(range(0, 30_000)), _hll(range(20_000, 60_000))
+    a.merge(b)
+
+    assert a.registers == _hll(range(60_000)).registers
+    assert a.estimate() == pytest.approx(60_000, rel=0.05)
+
+
+def test_distinct_count_is_exact_then_estimated():
+    sketch = ColumnSketch()
+    sketch.add_values(list(range(EXACT_DISTINCT_LIMIT)), _classify)
+    assert sketch.distinct_count == EXACT_DISTINCT_LIMIT
+    assert sketch.hll is None
+
+    sketch.add_values(list(range(3 * EXACT_DISTINCT_LIMIT)), _classify)
+    assert sketch.hashes is None
+    assert sketch.distinct_count == pytest.approx(3 * EXACT_DISTINCT_LIMIT, rel=0.05)
+
+
+@pytest.mark.parametrize("sizes", [(3_000, 3_000), (100, 10_000), (10_000, 100)])
+def test_merge_of_exact_and_hll_sketches(sizes):
+    """Any mix of exact and HyperLogLog sides gives the count of the union"""
+    first, second = ColumnSketch(), ColumnSketch()
+    first.add_values(list(range(sizes[0])), _classify)
+    second.add_values(list(range(sizes[0] // 2, sizes[0] // 2 + sizes[1])), _classify)
+    first.merge(second)
+
+    union = max(sizes[0], sizes[0] // 2 + sizes[1])
+    if union <= EXACT_DISTINCT_LIMIT:
+        assert first.distinct_count == union
+    else:
+        assert first.distinct_count == pytest.approx(union, rel=0.05)
+
+
+def test_bottom_k_sample_keeps_smallest_hashes():
+    values = [f"value-{i}" for i in range(500)]
+    sketch = ColumnSketch()
+    sketch.add_values(values, _classify)
+
+    expected = sorted(values, key=value_hash)[:SAMPLE_SIZE]
+    assert sorted(sketch.sample.values(), key=value_hash) == expected
+    assert sketch.examples(3) == expected[:3]
+
+
+def test_bottom_k_sample_is_independent_of_chunking():
+    """Chunked-and-merged, reversed or single-pass: the same sample"""
+    values = [f"v{i % 700}" for i in range(5_000)]
+
+    whole = ColumnSketch()
+    whole.add_values(values, _classify)
+
+    merged = ColumnSketch()
+    for start in range(0, len(values), 333):
+        chunk = ColumnSketch()
+        chunk.add_values(values[start:start + 333], _classify)
+        merged.merge(chunk)
+
+    backwards = ColumnSketch()
+    backwards.add_values(values[::-1], _classify)
+
+    assert merged.sample == whole.sample == backwards.sample
+
+
+def test_sample_keeps_original_values():
+    """Samples hold the first value of each string form, not its str()"""
+    sketch = ColumnSketch()
+    sketch.add_values([1, "1", 2.5, None], _classify)
+    assert sorted(sketch.sample.values(), key=str) == [1, 2.5]
+
+
+def test_small_column_samples_every_distinct_value():
+    sketch = ColumnSketch()
+    sketch.add_values(["a", "b", "a"], _classify)
+    assert sorted(sketch.sample.values()) == ["a", "b"]
+
+
+def test_counts_lengths_and_ranges():
+    sketch = ColumnSketch()
+    sketch.add_values(["10", None, "-3", "abc", "10"], _classify)
+
+    assert (sketch.count, sketch.null_count, sketch.non_null_count) == (5, 1, 4)
+    assert sketch.type_votes == {"integer": 3, "string": 1}
+    assert (sketch.min_length, sketch.max_length) == (2, 3)
+    assert (sketch.numeric_count, sketch.min_value, sketch.max_value) == (3, -3.0, 10.0)
+
+
+def test_profiler_chunks_merge_to_single_pass():
+    records = [
+        {"id": i, "email": f"user{i % 50}@example.com", **({"note": None} if i % 3 else {})}
+        for i in range(2 * PROFILE_BLOCK_RECORDS + 17)
+    ]
+    whole = SchemaProfiler(_classify).update(records)
+
+    merged = SchemaProfiler(_classify)
+    for start in range(0, len(records), 500):
+        merged.merge(SchemaProfiler(_classify).update(records[start:start + 500]))
+
+    assert list(merged.columns) == list(whole.columns) == ["id", "email", "note"]
+    for field, sketch in whole.columns.items():
+        other = merged.columns[field]
+        assert vars(other).keys() == vars(sketch).keys()
+        for attribute in ("count", "null_count", "type_votes", "min_length", "max_length",
+                          "numeric_count", "min_value", "max_value", "hashes", "sample"):
+            assert getattr(other, attribute) == getattr(sketch, attribute), (field, attribute)
+
+
+def _chunked(records, chunk_size, settle_votes=0) -> SchemaProfiler:
+    profile = SchemaProfiler(classify_value, settle_votes=settle_votes)
+    for start in range(0, len(records), chunk_size):
+        profile.merge(SchemaProfiler(classify_value, settle_votes=settle_votes).update(records[start:start + chunk_size]))
+    return profile
+
+
+def _mixed_records():
+    """19,995 integers, then 20,000 emails: email wins by a handful of votes"""
+    return [{"x": i} for i in range(19_995)] + [{"x": f"user{i}@example.com"} for i in range(20_000)]
+
+
+@pytest.mark.parametrize("chunk_size", [333, 5_000, 7_777, 40_000])
+def test_chunked_votes_equal_single_pass_by_default(chunk_size):
+    """With settling off (the default), chunking never changes a vote"""
+    records = _mixed_records()
+    whole = SchemaProfiler(classify_value).update(records).columns["x"]
+    merged = _chunked(records, chunk_size).columns["x"]
+
+    assert merged.type_votes == whole.type_votes
+    assert whole.type_votes.most_common(1)[0][0] == "email"
+
+
+def test_settled_column_unsettles_when_the_sample_disagrees():
+    sketch = SchemaProfiler(classify_value, settle_votes=1_000).update(_mixed_records()).columns["x"]
+
+    assert sketch.settled_type is None
+    assert sketch.type_votes.most_common(1)[0][0] == "email"
+
+
+def test_repeated_value_of_another_type_is_always_checked():
+    """A value frequent in its block is classified even when its hash is not sampled"""
+    records = [{"x": i} for i in range(19_995)] + [{"x": "a@b.co"}] * 20_000
+    sketch = SchemaProfiler(classify_value, settle_votes=1_000).update(records).columns["x"]
+    assert sketch.type_votes["email"] == 20_000
+
+
+def test_settled_column_keeps_its_type():
+    sketch = SchemaProfiler(classify_value, settle_votes=1_000).update([{"x": i + 10} for i in range(5_000)]).columns["x"]
+
+    assert sketch.settled_type == "integer"
+    assert sketch.type_votes == {"integer": 5_000}
+
+
+def test_merge_does_not_carry_one_sides_settled_type():
+    """A settled chunk merged with a chunk of another type is no longer settled"""
+    ints = SchemaProfiler(classify_value, settle_votes=1_000).update([{"x": i + 10} for i in range(5_000)])
+    emails = SchemaProfiler(classify_value, settle_votes=1_000).update(
+        [{"x": f"user{i}@example.com"} for i in range(5_000)]
+    )
+    assert ints.columns["x"].settled_type == "integer"
+
+    ints.merge(emails)
+    sketch = ints.columns["x"]
+    assert sketch.settled_type is None
+
+    sketch.add_values([f"more{i}@example.com" for i in range(1_000)], classify_value)
+    assert sketch.type_votes["email"] == 6_000
+
+
+def test_merge_keeps_an_agreed_settled_type():
+    first = SchemaProfiler(classify_value, settle_votes=1_000).update([{"x": i + 10} for i in range(2_000)])
+    second = SchemaProfiler(classify_value, settle_votes=1_000).update([{"x": i + 10} for i in range(2_000)])
+    first.merge(second)
+    assert first.columns["x"].settled_type == "integer"
@@ -0,0 +1,98 @@
+"""
+Tests for compiled column rename plans
+"""
+
+import pytest
+
+from app.api.streaming import csv_line, read_csv_header
+from app.services.schema_detection.rename import RenamePlan
+
+MAPPING = {"user_email": "email", "Full Name": "name", "E-mail": "email"}
+
+
+def _rename(record, mapping):
+    """The per-record loop RenamePlan replaces"""
+    renamed = {}
+    for key, value in record.items():
+        renamed[mapping.get(key, key)] = value
+    return renamed
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.parametrize("record", [
+    {},
+    {"id": 1},
+    {"user_email": "a@b.co"},
+    {"id": 1, "Full Name": "Ann", "user_email": "a@b.co", "age": 30},
+    {"E-mail": "x@y.z", "user_email": "a@b.co"},
+    {"user_email": "a@b.co", "id": 2, "E-mail": "x@y.z"},
+    {"email": "kept@b.co", "user_email": "a@b.co"},
+])
+def test_apply_matches_the_plain_loop(record):
+    """Same keys, same values, same key order"""
+    renamed = RenamePlan(MAPPING).apply(record)
+    expected = _rename(record, MAPPING)
+    assert renamed == expected
+    assert list(renamed) == list(expected)
+
+
+def test_colliding_keys_keep_the_later_value_at_the_first_position():
+    renamed = RenamePlan(MAPPING).apply({"user_email": "first", "id": 1, "E-mail": "second"})
+    assert list(renamed.items()) == [("email", "second"), ("id", 1)]
+
+
+def test_untouched_records_are_passed_through_without_a_copy():
+    record = {"id": 1, "email": "a@b.co"}
+    plan = RenamePlan(MAPPING)
+    assert plan.apply(record) is record
+    assert plan.apply_many([record])[0] is record
+
+
+def test_renamed_records_are_new_dicts():
+    record = {"user_email": "a@b.co"}
+    renamed = RenamePlan(MAPPING).apply(record)
+    assert renamed is not record
+    assert record == {"user_email": "a@b.co"}
+
+
+def test_apply_many_equals_apply():
+    records = [{"id": i, **({"user_email": f"u{i}@b.co"} if i % 2 else {"email": f"e{i}@b.co"})} for i in range(10)]
+    plan = RenamePlan(MAPPING)
+    assert plan.apply_many(iter(records)) == [plan.apply(record) for record in records]
+
+
+def test_plan_is_not_tied_to_the_callers_mapping():
+    mapping = dict(MAPPING)
+    plan = RenamePlan(mapping)
+    mapping["id"] = "identifier"
+    assert plan.apply({"id": 1}) == {"id": 1}
+
+
+def test_empty_mapping_changes_nothing():
+    plan = RenamePlan({})
+    record = {"a": 1}
+    assert plan.apply(record) is record
+    assert plan.rename_header(["a", "b"]) == ["a", "b"]
+
+
+def test_rename_header_is_positional():
+    """Columns mapped to the same name both stay, in place"""
+    header = ["id", "user_email", "E-mail", "Full Name", "age"]
+    assert RenamePlan(MAPPING).rename_header(header) == ["id", "email", "email", "name", "age"]
+
+
+@pytest.mark.asyncio
+async def test_csv_rewrite_changes_only_the_header():
+    body = [b'id,user_email,"Full Name"\r\n1,a@b.co,"Ann, B"\r\n', b"2,c@d.co,Cy\r\n"]
+    chunks = _chunks(*body)
+    columns, line_ending, rest = await read_csv_header(chunks)
+
+    out = csv_line(RenamePlan(MAPPING).rename_header(columns), line_ending) + rest
+    async for chunk in chunks:
+        out += chunk
+
+    assert out == b'id,email,name\r\n1,a@b.co,"Ann, B"\r\n2,c@d.co,Cy\r\n'
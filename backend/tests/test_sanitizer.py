@@ -0,0 +1,93 @@
+"""
+Tests for input key normalization and value sanitizing
+"""
+
+import pytest
+
+from app.services.preprocessing.sanitizer import Sanitizer
+from app.services.schema_detection.field_names import FIELD_SYNONYMS
+
+
+@pytest.mark.parametrize("key, expected", [
+    ("fname", "first_name"),
+    ("lname", "last_name"),
+    ("name", "name"),
+    ("addr", "address"),
+    ("loc", "address"),
+    ("ph", "phone"),
+    ("tel", "phone"),
+    ("cell", "phone"),
+    ("mob", "phone"),
+    ("mail", "email"),
+    ("dob", "date_of_birth"),
+    ("bday", "date_of_birth"),
+    ("zip", "zip"),
+    ("postcode", "zip"),
+    ("  FName ", "first_name"),
+    ("mobile", "phone"),
+    ("e-mail", "email"),
+    ("Full Name", "name"),
+    ("Post-Code", "zip"),
+])
+def test_known_variations_are_mapped(key, expected):
+    assert list(Sanitizer.normalize_keys({key: 1})) == [expected]
+
+
+@pytest.mark.parametrize("key, expected", [
+    ("is_mobile_user", "is_mobile_user"),
+    ("email_verified", "email_verified"),
+    ("product_id", "product_id"),
+    ("hotel_name", "hotel_name"),
+    ("Hotel Name", "hotel_name"),
+    ("emial", "emial"),
+])
+def test_other_keys_are_only_cleaned(key, expected):
+    """Keys that contain or resemble a variation are never renamed"""
+    assert list(Sanitizer.normalize_keys({key: 1})) == [expected]
+
+
+def test_no_input_key_is_lost():
+    """Keys that share a canonical name are not merged onto it"""
+    data = {
+        "id": 1, "user_id": 7, "created_at": "2024-05-01", "updated_at": "2024-06-01",
+        "name": "A", "username": "a1", "region": "EU", "state": "CA", "phone": "1", "mobile": "2",
+    }
+    normalized = Sanitizer.normalize_keys(data)
+
+    assert len(normalized) == len(data)
+    assert list(normalized.values()) == list(data.values())
+    assert normalized["id"] == 1 and normalized["phone"] == "1"
+
+
+@pytest.mark.parametrize("keys", [
+    ["tel", "cell", "mob"],
+    ["mobile", "phone"],
+    ["fname", "first_name"],
+    ["Mail", "email", "e-mail"],
+    [name for names in FIELD_SYNONYMS.values() for name in names],
+])
+def test_synonyms_of_one_field_all_survive(keys):
+    data = {key: idx for idx, key in enumerate(keys)}
+    assert sorted(Sanitizer.normalize_keys(data).values()) == list(range(len(keys)))
+
+
+def test_first_synonym_takes_a_free_canonical_name():
+    assert Sanitizer.normalize_keys({"tel": 1, "cell": 2}) == {"phone": 1, "cell": 2}
+
+
+def test_values_and_order_are_kept():
+    data = {"id": 7, "fname": "Ann", "Hotel Name": "Ritz", "tel": None}
+    assert Sanitizer.normalize_keys(data) == {"id": 7, "first_name": "Ann", "hotel_name": "Ritz", "phone": None}
+    assert list(Sanitizer.normalize_keys(data)) == ["id", "first_name", "hotel_name", "phone"]
+
+
+def test_sanitize_values_strips_markup_recursively():
+    data = {"a": "  <b>bold</b>\x00 ", "nested": {"b": " x "}, "items": [" y ", {"c": "<i>z</i>"}, 3], "n": 1}
+    assert Sanitizer.sanitize_values(data) == {"a": "bold", "nested": {"b": "x"}, "items": ["y", {"c": "z"}, 3], "n": 1}
+
+
+def test_to_canonical_json():
+    assert Sanitizer.to_canonical_json({"Mail": " a@b.co ", "is_mobile_user": True}) == {
+        "email": "a@b.co",
+        "is_mobile_user": True,
+    }
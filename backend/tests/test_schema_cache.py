@@ -0,0 +1,207 @@
+"""
+Tests for the schema fingerprint cache and its use by the schema detector
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.models import Base
+from app.services.schema_detection import detector as detector_module
+from app.services.schema_detection.cache import SchemaCache, schema_fingerprint
+from app.services.schema_detection.detector import SchemaDetector
+
+TENANT = "key:0123456789abcdef"
+OTHER_TENANT = "key:fedcba9876543210"
+
+
+def _records(n, start=0):
+    return [{"Email": f"user{i}@example.com", "age": 20 + i % 50} for i in range(start, start + n)]
+
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SchemaCache(persist=False)
+    monkeypatch.setattr(settings, "SCHEMA_CACHE_ENABLED", True)
+    monkeypatch.setattr(detector_module, "get_schema_cache", lambda: cache)
+    return cache
+
+
+def _by_name(result):
+    return {field.name: field for field in result["fields"]}
+
+
+def test_fingerprint_ignores_values_but_not_layout():
+    assert schema_fingerprint(_records(10), "detector") == schema_fingerprint(_records(10, start=500), "detector")
+    assert schema_fingerprint(_records(10), "detector") != schema_fingerprint(_records(10), "ai")
+    assert schema_fingerprint(_records(10), "detector") != schema_fingerprint(
+        [{**record, "age": "unknown"} for record in _records(10)], "detector"
+    )
+
+
+@pytest.mark.asyncio
+async def test_miss_then_hit(cache):
+    detector = SchemaDetector()
+    first = await detector.detect_schema(_records(20), tenant=TENANT)
+    assert (cache.misses, cache.memory_hits) == (1, 0)
+
+    second = await detector.detect_schema(_records(20), tenant=TENANT)
+    assert (cache.misses, cache.memory_hits) == (1, 1)
+    assert second["mapping"] == first["mapping"]
+    assert [(f.name, f.type) for f in second["fields"]] == [(f.name, f.type) for f in first["fields"]]
+
+
+@pytest.mark.asyncio
+async def test_only_mapping_and_types_are_cached(cache):
+    result = await SchemaDetector().detect_schema(_records(20), tenant=TENANT)
+
+    (stored,) = cache._memory.values()
+    assert stored == {
+        "mapping": result["mapping"],
+        "types": {field.name: field.type for field in result["fields"]},
+    }
+
+
+@pytest.mark.asyncio
+async def test_hit_recomputes_examples_nullability_and_constraints(cache):
+    detector = SchemaDetector()
+    await detector.detect_schema(_records(20), tenant=TENANT)
+
+    data = _records(20, start=1_000) + [{"Email": None, "age": 999}]
+    hit = await detector.detect_schema(data, tenant=TENANT)
+    assert cache.memory_hits == 1
+
+    fresh = _by_name(await SchemaDetector().detect_schema(data))
+    for name, field in _by_name(hit).items():
+        assert field.examples == fresh[name].examples
+        assert field.nullable == fresh[name].nullable
+        assert field.constraints == fresh[name].constraints
+        assert field.confidence == fresh[name].confidence
+
+    email = next(field for field in hit["fields"] if "Email" in field.original_names)
+    assert email.nullable
+    assert all(example.startswith("user1") for example in email.examples)
+    assert max(field.constraints.get("max", 0) for field in hit["fields"]) == 999
+
+
+@pytest.mark.asyncio
+async def test_hit_follows_type_drift_after_the_fingerprinted_records(cache):
+    """The fingerprint only sees the first records; later values still decide the type"""
+    detector = SchemaDetector()
+    await detector.detect_schema([{"code": i} for i in range(200)], tenant=TENANT)
+
+    drifted = [{"code": i} for i in range(3)] + [{"code": f"user{i}@example.com"} for i in range(200)]
+    result = await detector.detect_schema(drifted, tenant=TENANT)
+
+    assert cache.memory_hits == 1
+    assert _by_name(result)["code"].type == "email"
+
+
+@pytest.mark.asyncio
+async def test_revalidation_keeps_a_bounded_sample(cache, monkeypatch):
+    """The background re-detection holds a sample, not the whole upload"""
+    cache.revalidate = True
+    monkeypatch.setattr(settings, "SCHEMA_CACHE_REVALIDATE_SAMPLE", 10)
+    detector = SchemaDetector()
+    await detector.detect_schema(_records(20), tenant=TENANT)
+
+    revalidated = []
+    detect_for_cache = detector._detect_for_cache
+
+    async def recording_detect_for_cache(sample):
+        revalidated.append(sample)
+        return await detect_for_cache(sample)
+
+    monkeypatch.setattr(detector, "_detect_for_cache", recording_detect_for_cache)
+    data = _records(95)
+    await detector.detect_schema(data, tenant=TENANT)
+    await asyncio.gather(*cache._refreshing.values())
+
+    assert cache.memory_hits == 1
+    assert revalidated == [data[::10]]
+
+
+@pytest.mark.asyncio
+async def test_revalidation_does_not_take_a_tenant_slot(cache, monkeypatch):
+    """A hit's background re-detection leaves the caller's slots free"""
+    cache.revalidate = True
+    executor = detector_module.get_compute_executor()
+    detector = SchemaDetector()
+    await detector.detect_schema(_records(20), tenant=TENANT)
+
+    taken = []
+    slot = executor.slot
+
+    def recording_slot(tenant, *args, **kwargs):
+        taken.append(tenant)
+        return slot(tenant, *args, **kwargs)
+
+    monkeypatch.setattr(executor, "slot", recording_slot)
+    await detector.detect_schema(_records(20), tenant=TENANT)
+    await asyncio.gather(*cache._refreshing.values())
+
+    # Only the foreground detection counted against the tenant
+    assert taken == [TENANT]
+
+
+@pytest.mark.asyncio
+async def test_tenants_do_not_share_entries(cache):
+    detector = SchemaDetector()
+    await detector.detect_schema(_records(20), tenant=TENANT)
+    await detector.detect_schema(_records(20), tenant=OTHER_TENANT)
+    await detector.detect_schema(_records(20))
+
+    assert (cache.misses, cache.memory_hits) == (3, 0)
+    assert len(cache._memory) == 3
+
+
+@pytest.mark.asyncio
+async def test_persisted_entries_survive_a_new_process(sessions):
+    fingerprint = schema_fingerprint(_records(20), "detector")
+    value = {"mapping": {"Email": "email"}, "types": {"email": "email"}}
+
+    writer = SchemaCache()
+    writer._sessions = sessions
+    await writer.put(TENANT, fingerprint, value)
+
+    reader = SchemaCache()
+    reader._sessions = sessions
+    assert await reader.get(TENANT, fingerprint) == value
+    assert await reader.get(TENANT, fingerprint) == value
+    assert await reader.get(OTHER_TENANT, fingerprint) is None
+    assert (reader.db_hits, reader.memory_hits, reader.misses) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_cached_values_are_copies():
+    cache = SchemaCache(persist=False)
+    value = {"mapping": {"a": "a"}, "types": {"a": "integer"}}
+    await cache.put(TENANT, "fp", value)
+    value["types"]["a"] = "string"
+
+    got = await cache.get(TENANT, "fp")
+    got["mapping"].clear()
+    assert await cache.get(TENANT, "fp") == {"mapping": {"a": "a"}, "types": {"a": "integer"}}
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_is_bounded():
+    cache = SchemaCache(max_memory_items=2, persist=False)
+    for fingerprint in ("a", "b", "c"):
+        await cache.put(TENANT, fingerprint, {"mapping": {}, "types": {}})
+
+    assert await cache.get(TENANT, "a") is None
+    assert list(cache._memory) == [(TENANT, "b"), (TENANT, "c")]
@@ -0,0 +1,67 @@
+"""
+Tests for sharded deduplication
+"""
+
+import numpy as np
+import pytest
+
+from app.services.deduplication.candidates import find_similar_pairs, normalize_embeddings
+from app.services.deduplication.sharding import (
+    assign_shards,
+    cross_shard_pairs,
+    lsh_config,
+    merge_shards,
+    shard_pairs,
+)
+
+
+def _sharded_edges(embeddings, shard_keys, threshold, ann_min_records, recall, num_shards=4):
+    """Run the shard and merge steps in process, as the workers would"""
+    shards = assign_shards(shard_keys, num_shards)
+    lsh = lsh_config(len(embeddings), threshold, ann_min_records, recall)
+    results = []
+    for positions in shards:
+        shard_embeddings = embeddings[positions]
+        matrix = normalize_embeddings(shard_embeddings.astype(np.float32))
+        results.append((shard_embeddings, *shard_pairs(matrix, threshold, lsh, recall)))
+
+    merged, edges, partition, codes = merge_shards(len(embeddings), shards, results)
+    matrix = normalize_embeddings(merged.astype(np.float32))
+    edges.update(cross_shard_pairs(matrix, partition, threshold, codes))
+    return edges
+
+
+@pytest.mark.parametrize("ann_min_records", [10_000, 0])
+def test_sharded_edges_equal_unsharded(ann_min_records):
+    """Sharding changes where pairs are scored, not which pairs are found"""
+    rng = np.random.default_rng(3)
+    centers = rng.standard_normal((200, 24))
+    embeddings = np.repeat(centers, 8, axis=0) + 0.2 * rng.standard_normal((1600, 24))
+    embeddings = embeddings.astype(np.float16)
+    # Near-duplicates are spread over shards, so many pairs cross shards
+    shard_keys = [str(k) for k in rng.integers(0, 50, len(embeddings))]
+    threshold, recall = 0.85, 0.99
+
+    sharded = _sharded_edges(embeddings, shard_keys, threshold, ann_min_records, recall)
+    unsharded = find_similar_pairs(
+        normalize_embeddings(embeddings.astype(np.float32)),
+        threshold,
+        ann_min_records=ann_min_records,
+        recall=recall
+    )
+
+    assert unsharded
+    assert sharded.keys() == unsharded.keys()
+    for pair, score in unsharded.items():
+        assert sharded[pair] == pytest.approx(score, abs=1e-5)
+
+
+def test_assign_shards_keeps_keys_together():
+    """Records sharing a shard key land in the same shard"""
+    keys = ["a", "b", "a", "c", "b", "a"]
+    shards = assign_shards(keys, 3)
+
+    assert sorted(pos for shard in shards for pos in shard) == list(range(len(keys)))
+    shard_of = {pos: i for i, shard in enumerate(shards) for pos in shard}
+    assert shard_of[0] == shard_of[2] == shard_of[5]
+    assert shard_of[1] == shard_of[4]
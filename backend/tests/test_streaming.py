@@ -0,0 +1,143 @@
+"""
+Tests for NDJSON and CSV streaming helpers
+"""
+
+import json
+
+import pytest
+
+from app.api.streaming import (
+    CSVError,
+    NDJSONError,
+    csv_line,
+    iter_batches,
+    iter_ndjson,
+    ndjson_line,
+    read_csv_header,
+)
+
+
+class ChunkedBody:
+    """Request stand-in whose body arrives in the given chunks"""
+
+    def __init__(self, *chunks: bytes):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(items):
+    return [item async for item in items]
+
+
+# ============================================================================
+# NDJSON
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_ndjson_lines_split_across_chunks():
+    """Records may span chunk boundaries; blank lines are skipped but counted"""
+    body = ChunkedBody(b'{"a": 1}\n\n{"a"', b': 2}\r\n{"a": 3}')
+    assert await _collect(iter_ndjson(body)) == [(1, {"a": 1}), (3, {"a": 2}), (4, {"a": 3})]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body, line, message", [
+    (b'{"a": 1}\n{"a": \n', 2, "invalid JSON"),
+    (b'{"a": 1}\n[1, 2]\n', 2, "expected a JSON object"),
+    (b'"text"', 1, "expected a JSON object"),
+    (b'\n\n{"a": 1}}\n', 3, "invalid JSON"),
+])
+async def test_ndjson_malformed_lines(body, line, message):
+    """Malformed lines raise NDJSONError with their 1-based line number"""
+    with pytest.raises(NDJSONError) as exc_info:
+        await _collect(iter_ndjson(ChunkedBody(body)))
+    assert exc_info.value.line_number == line
+    assert message in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_ndjson_records_before_an_error_are_yielded():
+    """Records are yielded as they parse, before a later line fails"""
+    seen = []
+    with pytest.raises(NDJSONError):
+        async for item in iter_ndjson(ChunkedBody(b'{"a": 1}\n', b'oops\n')):
+            seen.append(item)
+    assert seen == [(1, {"a": 1})]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_line_limit():
+    """A line without a newline cannot grow past max_line_bytes"""
+    body = ChunkedBody(b'{"a": 1}\n', b'{"b": "' + b"x" * 64, b"x" * 64)
+    with pytest.raises(NDJSONError) as exc_info:
+        await _collect(iter_ndjson(body, max_line_bytes=100))
+    assert exc_info.value.line_number == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_batches():
+    """Items are grouped into lists of at most size"""
+    assert await _collect(iter_batches(_chunks(*range(5)), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_ndjson_line():
+    """Objects encode compactly, one per line, with non-JSON values as strings"""
+    line = ndjson_line({"a": 1, "when": object})
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert json.loads(line)["a"] == 1
+
+
+# ============================================================================
+# CSV
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_csv_header_across_chunks():
+    """The header is parsed and everything after it is returned untouched"""
+    columns, line_ending, rest = await read_csv_header(_chunks(b"\xef\xbb\xbfid,na", b"me\r\n1,a\r\n2,"))
+    assert columns == ["id", "name"]
+    assert line_ending == "\r\n"
+    assert rest == b"1,a\r\n2,"
+
+
+@pytest.mark.asyncio
+async def test_csv_header_with_quoted_newline():
+    """A newline inside a quoted column name does not end the header"""
+    columns, line_ending, rest = await read_csv_header(_chunks(b'id,"full\nname"\n1,a\n'))
+    assert columns == ["id", "full\nname"]
+    assert line_ending == "\n"
+    assert rest == b"1,a\n"
+
+
+@pytest.mark.asyncio
+async def test_csv_header_only():
+    """A header without a trailing newline is still a header"""
+    assert await read_csv_header(_chunks(b"id,name")) == (["id", "name"], "\n", b"")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunks, message", [
+    ((), "no header"),
+    ((b"\n1,2\n",), "no header"),
+    ((b"\xff\xfeid\n",), "not valid UTF-8"),
+    ((b'"unterminated,' + b"x" * 80, b"\n" + b"y" * 80), "exceeds"),
+])
+async def test_csv_malformed_header(chunks, message):
+    """Empty, undecodable and runaway headers raise CSVError"""
+    with pytest.raises(CSVError) as exc_info:
+        await read_csv_header(_chunks(*chunks), max_line_bytes=100)
+    assert message in str(exc_info.value)
+
+
+def test_csv_line_quotes_as_needed():
+    """Values with separators, quotes or newlines are quoted"""
+    assert csv_line(["a", "b,c", 'say "hi"', "x\ny", None]) == b'a,"b,c","say ""hi""","x\ny",\r\n'
+    assert csv_line(["a"], "\n") == b"a\n"